@@ -23,4 +23,20 @@ def create_app():
     from .routes import register_routes
     register_routes(app)
 
+    if app.config["MARKET_REFRESH"] not in ("inline", "thread", "sidecar"):
+        raise ValueError(f"Unsupported MARKET_REFRESH: {app.config['MARKET_REFRESH']}")
+    if app.config["MARKET_REFRESH"] == "thread":
+        from .routes.sp500 import sp500_service
+        from .services.market_refresher import start_market_refresher
+
+        # Started by the first request each worker serves, not here: CLI commands
+        # never spawn it, and under gunicorn --preload it starts after the fork
+        # (a thread started in the master would not survive into the workers)
+        @app.before_request
+        def _start_market_refresher():
+            start_market_refresher(sp500_service)
+
+    from .cli import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Flask CLI commands (run from backend/, e.g. flask build-response-surface)
+"""
+
+import click
+
+
+def register_commands(app):
+    @app.cli.command("build-response-surface")
+    @click.option("--path", default=None, help="Output .npy file (defaults to RESPONSE_SURFACE_PATH)")
+    @click.option("--tax-rate", default=0.25, show_default=True, type=float)
+    @click.option("--inflation-rate", default=0.03, show_default=True, type=float)
+    def build_response_surface(path, tax_rate, inflation_rate):
+        """Precompute the /api/calculator/compare table"""
+        from app.services.response_surface import ResponseSurface
+
+        path = path or app.config.get("RESPONSE_SURFACE_PATH")
+        if not path:
+            raise click.UsageError("Pass --path or set RESPONSE_SURFACE_PATH")
+
+        surface = ResponseSurface.build(path, tax_rate=tax_rate, inflation_rate=inflation_rate)
+        click.echo(f"Wrote {surface.table.nbytes} bytes for {len(surface.metadata['plan_types'])} vehicles to {path}")
+
+    @app.cli.command("build-benchmark-quantiles")
+    def build_benchmark_quantiles():
+        """Compile app/data/benchmark_quantiles.json into the memory-mapped percentile table"""
+        from app.services.percentiles import PercentileTable, TABLE_PATH
+
+        table = PercentileTable.build()
+        click.echo(f"Wrote {len(table.metadata['metrics'])} metrics x {len(table.bands)} age bands to {TABLE_PATH}")
+
+    @app.cli.command("compute-health-scores")
+    @click.option("--chunk-size", default=1000, show_default=True, type=click.IntRange(min=1),
+                  help="Users scored and upserted per batch")
+    def compute_health_scores(chunk_size):
+        """Score every user and refresh the user_insights table"""
+        from app.services.cohort_insights import CohortInsightJob
+
+        stats = CohortInsightJob(chunk_size=chunk_size).run()
+        click.echo(
+            f"Scored {stats['users']} users in {stats['chunks']} chunks, "
+            f"{stats['seconds']:.2f}s ({stats['users_per_sec']:,.0f} users/sec)"
+        )
+
+    @app.cli.command("refresh-market-data")
+    @click.option("--once", is_flag=True, help="Refresh once and exit instead of looping")
+    def refresh_market_data(once):
+        """Keep the shared S&P 500 cache warm (the MARKET_REFRESH=sidecar process)"""
+        from app.services.market_refresher import MarketDataRefresher
+        from app.services.sp500_service import SP500Service
+
+        if not app.config.get("MARKET_CACHE_URL"):
+            raise click.UsageError("Set MARKET_CACHE_URL so the web workers can read what this process fetches")
+
+        refresher = MarketDataRefresher(SP500Service())
+        if once:
+            results = refresher.run_once()
+            click.echo(f"Refreshed {sum(results.values())} of {len(results)} entries due")
+            return
+        click.echo("Refreshing market data; Ctrl+C to stop")
+        try:
+            refresher.run()
+        except KeyboardInterrupt:
+            pass
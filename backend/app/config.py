@@ -24,6 +24,36 @@ class Config:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-dev-secret")
     JWT_ACCESS_TOKEN_EXPIRES = 3600
 
+    # Compute executor (process pool for large simulations and batch jobs).
+    # Every web worker process gets its own pool, so the default of 1 keeps
+    # jobs in-process; raise it where web workers x pool size fits the host
+    COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", 1))
+    COMPUTE_INPROCESS_THRESHOLD = int(os.getenv("COMPUTE_INPROCESS_THRESHOLD", 20000))
+
+    # Result cache (projection / insight / wealth velocity outputs)
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 2048))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 3600))
+
+    # FinancialCalculator memo; set CALCULATOR_CACHE_PATH (a SQLite file)
+    # to share it across worker processes
+    CALCULATOR_CACHE_MAX_ENTRIES = int(os.getenv("CALCULATOR_CACHE_MAX_ENTRIES", 4096))
+    CALCULATOR_CACHE_TTL = int(os.getenv("CALCULATOR_CACHE_TTL", 86400))
+    CALCULATOR_CACHE_PATH = os.getenv("CALCULATOR_CACHE_PATH")
+
+    # Precomputed /api/calculator/compare table (.npy), written by
+    # 'flask build-response-surface'; unset or missing means exact computation
+    RESPONSE_SURFACE_PATH = os.getenv("RESPONSE_SURFACE_PATH")
+
+    # Market data cache (S&P 500 prices, news): unset keeps one cache per
+    # worker; sqlite:////path/market.db shares a file between the workers on
+    # a host; redis://host:6379/0 shares a Redis server (needs 'redis')
+    MARKET_CACHE_URL = os.getenv("MARKET_CACHE_URL")
+
+    # S&P 500 refresh: "inline" fetches on request when the cache expires;
+    # "thread" refreshes from a background thread in each worker; "sidecar"
+    # leaves it to 'flask refresh-market-data' (needs a shared MARKET_CACHE_URL)
+    MARKET_REFRESH = os.getenv("MARKET_REFRESH", "inline")
+
     # News API
     NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
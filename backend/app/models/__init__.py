@@ -1,6 +1,9 @@
 from .user import User
 from .financial_snapshot import FinancialSnapshot
 from .financial_plan import FinancialPlan
+from .user_insight import UserInsight
+from .snapshot_history import SnapshotHistory
+from .net_worth_rollup import NetWorthRollup
 from app.extensions import db
 
 
@@ -0,0 +1,28 @@
+from datetime import date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, Date, ForeignKey
+from app.extensions import db
+
+class NetWorthRollup(db.Model):
+    """
+    Net worth aggregated per day, month or year, kept current from snapshot_history
+
+    One row per (user, resolution, period): open / close are the first and
+    last recorded values in the period, total / samples give the mean.
+    Amounts are whole dollars like SnapshotHistory.
+    """
+    __tablename__ = "net_worth_rollups"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), primary_key=True)
+    resolution: Mapped[str] = mapped_column(String(5), primary_key=True)  # "day", "month" or "year"
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    open: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    close: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    low: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    high: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    total: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<NetWorthRollup user_id={self.user_id} {self.resolution} {self.period_start}>"
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, BigInteger, DateTime, ForeignKey, Index
+from app.extensions import db
+
+class SnapshotHistory(db.Model):
+    """
+    Append-only record of a user's finances, one row per snapshot update
+
+    Amounts are whole dollars and velocity is in basis points so every
+    column is an integer: SQLite stores typical values in 1-4 bytes instead
+    of 8 for a float, which keeps millions of rows cheap. Amounts are
+    BigInteger so large fortunes don't overflow int32 on PostgreSQL.
+    """
+    __tablename__ = "snapshot_history"
+    __table_args__ = (
+        Index('ix_snapshot_history_user_recorded', 'user_id', 'recorded_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    # Whole dollars (assets include plan cash values)
+    net_worth: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    total_assets: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    debt: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    monthly_income: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    monthly_plan_contributions: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # Wealth velocity at the time, in basis points (1234 = 12.34%); None if it could not be scored
+    velocity_bp: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    @property
+    def velocity(self) -> Optional[float]:
+        return self.velocity_bp / 100 if self.velocity_bp is not None else None
+
+    def __repr__(self) -> str:
+        return f"<SnapshotHistory user_id={self.user_id} at={self.recorded_at}>"
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey
+from app.extensions import db
+
+class UserInsight(db.Model):
+    """Materialized health score per user, written by 'flask compute-health-scores'"""
+    __tablename__ = "user_insights"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), primary_key=True)
+
+    # Health score
+    health_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    rating: Mapped[str] = mapped_column(String(30), nullable=False)
+
+    # Core metrics
+    net_worth: Mapped[float] = mapped_column(Float, nullable=False)
+    savings_rate: Mapped[float] = mapped_column(Float, nullable=False)
+    months_covered: Mapped[float] = mapped_column(Float, nullable=False)
+    debt_to_income: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Peer comparison
+    age_group: Mapped[str] = mapped_column(String(10), nullable=False)
+    net_worth_percentile: Mapped[int] = mapped_column(Integer, nullable=False)
+    savings_rate_percentile: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # InsightEngine.VERSION the row was computed with
+    engine_version: Mapped[str] = mapped_column(String(10), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<UserInsight user_id={self.user_id} score={self.health_score}>"
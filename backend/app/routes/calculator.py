@@ -1,15 +1,35 @@
+import math
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.services.financial_calculator import FinancialCalculator
+from app.services.response_surface import get_response_surface
+from app.services.result_cache import get_calculator_cache
 
 calculator_bp = Blueprint("calculator", __name__, url_prefix="/api/calculator")
 
+# Upper bound on simulated paths per stochastic request
+MAX_STOCHASTIC_PATHS = 50000
+
+# Upper bound on parameter sets per /batch request
+MAX_BATCH_PARAM_SETS = 1000
+
+# Ages and contribution years in /batch must fall in [0, MAX_AGE]
+MAX_AGE = 120
+
+REQUIRED_PARAMS = ["current_age", "monthly_contribution", "years_to_contribute",
+                   "income_start_age", "income_end_age"]
+
 
 @calculator_bp.route("/compare", methods=["POST"])
 @jwt_required()
 def compare_plans():
     """
     Compare financial plans with projections
+    
+    Optional "mode": "stochastic" (with "paths" and "seed") simulates
+    random return sequences and returns cash value and after-tax income
+    percentiles instead of best/average/worst cases.
     """
     data = request.get_json()
     
@@ -23,14 +43,38 @@ def compare_plans():
         if field not in data:
             return jsonify({"error": f"Missing required field: {field}"}), 400
     
+    options, error = _stochastic_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
     try:
         calculator = FinancialCalculator(
             tax_rate=data.get("tax_rate", 0.25),
             inflation_rate=data.get("inflation_rate", 0.03)
         )
         
-        result = calculator.calculate_projection(
-            plan_type=data["plan_type"],
+        if options["mode"] == "stochastic":
+            result = _simulate(calculator, [data["plan_type"]], data, options)
+            return jsonify(result[0]), 200
+        
+        # Precomputed table when built for these rates, exact otherwise
+        surface = get_response_surface()
+        if surface is not None and surface.matches(calculator):
+            result = surface.lookup(
+                plan_type=data["plan_type"],
+                current_age=data["current_age"],
+                monthly_contribution=data["monthly_contribution"],
+                years_to_contribute=data["years_to_contribute"],
+                income_start_age=data["income_start_age"],
+                income_end_age=data["income_end_age"],
+                current_value=data.get("current_value", 0.0)
+            )
+            if result is not None:
+                return jsonify(result), 200
+        
+        result = calculator.calculate_projections_memoized(
+            get_calculator_cache(),
+            plan_types=[data["plan_type"]],
             current_age=data["current_age"],
             monthly_contribution=data["monthly_contribution"],
             years_to_contribute=data["years_to_contribute"],
@@ -39,7 +83,7 @@ def compare_plans():
             current_value=data.get("current_value", 0.0)
         )
         
-        return jsonify(result), 200
+        return jsonify(result[0]), 200
         
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -52,6 +96,9 @@ def compare_plans():
 def compare_multiple_plans():
     """
     Compare multiple plans side by side
+    
+    "params" may set "mode": "stochastic" (with "paths" and "seed") to
+    simulate every vehicle at once (see /compare).
     """
     data = request.get_json()
     
@@ -61,33 +108,165 @@ def compare_multiple_plans():
     plans_to_compare = data["plans"]  # List of plan types
     params = data.get("params", {})
     
-    required_params = ["current_age", "monthly_contribution", "years_to_contribute",
-                      "income_start_age", "income_end_age"]
-    
-    for field in required_params:
+    for field in REQUIRED_PARAMS:
         if field not in params:
             return jsonify({"error": f"Missing required parameter: {field}"}), 400
     
+    options, error = _stochastic_options(params)
+    if error:
+        return jsonify({"error": error}), 400
+    
     try:
         calculator = FinancialCalculator(
             tax_rate=params.get("tax_rate", 0.25),
             inflation_rate=params.get("inflation_rate", 0.03)
         )
         
-        results = []
-        for plan_type in plans_to_compare:
-            result = calculator.calculate_projection(
-                plan_type=plan_type,
-                current_age=params["current_age"],
-                monthly_contribution=params["monthly_contribution"],
-                years_to_contribute=params["years_to_contribute"],
-                income_start_age=params["income_start_age"],
-                income_end_age=params["income_end_age"],
-                current_value=params.get("current_value", 0.0)
-            )
-            results.append(result)
+        if options["mode"] == "stochastic":
+            return jsonify({"comparisons": _simulate(calculator, plans_to_compare, params, options)}), 200
+        
+        # Memoized vehicles are reused; the rest run in one batched pass
+        results = calculator.calculate_projections_memoized(
+            get_calculator_cache(),
+            plan_types=plans_to_compare,
+            current_age=params["current_age"],
+            monthly_contribution=params["monthly_contribution"],
+            years_to_contribute=params["years_to_contribute"],
+            income_start_age=params["income_start_age"],
+            income_end_age=params["income_end_age"],
+            current_value=params.get("current_value", 0.0)
+        )
         
         return jsonify({"comparisons": results}), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@calculator_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def compare_batch():
+    """
+    Evaluate many parameter sets in one vectorized pass (e.g. slider sweeps)
+    
+    Body: "plans" (list of plan types, or a single "plan_type"), base
+    "params" as in /compare-multiple, and "param_sets", a list of partial
+    overrides merged onto params. tax_rate and inflation_rate apply to the
+    whole batch, so they may only be set in params.
+    
+    e.g. {"plans": ["Roth IRA"], "params": {...},
+          "param_sets": [{"monthly_contribution": 100}, {"monthly_contribution": 200}]}
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No input data provided"}), 400
+    
+    plan_types = data.get("plans") or ([data["plan_type"]] if "plan_type" in data else None)
+    if not isinstance(plan_types, list) or not plan_types:
+        return jsonify({"error": "No plans provided"}), 400
+    
+    params = data.get("params", {})
+    if not isinstance(params, dict):
+        return jsonify({"error": "params must be an object"}), 400
+    overrides = data.get("param_sets")
+    if not isinstance(overrides, list) or not overrides:
+        return jsonify({"error": "param_sets must be a non-empty list"}), 400
+    if len(overrides) > MAX_BATCH_PARAM_SETS:
+        return jsonify({"error": f"At most {MAX_BATCH_PARAM_SETS} param_sets per request"}), 400
+    
+    param_sets = []
+    for index, override in enumerate(overrides):
+        if not isinstance(override, dict):
+            return jsonify({"error": f"param_sets[{index}] must be an object"}), 400
+        if "tax_rate" in override or "inflation_rate" in override:
+            return jsonify({"error": "tax_rate and inflation_rate may only be set in params"}), 400
+        merged = {**params, **override}
+        for field in REQUIRED_PARAMS:
+            if field not in merged:
+                return jsonify({"error": f"Missing required parameter in param_sets[{index}]: {field}"}), 400
+        for field in ["current_age", "years_to_contribute", "income_start_age", "income_end_age"]:
+            value = merged[field]
+            if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= MAX_AGE:
+                return jsonify({"error": f"{field} must be an integer between 0 and {MAX_AGE} in param_sets[{index}]"}), 400
+        for field in ["monthly_contribution", "current_value"]:
+            if field in merged and not _is_number(merged[field]):
+                return jsonify({"error": f"{field} must be a number in param_sets[{index}]"}), 400
+        param_sets.append(merged)
+    
+    for field in ["tax_rate", "inflation_rate"]:
+        if field in params and not _is_number(params[field]):
+            return jsonify({"error": f"{field} must be a number"}), 400
+    
+    try:
+        calculator = FinancialCalculator(
+            tax_rate=params.get("tax_rate", 0.25),
+            inflation_rate=params.get("inflation_rate", 0.03)
+        )
+        
+        inputs = [
+            {field: merged[field] for field in REQUIRED_PARAMS + ["current_value"] if field in merged}
+            for merged in param_sets
+        ]
+        comparisons = calculator.calculate_projection_sets(plan_types, inputs)
+        
+        return jsonify({
+            "results": [
+                {"params": merged, "comparisons": result}
+                for merged, result in zip(param_sets, comparisons)
+            ]
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error evaluating calculator batch: {str(e)}")
+        return jsonify({"error": "Calculation failed"}), 500
+
+
+def _is_number(value):
+    """Finite int or float, but not bool (a JSON true/false) or NaN/Infinity"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _stochastic_options(data):
+    """Validate mode / paths / seed, returning (options, error message)"""
+    mode = data.get("mode", "deterministic")
+    if mode not in ["deterministic", "stochastic"]:
+        return None, "Invalid mode. Must be 'deterministic' or 'stochastic'"
+    
+    paths = data.get("paths", 5000)
+    if not isinstance(paths, int) or isinstance(paths, bool) or not 1 <= paths <= MAX_STOCHASTIC_PATHS:
+        return None, f"paths must be an integer between 1 and {MAX_STOCHASTIC_PATHS}"
+    
+    seed = data.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return None, "seed must be a non-negative integer"
+    
+    return {"mode": mode, "paths": paths, "seed": seed}, None
+
+
+def _simulate(calculator, plan_types, params, options):
+    """Stochastic projections for plan_types (memoized when seeded)"""
+    inputs = {
+        "current_age": params["current_age"],
+        "monthly_contribution": params["monthly_contribution"],
+        "years_to_contribute": params["years_to_contribute"],
+        "income_start_age": params["income_start_age"],
+        "income_end_age": params["income_end_age"],
+        "current_value": params.get("current_value", 0.0)
+    }
+    
+    def simulate():
+        return calculator.simulate_projections(plan_types, paths=options["paths"], seed=options["seed"], **inputs)
+    
+    if options["seed"] is None:
+        return simulate()
+    
+    cache = get_calculator_cache()
+    key = cache.make_key('calculator.stochastic', calculator.VERSION,
+                         [plan_types, inputs, options, calculator.tax_rate, calculator.inflation_rate])
+    return cache.get_or_compute(None, key, simulate)
+
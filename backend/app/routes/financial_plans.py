@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import FinancialPlan
 from app.extensions import db
 from app.schemas import financial_plan_schema, financial_plans_schema
+from app.services.result_cache import get_result_cache
 
 financial_plans_bp = Blueprint("financial_plans", __name__, url_prefix="/api/financial-plans")
 
@@ -77,6 +78,7 @@ def create_plan():
         
         db.session.add(plan)
         db.session.commit()
+        get_result_cache().invalidate_user(int(user_id))
         
         return jsonify({
             "message": "Financial plan created successfully",
@@ -125,6 +127,7 @@ def update_plan(plan_id):
         plan.notes = validated_data.get("notes", "")
         
         db.session.commit()
+        get_result_cache().invalidate_user(int(user_id))
         
         return jsonify({
             "message": "Financial plan updated successfully",
@@ -150,6 +153,7 @@ def delete_plan(plan_id):
     try:
         db.session.delete(plan)
         db.session.commit()
+        get_result_cache().invalidate_user(int(user_id))
         return jsonify({"message": "Plan deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,8 +1,14 @@
+from datetime import date, datetime, timezone
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import FinancialSnapshot
+from app.models import FinancialSnapshot, FinancialPlan
 from app.extensions import db
 from app.schemas import financial_snapshot_schema
+from app.services.result_cache import get_result_cache
+from app.services.snapshot_history import (
+    record_snapshot, choose_resolution, first_recorded_day, net_worth_timeline,
+    period_count, ROLLUP_RESOLUTIONS, MAX_TIMELINE_POINTS
+)
 
 financial_snapshot_bp = Blueprint("financial_snapshot", __name__, url_prefix="/api/financial-snapshot")
 
@@ -73,7 +79,12 @@ def update_snapshot():
             )
             db.session.add(snapshot)
         
+        # Append to the history in the same transaction (recording failures don't fail the save)
+        plans = FinancialPlan.query.filter_by(user_id=int(user_id)).all()
+        record_snapshot(snapshot, plans)
+        
         db.session.commit()
+        get_result_cache().invalidate_user(int(user_id))
         
         return jsonify({
             "message": "Financial snapshot updated successfully",
@@ -82,4 +93,70 @@ def update_snapshot():
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": "Failed to update snapshot"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to update snapshot"}), 500
+
+
+@financial_snapshot_bp.route("/timeline", methods=["GET"])
+@jwt_required()
+def get_timeline():
+    """
+    Net worth over time from the user's recorded snapshots
+    
+    Query params:
+        start, end: ISO dates (default: first recorded day .. today)
+        resolution: "day", "month" or "year" (default: the finest one that
+            fits the range in MAX_TIMELINE_POINTS points)
+    
+    Returns:
+    {
+        "resolution": "month",
+        "start": "2025-01-01",
+        "end": "2026-10-17",
+        "points": [
+            {"period": "2025-01-01", "open": 41000, "close": 43500, "low": 41000,
+             "high": 43500, "average": 42250.0, "samples": 2},
+            ...
+        ]
+    }
+    """
+    user_id = int(get_jwt_identity())
+    
+    try:
+        end = date.fromisoformat(request.args['end']) if 'end' in request.args else datetime.now(timezone.utc).date()
+        if 'start' in request.args:
+            start = date.fromisoformat(request.args['start'])
+        else:
+            start = first_recorded_day(user_id) or end
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO dates (YYYY-MM-DD)"}), 400
+    
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    
+    resolution = request.args.get('resolution')
+    if resolution is None:
+        resolution = choose_resolution(start, end)
+        if resolution is None:
+            return jsonify({"error": "Date range too long"}), 400
+    elif resolution not in ROLLUP_RESOLUTIONS:
+        return jsonify({
+            "error": "Invalid resolution",
+            "valid_resolutions": ROLLUP_RESOLUTIONS
+        }), 400
+    elif period_count(resolution, start, end) > MAX_TIMELINE_POINTS:
+        return jsonify({
+            "error": f"Date range too long for {resolution} resolution (max {MAX_TIMELINE_POINTS} points)"
+        }), 400
+    
+    try:
+        points = net_worth_timeline(user_id, resolution, start, end)
+        return jsonify({
+            "resolution": resolution,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "points": points
+        }), 200
+        
+    except Exception as e:
+        print(f"Timeline error: {str(e)}")
+        return jsonify({"error": "Failed to load timeline"}), 500
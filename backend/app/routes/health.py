@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify
+from app.services.result_cache import get_calculator_cache, get_result_cache
 
 health_bp = Blueprint("health", __name__)
 
@@ -8,3 +9,11 @@ def health_check():
         "status": "ok",
         "message": "Financial Life API is running"
     })
+
+@health_bp.route("/health/cache", methods=["GET"])
+def cache_stats():
+    """Cache hit/miss counters, for sizing the *_CACHE_MAX_ENTRIES / *_CACHE_TTL settings"""
+    return jsonify({
+        "results": get_result_cache().stats(),
+        "calculator": get_calculator_cache().stats()
+    })
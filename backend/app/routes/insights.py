@@ -6,6 +6,7 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import FinancialSnapshot, FinancialPlan
 from app.services.insight_engine import InsightEngine
+from app.services.result_cache import get_result_cache
 
 insights_bp = Blueprint("insights", __name__, url_prefix="/api/insights")
 
@@ -62,7 +63,11 @@ def get_financial_analysis():
         
         # Generate insights
         engine = InsightEngine()
-        analysis = engine.analyze_financial_profile(user_data)
+        cache = get_result_cache()
+        key = cache.make_key('insights.analysis', engine.VERSION, user_data)
+        analysis = cache.get_or_compute(
+            int(user_id), key, lambda: engine.analyze_financial_profile(user_data)
+        )
         
         return jsonify(analysis), 200
         
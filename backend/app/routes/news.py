@@ -2,29 +2,51 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required
 import requests
 import os
+from app.services.market_cache import get_market_cache
 
 news_bp = Blueprint("news", __name__, url_prefix="/api/news")
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 NEWS_BASE_URL = "https://newsapi.org/v2"
+NEWS_CACHE_MINUTES = 15
+
+
+def _fetch_articles(endpoint, params):
+    """Articles from one NewsAPI endpoint (raises requests exceptions)"""
+    response = requests.get(
+        f"{NEWS_BASE_URL}/{endpoint}",
+        params={**params, "pageSize": 10, "apiKey": NEWS_API_KEY},
+        timeout=5
+    )
+    response.raise_for_status()
+    return response.json()["articles"]
+
+
+def _stale_or_raise(stale, error):
+    """Serve the last good articles when NewsAPI fails, otherwise surface the error"""
+    if stale is not None:
+        return stale
+    raise error or requests.Timeout("Timed out waiting for another worker's fetch")
+
+
+def _cached_articles(key, endpoint, params):
+    return get_market_cache().get_or_fetch(
+        f"news:{key}", NEWS_CACHE_MINUTES * 60,
+        lambda: _fetch_articles(endpoint, params),
+        _stale_or_raise
+    )
+
 
 @news_bp.route("/headlines", methods=["GET"])
 @jwt_required()
 def get_headlines():
     """Get top business headlines"""
     try:
-        response = requests.get(
-            f"{NEWS_BASE_URL}/top-headlines",
-            params={
-                "category": "business",
-                "country": "us",
-                "pageSize": 10,
-                "apiKey": NEWS_API_KEY,
-            },
-            timeout=5
-        )
-        response.raise_for_status()
-        return jsonify(response.json()["articles"]), 200
+        articles = _cached_articles("headlines", "top-headlines", {
+            "category": "business",
+            "country": "us",
+        })
+        return jsonify(articles), 200
     except requests.Timeout:
         return jsonify({"error": "News service timeout"}), 504
     except requests.RequestException as e:
@@ -35,19 +57,12 @@ def get_headlines():
 def get_articles():
     """Get financial articles"""
     try:
-        response = requests.get(
-            f"{NEWS_BASE_URL}/everything",
-            params={
-                "q": "personal finance OR investing OR retirement planning",
-                "language": "en",
-                "sortBy": "relevancy",
-                "pageSize": 10,
-                "apiKey": NEWS_API_KEY,
-            },
-            timeout=5
-        )
-        response.raise_for_status()
-        return jsonify(response.json()["articles"]), 200
+        articles = _cached_articles("articles", "everything", {
+            "q": "personal finance OR investing OR retirement planning",
+            "language": "en",
+            "sortBy": "relevancy",
+        })
+        return jsonify(articles), 200
     except requests.Timeout:
         return jsonify({"error": "News service timeout"}), 504
     except requests.RequestException as e:
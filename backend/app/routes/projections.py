@@ -2,13 +2,24 @@
 API routes for financial projections
 """
 
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, FinancialSnapshot, FinancialPlan
+from app.models import FinancialSnapshot, FinancialPlan
+from app.services.executor import get_executor
+from app.services.goal_solver import GoalSolver
 from app.services.projection_engine import ProjectionEngine
+from app.services.result_cache import get_result_cache
 
 projections_bp = Blueprint("projections", __name__, url_prefix="/api/projections")
 
+# Upper bound on simulated paths per Monte Carlo request
+MAX_MONTE_CARLO_PATHS = 100000
+
+# Upper bound on cells per what-if grid request
+MAX_GRID_CELLS = 10000
+
 
 @projections_bp.route("/full", methods=["POST"])
 @jwt_required()
@@ -19,15 +30,35 @@ def generate_full_projection():
     Request Body:
     {
         "scenario": "predicted" | "best" | "worst",
-        "retirement_age": 65 (optional)
+        "retirement_age": 65 (optional),
+        "mode": "deterministic" | "monte_carlo" (optional),
+        "resolution": "annual" | "monthly" (optional, deterministic only),
+        "include_months": false (optional, monthly resolution only),
+        "paths": 10000 (optional, monte_carlo only),
+        "seed": 42 (optional, monte_carlo only),
+        "target_net_worth": 2000000 (optional, monte_carlo only)
     }
     
+    Query params:
+        format=rows (default) | columnar
+    
     Returns:
     {
         "scenario": "predicted",
         "projections": [...],  // Year-by-year data
         "summary": {...}       // Summary statistics
     }
+    
+    With format=columnar, "projections" is one array per field
+    ({"year": [...], "age": [...], "net_worth": [...], ...}) plus
+    "plan_types" and a "plan_values" [plan][year] matrix.
+    
+    Monthly resolution simulates the cash-flow waterfall month by month
+    and returns annual rollups; include_months adds per-month detail
+    ("monthly_projections").
+    
+    Monte Carlo mode returns p5/p25/p50/p75/p95 net worth bands per year
+    ("net_worth_percentiles") and the probability of reaching the target.
     """
     user_id = get_jwt_identity()
     data = request.get_json() or {}
@@ -36,47 +67,73 @@ def generate_full_projection():
     if scenario not in ['predicted', 'best', 'worst']:
         return jsonify({"error": "Invalid scenario. Must be 'predicted', 'best', or 'worst'"}), 400
     
+    mode = data.get('mode', 'deterministic')
+    if mode not in ['deterministic', 'monte_carlo']:
+        return jsonify({"error": "Invalid mode. Must be 'deterministic' or 'monte_carlo'"}), 400
+    
+    resolution = data.get('resolution', 'annual')
+    if resolution not in ['annual', 'monthly']:
+        return jsonify({"error": "Invalid resolution. Must be 'annual' or 'monthly'"}), 400
+    if resolution == 'monthly' and mode == 'monte_carlo':
+        return jsonify({"error": "Monthly resolution is only available in deterministic mode"}), 400
+    
+    include_months = data.get('include_months', False)
+    if not isinstance(include_months, bool):
+        return jsonify({"error": "include_months must be a boolean"}), 400
+    
+    paths = data.get('paths', 10000)
+    if not isinstance(paths, int) or isinstance(paths, bool) or not 1 <= paths <= MAX_MONTE_CARLO_PATHS:
+        return jsonify({"error": f"paths must be an integer between 1 and {MAX_MONTE_CARLO_PATHS}"}), 400
+    
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return jsonify({"error": "seed must be a non-negative integer"}), 400
+    
+    output_format = request.args.get('format', 'rows')
+    if output_format not in ['rows', 'columnar']:
+        return jsonify({"error": "Invalid format. Must be 'rows' or 'columnar'"}), 400
+    
+    target_net_worth = data.get('target_net_worth')
+    if target_net_worth is not None and (not isinstance(target_net_worth, (int, float)) or isinstance(target_net_worth, bool)):
+        return jsonify({"error": "target_net_worth must be a number"}), 400
+    
     try:
-        # Get user data
-        snapshot = FinancialSnapshot.query.filter_by(user_id=int(user_id)).first()
-        plans = FinancialPlan.query.filter_by(user_id=int(user_id)).all()
-        user = User.query.get(int(user_id))
-        
-        if not snapshot:
+        user_data = _load_user_data(user_id, data.get('retirement_age', 65))
+        if user_data is None:
             return jsonify({"error": "Financial snapshot not found. Please update your snapshot first."}), 404
         
-        # Build user data dictionary
-        user_data = {
-            'age': snapshot.age,
-            'monthly_income': snapshot.net_income,
-            'side_income': snapshot.side_income,
-            'monthly_expenses': snapshot.monthly_expenses,
-            'savings': snapshot.savings,
-            'investments': snapshot.investments,
-            'debt': snapshot.debt,
-            'debt_interest_rate': 0,  # Assuming interest-free for now
-            'plans': [
-                {
-                    'plan_type': p.plan_type,
-                    'cash_value': p.cash_value,
-                    'monthly_contribution': p.monthly_contribution,
-                    'years_to_contribute': p.years_to_contribute,
-                    'user_current_age': p.user_current_age,
-                    'income_rate': p.income_rate,
-                    'income_start_age': p.income_start_age,
-                    'income_end_age': p.income_end_age
-                }
-                for p in plans
-            ],
-            'retirement_age': data.get('retirement_age', 65)
-        }
-        
         # Generate projection
         engine = ProjectionEngine()
-        projection = engine.generate_full_projection(user_data, scenario)
+        cache = get_result_cache()
+        if mode == 'monte_carlo':
+            def compute():
+                return engine.generate_monte_carlo(
+                    user_data, scenario, paths, seed, target_net_worth, executor=get_executor()
+                )
+            if seed is None:
+                # Unseeded runs are random by design
+                projection = compute()
+            else:
+                key = cache.make_key('projection.monte_carlo', engine.VERSION,
+                                     [user_data, scenario, paths, seed, target_net_worth])
+                projection = cache.get_or_compute(int(user_id), key, compute)
+        elif resolution == 'monthly':
+            key = cache.make_key('projection.monthly', engine.VERSION,
+                                 [user_data, scenario, output_format, include_months])
+            projection = cache.get_or_compute(
+                int(user_id), key,
+                lambda: engine.generate_monthly_projection(user_data, scenario, output_format, include_months)
+            )
+        else:
+            key = cache.make_key('projection.full', engine.VERSION, [user_data, scenario, output_format])
+            projection = cache.get_or_compute(
+                int(user_id), key, lambda: engine.generate_full_projection(user_data, scenario, output_format)
+            )
         
         return jsonify(projection), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Projection error: {str(e)}")  # Debug
         return jsonify({"error": "Failed to generate projection"}), 500
@@ -88,64 +145,392 @@ def generate_all_scenarios():
     """
     Generate projections for all three scenarios at once
     
+    Request Body (optional):
+    {
+        "retirement_age": 65,
+        "custom_scenarios": [
+            {
+                "name": "high_inflation",
+                "income_growth": 0.02,
+                "expense_growth": 0.05,
+                "investment_return": 0.05,
+                "plan_returns": {"Roth IRA": 0.06}
+            }
+        ]
+    }
+    
+    Query params:
+        format=rows (default) | columnar (see /full)
+    
     Returns:
     {
         "predicted": {...},
         "best": {...},
-        "worst": {...}
+        "worst": {...},
+        "<custom name>": {...}
     }
     """
     user_id = get_jwt_identity()
     data = request.get_json(silent=True) or {}
     
+    output_format = request.args.get('format', 'rows')
+    if output_format not in ['rows', 'columnar']:
+        return jsonify({"error": "Invalid format. Must be 'rows' or 'columnar'"}), 400
+    
     try:
-        # Get user data (same as above)
-        snapshot = FinancialSnapshot.query.filter_by(user_id=int(user_id)).first()
-        plans = FinancialPlan.query.filter_by(user_id=int(user_id)).all()
-        
-        if not snapshot:
+        user_data = _load_user_data(user_id, data.get('retirement_age', 65))
+        if user_data is None:
             return jsonify({"error": "Financial snapshot required"}), 404
-        if not snapshot.age:
-            return jsonify({"error": "Please update your age in Financial Snapshot"}), 400
-        
-        user_data = {
-            'age': snapshot.age,
-            'monthly_income': snapshot.net_income,
-            'side_income': snapshot.side_income,
-            'monthly_expenses': snapshot.monthly_expenses,
-            'savings': snapshot.savings,
-            'investments': snapshot.investments,
-            'debt': snapshot.debt,
-            'debt_interest_rate': 0,
-            'plans': [
-                {
-                    'plan_type': p.plan_type,
-                    'cash_value': p.cash_value,
-                    'monthly_contribution': p.monthly_contribution,
-                    'years_to_contribute': p.years_to_contribute,
-                    'user_current_age': p.user_current_age,
-                    'income_rate': p.income_rate,
-                    'income_start_age': p.income_start_age,
-                    'income_end_age': p.income_end_age
-                }
-                for p in plans
-            ],
-            'retirement_age': data.get('retirement_age', 65)
-        }
-        
-        # Generate all scenarios
+        
+        # Generate all scenarios (and any custom ones) in one vectorized pass
+        custom_scenarios = data.get('custom_scenarios', [])
+        if not isinstance(custom_scenarios, list):
+            return jsonify({"error": "custom_scenarios must be a list"}), 400
+        
+        scenarios = ['predicted', 'best', 'worst'] + custom_scenarios
         engine = ProjectionEngine()
+        names = [engine.resolve_scenario(s)['name'] for s in scenarios]
+        if len(set(names)) != len(names):
+            return jsonify({"error": "Scenario names must be unique"}), 400
         
-        predicted = engine.generate_full_projection(user_data, 'predicted')
-        best = engine.generate_full_projection(user_data, 'best')
-        worst = engine.generate_full_projection(user_data, 'worst')
+        cache = get_result_cache()
+        key = cache.make_key('projection.scenarios', engine.VERSION, [user_data, scenarios, output_format])
+        projections = cache.get_or_compute(
+            int(user_id), key, lambda: engine.generate_scenarios(user_data, scenarios, output_format)
+        )
         
-        return jsonify({
-            'predicted': predicted,
-            'best': best,
-            'worst': worst
-        }), 200
+        return jsonify(projections), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Projection error: {str(e)}")
-        return jsonify({"error": "Failed to generate projections"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to generate projections"}), 500
+
+
+@projections_bp.route("/solve", methods=["POST"])
+@jwt_required()
+def solve_goal():
+    """
+    Goal-seek: solve for the value that reaches a target net worth
+    
+    Request Body:
+    {
+        "unknown": "monthly_contribution" | "retirement_age" | "expense_cut" | "return",
+        "target_net_worth": 2000000,
+        "target_age": 60 (required except for retirement_age),
+        "scenario": "predicted" | "best" | "worst" (optional),
+        "bounds": [0, 5000] (optional search range),
+        "plan_type": "Roth IRA" (optional, monthly_contribution only)
+    }
+    
+    Returns:
+    {
+        "unknown": "monthly_contribution",
+        "solved": true,
+        "value": 1234.56,             // null when unreachable within bounds
+        "projected_net_worth": ...,
+        "iterations": 4,
+        "evaluations": 66
+    }
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    unknown = data.get('unknown')
+    if unknown not in GoalSolver.UNKNOWNS:
+        return jsonify({"error": f"Invalid unknown. Must be one of: {', '.join(GoalSolver.UNKNOWNS)}"}), 400
+    
+    target_net_worth = data.get('target_net_worth')
+    if not isinstance(target_net_worth, (int, float)) or isinstance(target_net_worth, bool):
+        return jsonify({"error": "target_net_worth must be a number"}), 400
+    
+    target_age = data.get('target_age')
+    if unknown != 'retirement_age' and (not isinstance(target_age, int) or isinstance(target_age, bool)):
+        return jsonify({"error": "target_age must be an integer"}), 400
+    
+    scenario = data.get('scenario', 'predicted')
+    if scenario not in ['predicted', 'best', 'worst']:
+        return jsonify({"error": "Invalid scenario. Must be 'predicted', 'best', or 'worst'"}), 400
+    
+    bounds = data.get('bounds')
+    if bounds is not None and not (
+        isinstance(bounds, list) and len(bounds) == 2 and
+        all(isinstance(b, (int, float)) and not isinstance(b, bool) for b in bounds)
+    ):
+        return jsonify({"error": "bounds must be a list of two numbers"}), 400
+    
+    plan_type = data.get('plan_type', 'Roth IRA')
+    if not isinstance(plan_type, str):
+        return jsonify({"error": "plan_type must be a string"}), 400
+    
+    try:
+        user_data = _load_user_data(user_id, target_age or 65)
+        if user_data is None:
+            return jsonify({"error": "Financial snapshot not found. Please update your snapshot first."}), 404
+        
+        solver = GoalSolver()
+        cache = get_result_cache()
+        key = cache.make_key('projection.solve', solver.engine.VERSION,
+                             [user_data, unknown, target_net_worth, target_age, scenario, bounds, plan_type])
+        result = cache.get_or_compute(
+            int(user_id), key,
+            lambda: solver.solve(user_data, unknown, target_net_worth, target_age, scenario, bounds, plan_type)
+        )
+        
+        return jsonify(result), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Solver error: {str(e)}")
+        return jsonify({"error": "Failed to solve goal"}), 500
+
+
+@projections_bp.route("/grid", methods=["POST"])
+@jwt_required()
+def generate_grid():
+    """
+    What-if sensitivity grid: net worth at retirement for every cell
+    
+    Request Body:
+    {
+        "retirement_ages": [55, 56, ..., 70],
+        "contribution_multipliers": [0.5, 0.75, 1.0, 1.25, 1.5] (optional),
+        "expense_multipliers": [1.0] (optional),
+        "scenarios": ["predicted", "best", "worst"] (optional, custom scenarios allowed),
+        "include_paths": false (optional)
+    }
+    
+    Returns:
+    {
+        "axes": {"scenario": [...], "contribution_multiplier": [...],
+                 "expense_multiplier": [...], "retirement_age": [...]},
+        "shape": [3, 5, 1, 16],
+        "net_worth": [[[[...]]]],   // indexed [scenario][contribution][expense][age]
+        "paths": {...}              // include_paths only
+    }
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    retirement_ages = data.get('retirement_ages', [65])
+    if not isinstance(retirement_ages, list) or not all(
+        isinstance(a, int) and not isinstance(a, bool) and a <= 120 for a in retirement_ages
+    ):
+        return jsonify({"error": "retirement_ages must be a list of integer ages"}), 400
+    
+    multipliers = {}
+    for field in ('contribution_multipliers', 'expense_multipliers'):
+        values = data.get(field, [1.0])
+        if not isinstance(values, list) or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0 for v in values
+        ):
+            return jsonify({"error": f"{field} must be a list of non-negative numbers"}), 400
+        multipliers[field] = values
+    
+    scenarios = data.get('scenarios', ['predicted'])
+    if not isinstance(scenarios, list):
+        return jsonify({"error": "scenarios must be a list"}), 400
+    
+    include_paths = data.get('include_paths', False)
+    if not isinstance(include_paths, bool):
+        return jsonify({"error": "include_paths must be a boolean"}), 400
+    
+    cells = len(retirement_ages) * len(scenarios) * \
+        len(multipliers['contribution_multipliers']) * len(multipliers['expense_multipliers'])
+    if cells > MAX_GRID_CELLS:
+        return jsonify({"error": f"Grid too large ({cells} cells, max {MAX_GRID_CELLS})"}), 400
+    
+    try:
+        user_data = _load_user_data(user_id, max(retirement_ages, default=65))
+        if user_data is None:
+            return jsonify({"error": "Financial snapshot not found. Please update your snapshot first."}), 404
+        
+        engine = ProjectionEngine()
+        names = [engine.resolve_scenario(s)['name'] for s in scenarios]
+        if len(set(names)) != len(names):
+            return jsonify({"error": "Scenario names must be unique"}), 400
+        
+        cache = get_result_cache()
+        key = cache.make_key('projection.grid', engine.VERSION,
+                             [user_data, retirement_ages, multipliers, scenarios, include_paths])
+        grid = cache.get_or_compute(
+            int(user_id), key,
+            lambda: engine.generate_grid(
+                user_data,
+                retirement_ages,
+                multipliers['contribution_multipliers'],
+                multipliers['expense_multipliers'],
+                scenarios,
+                include_paths
+            )
+        )
+        
+        return jsonify(grid), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Grid error: {str(e)}")
+        return jsonify({"error": "Failed to generate grid"}), 500
+
+
+@projections_bp.route("/full/stream", methods=["POST"])
+@jwt_required()
+def stream_full_projection():
+    """
+    Stream a projection as NDJSON, one year per line
+    
+    Request Body:
+    {
+        "scenario": "predicted" | "best" | "worst",
+        "retirement_age": 65 (optional)
+    }
+    
+    Streaming is annual, deterministic and row-shaped only: "mode",
+    "resolution" and ?format= other than the defaults are rejected (use /full).
+    
+    Response (application/x-ndjson):
+    {"type": "year", "scenario": "predicted", "year": 2026, "age": 30, ...}
+    ...
+    {"type": "summary", "scenario": "predicted", "summary": {...}}
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    scenario = data.get('scenario', 'predicted')
+    if scenario not in ['predicted', 'best', 'worst']:
+        return jsonify({"error": "Invalid scenario. Must be 'predicted', 'best', or 'worst'"}), 400
+    if data.get('mode', 'deterministic') != 'deterministic':
+        return jsonify({"error": "Streaming is only available in deterministic mode"}), 400
+    if data.get('resolution', 'annual') != 'annual':
+        return jsonify({"error": "Streaming is only available at annual resolution"}), 400
+    if request.args.get('format', 'rows') != 'rows':
+        return jsonify({"error": "Streaming only supports format=rows"}), 400
+    
+    try:
+        user_data = _load_user_data(user_id, data.get('retirement_age', 65))
+        if user_data is None:
+            return jsonify({"error": "Financial snapshot not found. Please update your snapshot first."}), 404
+        _check_retirement_age(user_data)
+        
+        return _ndjson_response(ProjectionEngine().iter_scenario_records(user_data, [scenario]))
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Projection stream error: {str(e)}")
+        return jsonify({"error": "Failed to generate projection"}), 500
+
+
+@projections_bp.route("/all-scenarios/stream", methods=["POST", "GET"])
+@jwt_required()
+def stream_all_scenarios():
+    """
+    Stream projections for all scenarios as NDJSON
+    
+    Request Body (optional): "retirement_age" and "custom_scenarios" as in
+    /all-scenarios; ?format= other than rows is rejected.
+    
+    Each projected year emits one line per scenario, followed by one
+    summary line per scenario once the horizon is complete.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    custom_scenarios = data.get('custom_scenarios', [])
+    if not isinstance(custom_scenarios, list):
+        return jsonify({"error": "custom_scenarios must be a list"}), 400
+    if request.args.get('format', 'rows') != 'rows':
+        return jsonify({"error": "Streaming only supports format=rows"}), 400
+    
+    try:
+        user_data = _load_user_data(user_id, data.get('retirement_age', 65))
+        if user_data is None:
+            return jsonify({"error": "Financial snapshot required"}), 404
+        _check_retirement_age(user_data)
+        
+        scenarios = ['predicted', 'best', 'worst'] + custom_scenarios
+        engine = ProjectionEngine()
+        names = [engine.resolve_scenario(s)['name'] for s in scenarios]
+        if len(set(names)) != len(names):
+            return jsonify({"error": "Scenario names must be unique"}), 400
+        
+        return _ndjson_response(engine.iter_scenario_records(user_data, scenarios))
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Projection stream error: {str(e)}")
+        return jsonify({"error": "Failed to generate projections"}), 500
+
+
+def _load_user_data(user_id, retirement_age):
+    """
+    Build the projection engine's user_data for a user (None without a snapshot)
+    
+    Raises ValueError when the snapshot has no age, which every projection
+    needs; routes report it as a 400 (before any streaming starts).
+    """
+    snapshot = FinancialSnapshot.query.filter_by(user_id=int(user_id)).first()
+    plans = FinancialPlan.query.filter_by(user_id=int(user_id)).all()
+    
+    if not snapshot:
+        return None
+    if not snapshot.age:
+        raise ValueError("Please update your age in Financial Snapshot")
+    
+    return {
+        'age': snapshot.age,
+        'monthly_income': snapshot.net_income,
+        'side_income': snapshot.side_income,
+        'monthly_expenses': snapshot.monthly_expenses,
+        'savings': snapshot.savings,
+        'investments': snapshot.investments,
+        'debt': snapshot.debt,
+        'debt_interest_rate': 0,
+        'plans': [
+            {
+                'plan_type': p.plan_type,
+                'cash_value': p.cash_value,
+                'monthly_contribution': p.monthly_contribution,
+                'years_to_contribute': p.years_to_contribute,
+                'user_current_age': p.user_current_age,
+                'income_rate': p.income_rate,
+                'income_start_age': p.income_start_age,
+                'income_end_age': p.income_end_age
+            }
+            for p in plans
+        ],
+        'retirement_age': retirement_age
+    }
+
+
+def _check_retirement_age(user_data):
+    """
+    Raise ValueError unless retirement_age is an integer age no earlier than
+    the user's (streams must fail before the first line is sent)
+    """
+    retirement_age = user_data['retirement_age']
+    if not isinstance(retirement_age, int) or isinstance(retirement_age, bool) \
+            or not user_data['age'] <= retirement_age <= 120:
+        raise ValueError(f"retirement_age must be an integer between {user_data['age']} and 120")
+
+
+def _ndjson_response(records):
+    """
+    Stream engine records as newline-delimited JSON
+    
+    Headers are already sent once streaming starts, so a failure mid-stream
+    is reported as a final {"type": "error"} line instead of a 500.
+    """
+    def generate():
+        try:
+            for record in records:
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            print(f"Projection stream error: {str(e)}")
+            yield json.dumps({"type": "error", "error": "Failed to generate projection"}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
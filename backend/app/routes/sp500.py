@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from app.config import Config
 from app.services.sp500_service import SP500Service
 import logging
 
@@ -7,8 +8,8 @@ logger = logging.getLogger(__name__)
 
 sp500_bp = Blueprint("sp500", __name__, url_prefix="/api/sp500")
 
-# Initialize service
-sp500_service = SP500Service()
+# Initialize service (requests only read the cache when something else refreshes it)
+sp500_service = SP500Service(background_refresh=Config.MARKET_REFRESH in ("thread", "sidecar"))
 
 
 @sp500_bp.route("/current", methods=["GET"])
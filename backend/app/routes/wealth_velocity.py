@@ -6,6 +6,8 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import FinancialSnapshot, FinancialPlan
 from app.services.wealth_velocity_engine import WealthVelocityEngine
+from app.services.result_cache import get_result_cache
+from app.services.snapshot_history import velocity_user_data, historical_velocity_data
 
 wealth_velocity_bp = Blueprint("wealth_velocity", __name__, url_prefix="/api/wealth-velocity")
 
@@ -32,39 +34,16 @@ def get_wealth_velocity():
         if not snapshot:
             return jsonify({"error": "Financial snapshot not found"}), 404
         
-        # Calculate VERIFIED monthly contributions (what we can prove is being saved)
-        monthly_plan_contributions = sum(plan.monthly_contribution for plan in plans)
-        
-        # Calculate total assets
-        total_assets = snapshot.savings + snapshot.investments
-        
-        # Add plan cash values to total assets
-        plan_cash_values = sum(plan.cash_value for plan in plans)
-        total_assets += plan_cash_values
-        
-        # Calculate net worth
-        net_worth = total_assets - snapshot.debt
-        
-        # Build user data
-        user_data = {
-            'monthly_income': snapshot.net_income,
-            'side_income': snapshot.side_income,
-            'monthly_expenses': snapshot.monthly_expenses,
-            'savings': snapshot.savings,
-            'investments': snapshot.investments,
-            'debt': snapshot.debt,
-            'net_worth': net_worth,
-            'monthly_plan_contributions': monthly_plan_contributions,  # VERIFIED savings
-            'savings_rate': _calculate_savings_rate(snapshot, plans)
-        }
-        
-        # TODO: Implement historical data storage
-        # For now, historical_data is None (will estimate from current data)
-        historical_data = None
+        user_data = velocity_user_data(snapshot, plans)
+        historical_data = historical_velocity_data(int(user_id))
         
         # Calculate wealth velocity
         engine = WealthVelocityEngine()
-        analysis = engine.calculate_wealth_velocity(user_data, historical_data)
+        cache = get_result_cache()
+        key = cache.make_key('wealth_velocity', engine.VERSION, [user_data, historical_data])
+        analysis = cache.get_or_compute(
+            int(user_id), key, lambda: engine.calculate_wealth_velocity(user_data, historical_data)
+        )
         
         return jsonify(analysis), 200
         
@@ -72,26 +51,3 @@ def get_wealth_velocity():
         print(f"Wealth velocity error: {str(e)}")
         return jsonify({"error": "Failed to calculate wealth velocity"}), 500
 
-
-def _calculate_savings_rate(snapshot, plans):
-    """
-    Helper to calculate ACTUAL savings rate
-    
-    Savings rate = (verified contributions) / (total income)
-    
-    NOT the same as "cash flow surplus" because:
-    - Cash flow surplus might go to discretionary spending
-    - We only count what we KNOW is being saved
-    """
-    total_income = snapshot.net_income + snapshot.side_income
-    
-    if total_income == 0:
-        return 0
-    
-    # VERIFIED savings = plan contributions only
-    plan_contributions = sum(plan.monthly_contribution for plan in plans)
-    
-    # Savings rate = what percentage of income is being invested
-    savings_rate = (plan_contributions / total_income) if total_income > 0 else 0
-    
-    return max(0, min(savings_rate, 1.0))  # Cap between 0-100%
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Cohort Insights
+Batch health scores for every user, materialized into the user_insights table
+
+Snapshots are streamed from the database in chunks (yield_per) as plain
+column tuples, plans for each chunk are aggregated with NumPy, and the
+whole chunk is scored in one InsightEngine.analyze_batch call before
+being upserted. Memory stays bounded by the chunk size regardless of how
+many users there are, and the refresh commits once at the end so readers
+never see a half-updated table.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Any
+
+import numpy as np
+from sqlalchemy import select, delete, insert
+
+from app.extensions import db
+from app.models import FinancialSnapshot, FinancialPlan, UserInsight
+from app.services.insight_engine import InsightEngine
+from app.services.percentiles import get_percentile_table
+
+
+class CohortInsightJob:
+    """Scores the whole user base chunk by chunk"""
+
+    DEFAULT_CHUNK_SIZE = 1000
+
+    # Same default as InsightEngine when a snapshot has no age
+    DEFAULT_AGE = 30
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = chunk_size
+        self.engine = InsightEngine()
+        self.table = get_percentile_table()
+
+    # ================= PUBLIC API ================= #
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Score every user with a snapshot and upsert their user_insights row
+
+        Returns the number of users scored, chunks written, elapsed seconds
+        and throughput in users per second.
+        """
+        start = time.perf_counter()
+        users = chunks = 0
+        last_user_id = None
+
+        snapshots = db.session.execute(
+            select(
+                FinancialSnapshot.user_id,
+                FinancialSnapshot.age,
+                FinancialSnapshot.net_income,
+                FinancialSnapshot.side_income,
+                FinancialSnapshot.monthly_expenses,
+                FinancialSnapshot.savings,
+                FinancialSnapshot.investments,
+                FinancialSnapshot.debt,
+            )
+            .order_by(FinancialSnapshot.user_id, FinancialSnapshot.id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        for partition in snapshots.partitions():
+            # The routes read a user's first snapshot; later duplicates are skipped,
+            # including one that starts the next partition
+            rows = []
+            for row in partition:
+                if row[0] != last_user_id:
+                    rows.append(row)
+                    last_user_id = row[0]
+            if not rows:
+                continue
+
+            self._upsert(self.score_chunk(rows))
+            users += len(rows)
+            chunks += 1
+
+        # After the stream is exhausted: committing closes its server-side cursor
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+        return {
+            "users": users,
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "users_per_sec": round(users / elapsed, 1) if elapsed > 0 else 0
+        }
+
+    def score_chunk(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """user_insights rows for snapshot tuples (user_id, age, income, side income, expenses, savings, investments, debt)"""
+        user_ids = np.array([row[0] for row in rows])
+        ages = np.array([row[1] if row[1] is not None else self.DEFAULT_AGE for row in rows], dtype=float)
+        snapshot = np.array([row[2:] for row in rows], dtype=float).reshape(len(rows), 6)
+
+        columns = {
+            "age": ages,
+            "monthly_income": snapshot[:, 0],
+            "side_income": snapshot[:, 1],
+            "monthly_expenses": snapshot[:, 2],
+            "savings": snapshot[:, 3],
+            "investments": snapshot[:, 4],
+            "debt": snapshot[:, 5],
+            **self._plan_columns(user_ids),
+        }
+        result = self.engine.analyze_batch(columns)
+        metrics = result["metrics"]
+        health = result["health_score"]
+
+        computed_at = datetime.now(timezone.utc)
+        return [
+            {
+                "user_id": user_id,
+                "health_score": score,
+                "rating": rating,
+                "net_worth": net_worth,
+                "savings_rate": savings_rate,
+                "months_covered": months_covered,
+                "debt_to_income": debt_to_income,
+                "age_group": self.table.band(age),
+                "net_worth_percentile": net_worth_percentile,
+                "savings_rate_percentile": savings_rate_percentile,
+                "engine_version": self.engine.VERSION,
+                "computed_at": computed_at,
+            }
+            for (user_id, score, rating, net_worth, savings_rate, months_covered, debt_to_income,
+                 age, net_worth_percentile, savings_rate_percentile) in zip(
+                user_ids.tolist(),
+                health["score"].tolist(),
+                health["rating"].tolist(),
+                metrics["net_worth"].tolist(),
+                metrics["savings_rate"].tolist(),
+                metrics["months_covered"].tolist(),
+                metrics["debt_to_income"].tolist(),
+                ages.tolist(),
+                self.table.percentiles("net_worth", ages, metrics["net_worth"]).tolist(),
+                self.table.percentiles("savings_rate", ages, metrics["savings_rate"]).tolist(),
+            )
+        ]
+
+    # ================= INTERNALS ================= #
+
+    def _plan_columns(self, user_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-user plan aggregates for a sorted chunk of user ids, in analyze_batch column form"""
+        size = len(user_ids)
+        plans = db.session.execute(
+            select(FinancialPlan.user_id, FinancialPlan.plan_type, FinancialPlan.monthly_contribution)
+            .where(FinancialPlan.user_id.in_(user_ids.tolist()))
+            .order_by(FinancialPlan.id)
+        ).all()
+        if not plans:
+            zeros = np.zeros(size)
+            return {"plan_contributions": zeros, "has_retirement_plan": zeros, "plan_type_count": zeros}
+
+        owner = np.searchsorted(user_ids, [plan[0] for plan in plans])
+        plan_types, type_codes = np.unique([plan[1] for plan in plans], return_inverse=True)
+        retirement = np.isin(plan_types, list(InsightEngine.RETIREMENT_PLAN_TYPES))[type_codes]
+        # Distinct (user, plan type) pairs, counted per user
+        distinct_pairs = np.unique(owner * len(plan_types) + type_codes)
+
+        return {
+            # bincount adds each user's plans in id order, like sum() over the route's plan list
+            "plan_contributions": np.bincount(owner, weights=[plan[2] for plan in plans], minlength=size),
+            "has_retirement_plan": np.bincount(owner, weights=retirement, minlength=size) > 0,
+            "plan_type_count": np.bincount(distinct_pairs // len(plan_types), minlength=size),
+        }
+
+    def _upsert(self, rows: List[Dict[str, Any]]):
+        """Insert or replace user_insights rows, natively on SQLite / PostgreSQL"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(UserInsight)
+            statement = statement.on_conflict_do_update(
+                index_elements=[UserInsight.user_id],
+                set_={name: statement.excluded[name] for name in rows[0] if name != "user_id"}
+            )
+            db.session.execute(statement, rows)
+        else:
+            db.session.execute(delete(UserInsight).where(UserInsight.user_id.in_([row["user_id"] for row in rows])))
+            db.session.execute(insert(UserInsight), rows)
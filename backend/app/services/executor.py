@@ -0,0 +1,146 @@
+"""
+Compute Executor
+Runs heavy service jobs (large Monte Carlo runs, cohort recomputations)
+on a process pool so they do not starve the web worker's request threads
+Small jobs stay in-process where pool overhead would dominate
+"""
+
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ComputeExecutor:
+    """
+    Pluggable execution backend for app/services
+
+    Two job shapes are supported:
+    - map(): shard a list of items (e.g. users) into chunks and
+      concatenate the per-chunk results
+    - run_shared(): workers write row blocks of one large float array
+      into shared memory, which is reduced in the parent without pickling
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, inprocess_threshold: int = 20000):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.inprocess_threshold = inprocess_threshold
+        self._pool = None
+        self._lock = threading.Lock()
+
+    # ================= PUBLIC API ================= #
+
+    def should_offload(self, size: int) -> bool:
+        """Whether a job of this size is worth sending to the process pool"""
+        return self.max_workers > 1 and size >= self.inprocess_threshold
+
+    def map(self, fn: Callable[[List[Any]], List[Any]], items: Sequence[Any], chunk_size: Optional[int] = None) -> List[Any]:
+        """
+        Apply fn to chunks of items and concatenate the results in order
+
+        fn must be a module-level function taking a list and returning a
+        list of the same length (so it can be pickled to worker processes).
+        """
+        items = list(items)
+        if not items:
+            return []
+        if not self.should_offload(len(items)):
+            return fn(items)
+
+        chunk_size = chunk_size or math.ceil(len(items) / self.max_workers)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        results = []
+        for chunk_result in self._get_pool().map(fn, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def run_shared(
+        self,
+        fn: Callable[..., None],
+        shape: Tuple[int, ...],
+        tasks: Iterable[Tuple],
+        reduce: Callable[[np.ndarray], Any],
+        offload: bool = True
+    ) -> Any:
+        """
+        Fill a shared float64 array of the given shape and reduce it
+
+        Each task is an argument tuple; fn is called as
+        fn(shm_name, shape, *task) and writes its rows through
+        attach_shared_array(). reduce receives the filled array and its
+        return value (which must not be a view of it) is returned once
+        the shared block is released.
+        """
+        tasks = list(tasks)
+        nbytes = max(int(np.prod(shape)) * np.dtype(float).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            array = np.ndarray(shape, dtype=float, buffer=shm.buf)
+            if offload and self.max_workers > 1 and len(tasks) > 1:
+                pool = self._get_pool()
+                futures = [pool.submit(fn, shm.name, shape, *task) for task in tasks]
+                for future in futures:
+                    future.result()
+            else:
+                for task in tasks:
+                    fn(shm.name, shape, *task)
+            return reduce(array)
+        finally:
+            # Drop our view first: close() refuses while the buffer is exported
+            array = None
+            try:
+                shm.close()
+            except BufferError:
+                # A view outlived us (e.g. held by a failing reduce's traceback);
+                # the mapping goes with it, and the name is still unlinked below
+                pass
+            shm.unlink()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (it is recreated on next use)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    # ================= INTERNALS ================= #
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Spawned workers never inherit locks held by the web server's threads
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+            return self._pool
+
+
+def attach_shared_array(name: str, shape: Tuple[int, ...]) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """
+    Open a shared array created by ComputeExecutor.run_shared from a worker
+
+    The parent owns the block's lifetime (it unlinks it after reducing).
+    Close the returned handle once the array view is no longer used.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=float, buffer=shm.buf)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ComputeExecutor:
+    """Process-wide executor configured from Config (COMPUTE_WORKERS, COMPUTE_INPROCESS_THRESHOLD)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from app.config import Config
+            _executor = ComputeExecutor(
+                max_workers=Config.COMPUTE_WORKERS,
+                inprocess_threshold=Config.COMPUTE_INPROCESS_THRESHOLD
+            )
+        return _executor
@@ -3,6 +3,13 @@ Financial Calculator Service
 Calculates projections for different financial vehicles
 """
 
+from typing import Dict, List, Any
+
+import numpy as np
+
+from app.services import finmath
+
+
 class FinancialCalculator:
     
     # Average assumptions for each vehicle type
@@ -81,6 +88,15 @@ class FinancialCalculator:
         },
     }
     
+    # Order of the case axis in batched calculations
+    CASES = ["best_case", "average_case", "worst_case"]
+    
+    # Output version, part of memo keys (bump when outputs change)
+    VERSION = "1"
+    
+    # Percentiles reported by stochastic mode
+    PERCENTILES = [5, 25, 50, 75, 95]
+    
     def __init__(self, tax_rate=0.25, inflation_rate=0.03):
         self.tax_rate = tax_rate
         self.inflation_rate = inflation_rate
@@ -149,6 +165,254 @@ class FinancialCalculator:
             "worst_case": worst_case
         }
     
+    def calculate_projections_batch(
+        self,
+        plan_types: List[str],
+        current_age: int,
+        monthly_contribution: float,
+        years_to_contribute: int,
+        income_start_age: int,
+        income_end_age: int,
+        current_value: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """calculate_projection for several vehicles at once (see calculate_projection_sets)"""
+        return self.calculate_projection_sets(plan_types, [{
+            'current_age': current_age,
+            'monthly_contribution': monthly_contribution,
+            'years_to_contribute': years_to_contribute,
+            'income_start_age': income_start_age,
+            'income_end_age': income_end_age,
+            'current_value': current_value
+        }])[0]
+    
+    def calculate_projection_sets(
+        self,
+        plan_types: List[str],
+        param_sets: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        calculate_projection for every vehicle under every parameter set
+        
+        Each param set holds calculate_projection's inputs (current_value
+        optional). Every (set, vehicle, case) triple is one element of a
+        (sets, vehicles, cases) array, so each projection year is a single
+        broadcast NumPy step instead of one Python loop per combination.
+        Steps apply the same float operations in the same order as
+        _calculate_scenario, so output is identical to calling
+        calculate_projection per set and vehicle.
+        
+        Returns one list of per-vehicle results per param set.
+        """
+        assumptions = self._vehicle_arrays(plan_types)
+        avg_return = assumptions['avg_return'][:, None]
+        volatility = assumptions['volatility'][:, None]
+        
+        # (vehicles, cases) rates in CASES order
+        rates = np.hstack([
+            avg_return + volatility,
+            avg_return,
+            np.maximum(avg_return - volatility, 0.01)
+        ])
+        growth = 1 + (rates - assumptions['policy_cost'][:, None] - self.inflation_rate)
+        
+        # Per-set inputs are shaped (sets, 1, 1) to broadcast over vehicles and cases
+        def per_set(values, dtype=float):
+            return np.array(values, dtype=dtype).reshape(-1, 1, 1)
+        
+        annual_contributions = [params['monthly_contribution'] * 12 for params in param_sets]
+        contributing_years = [max(params['years_to_contribute'], 0) for params in param_sets]
+        growth_years = [
+            max(0, (params['income_start_age'] - params['current_age']) - params['years_to_contribute'])
+            for params in param_sets
+        ]
+        
+        # Phase 1 (contributing), then Phase 2 (growth before income)
+        balance = finmath.compound(
+            per_set([params.get('current_value', 0.0) for params in param_sets]),
+            growth,
+            per_set(annual_contributions),
+            per_set(contributing_years, dtype=int),
+            per_set(growth_years, dtype=int)
+        )
+        balance = balance.tolist()
+        
+        tax_advantage = assumptions['tax_advantage'].tolist()
+        
+        results = []
+        for s, params in enumerate(param_sets):
+            # Running total as in the loop, so int inputs stay ints
+            total_contributed = 0
+            for year in range(params['years_to_contribute']):
+                total_contributed += annual_contributions[s]
+            years_compounded = contributing_years[s] + growth_years[s]
+            years_of_income = params['income_end_age'] - params['income_start_age']
+            
+            set_results = []
+            for v, plan_type in enumerate(plan_types):
+                result = {"plan_type": plan_type}
+                for c, case in enumerate(self.CASES):
+                    # Phase 3: Income distribution
+                    cash_value_at_income = balance[s][v][c] if years_compounded else params.get('current_value', 0.0)
+                    annual_income_before_tax = cash_value_at_income / years_of_income if years_of_income > 0 else 0
+                    if tax_advantage[v]:
+                        annual_income_after_tax = annual_income_before_tax
+                    else:
+                        annual_income_after_tax = annual_income_before_tax * (1 - self.tax_rate)
+                    
+                    result[case] = {
+                        "total_contributed": round(total_contributed, 2),
+                        "cash_value": round(cash_value_at_income, 2),
+                        "annual_income_before_tax": round(annual_income_before_tax, 2),
+                        "annual_income_after_tax": round(annual_income_after_tax, 2)
+                    }
+                set_results.append(result)
+            results.append(set_results)
+        return results
+    
+    def simulate_projections(
+        self,
+        plan_types: List[str],
+        current_age: int,
+        monthly_contribution: float,
+        years_to_contribute: int,
+        income_start_age: int,
+        income_end_age: int,
+        current_value: float = 0.0,
+        paths: int = 5000,
+        seed: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Stochastic mode: distribution of outcomes per vehicle
+        
+        Each year's return is drawn as avg_return + volatility x N(0, 1)
+        (net growth floored at a total loss) independently for every path.
+        Each vehicle draws from its own stream seeded by (seed, vehicle),
+        so a vehicle's result does not depend on which others are compared.
+        All vehicles and paths advance together as one (vehicles, paths)
+        array through the accumulation, growth and income phases.
+        Returns cash value and after-tax income percentiles per vehicle.
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+        
+        assumptions = self._vehicle_arrays(plan_types)
+        avg_return = assumptions['avg_return'][:, None]
+        volatility = assumptions['volatility'][:, None]
+        policy_cost = assumptions['policy_cost'][:, None]
+        vehicle_index = list(self.VEHICLE_ASSUMPTIONS)
+        generators = [np.random.default_rng([seed, vehicle_index.index(plan_type)]) for plan_type in plan_types]
+        shocks = np.empty((len(plan_types), paths))
+        
+        def year_growth():
+            for v, generator in enumerate(generators):
+                generator.standard_normal(out=shocks[v])
+            return np.maximum(1 + (avg_return + volatility * shocks - policy_cost - self.inflation_rate), 0)
+        
+        # Phase 1: Accumulation (contributing)
+        annual_contribution = monthly_contribution * 12
+        balance = np.full((len(plan_types), paths), float(current_value))
+        total_contributed = 0
+        for year in range(years_to_contribute):
+            total_contributed += annual_contribution
+            balance = (balance + annual_contribution) * year_growth()
+        
+        # Phase 2: Growth (not contributing, before income)
+        for year in range(max(0, (income_start_age - current_age) - years_to_contribute)):
+            balance = balance * year_growth()
+        
+        # Phase 3: Income distribution
+        years_of_income = income_end_age - income_start_age
+        income_before_tax = balance / years_of_income if years_of_income > 0 else np.zeros_like(balance)
+        income_after_tax = np.where(
+            assumptions['tax_advantage'][:, None],
+            income_before_tax,
+            income_before_tax * (1 - self.tax_rate)
+        )
+        
+        cash_value_bands = np.percentile(balance, self.PERCENTILES, axis=1)
+        income_bands = np.percentile(income_after_tax, self.PERCENTILES, axis=1)
+        
+        results = []
+        for v, plan_type in enumerate(plan_types):
+            results.append({
+                "plan_type": plan_type,
+                "mode": "stochastic",
+                "paths": paths,
+                "seed": seed,
+                "total_contributed": round(total_contributed, 2),
+                "cash_value": self._percentile_summary(cash_value_bands[:, v], balance[v]),
+                "annual_income_after_tax": self._percentile_summary(income_bands[:, v], income_after_tax[v])
+            })
+        return results
+    
+    def _percentile_summary(self, bands: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+        """Rounded p5..p95 and mean of one vehicle's simulated values"""
+        summary = {f"p{p}": round(band, 2) for p, band in zip(self.PERCENTILES, bands.tolist())}
+        summary["mean"] = round(float(values.mean()), 2)
+        return summary
+    
+    def calculate_projections_memoized(
+        self,
+        cache: Any,
+        plan_types: List[str],
+        current_age: int,
+        monthly_contribution: float,
+        years_to_contribute: int,
+        income_start_age: int,
+        income_end_age: int,
+        current_value: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        calculate_projections_batch through a ResultCache
+        
+        Projections are pure, so each vehicle is memoized on its normalized
+        inputs (amounts rounded to cents) and only missing vehicles are
+        computed, in one batch.
+        """
+        inputs = {
+            'current_age': current_age,
+            'monthly_contribution': round(monthly_contribution, 2),
+            'years_to_contribute': years_to_contribute,
+            'income_start_age': income_start_age,
+            'income_end_age': income_end_age,
+            'current_value': round(current_value, 2)
+        }
+        keys = [
+            cache.make_key('calculator.projection', self.VERSION,
+                           [plan_type, inputs, self.tax_rate, self.inflation_rate])
+            for plan_type in plan_types
+        ]
+        results = [cache.get(key) for key in keys]
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            computed = self.calculate_projections_batch([plan_types[i] for i in missing], **inputs)
+            for i, result in zip(missing, computed):
+                cache.put(None, keys[i], result)
+                results[i] = result
+        return results
+    
+    @classmethod
+    def _vehicle_arrays(cls, plan_types: List[str]) -> Dict[str, np.ndarray]:
+        """VEHICLE_ASSUMPTIONS compiled into per-field arrays, gathered for plan_types"""
+        compiled = cls.__dict__.get('_compiled_assumptions')
+        if compiled is None:
+            vehicles = list(cls.VEHICLE_ASSUMPTIONS)
+            compiled = {
+                'index': {vehicle: i for i, vehicle in enumerate(vehicles)},
+                'avg_return': np.array([cls.VEHICLE_ASSUMPTIONS[v]['avg_return'] for v in vehicles], dtype=float),
+                'policy_cost': np.array([cls.VEHICLE_ASSUMPTIONS[v]['policy_cost'] for v in vehicles], dtype=float),
+                'volatility': np.array([cls.VEHICLE_ASSUMPTIONS[v]['volatility'] for v in vehicles], dtype=float),
+                'tax_advantage': np.array([cls.VEHICLE_ASSUMPTIONS[v]['tax_advantage'] for v in vehicles], dtype=bool),
+            }
+            cls._compiled_assumptions = compiled
+        
+        for plan_type in plan_types:
+            if plan_type not in compiled['index']:
+                raise ValueError(f"Unknown plan type: {plan_type}")
+        rows = [compiled['index'][plan_type] for plan_type in plan_types]
+        return {field: values[rows] for field, values in compiled.items() if field != 'index'}
+    
     def _calculate_scenario(
         self,
         current_value: float,
@@ -162,24 +426,20 @@ class FinancialCalculator:
     ):
         """Calculate single scenario"""
         
-        # Phase 1: Accumulation (contributing)
-        balance = current_value
         total_contributed = 0
-        
         for year in range(years_to_contribute):
-            annual_contribution = monthly_contribution * 12
-            total_contributed += annual_contribution
-            balance += annual_contribution
-            
-            # Apply returns and costs
-            net_return = rate_of_return - policy_cost - self.inflation_rate
-            balance *= (1 + net_return)
+            total_contributed += monthly_contribution * 12
         
-        # Phase 2: Growth (not contributing, before income)
-        years_growth = years_until_income - years_to_contribute
-        for year in range(max(0, years_growth)):
-            net_return = rate_of_return - policy_cost - self.inflation_rate
-            balance *= (1 + net_return)
+        # Phase 1: Accumulation (contributing), then
+        # Phase 2: Growth (not contributing, before income), net of returns and costs
+        net_return = rate_of_return - policy_cost - self.inflation_rate
+        balance = finmath.compound(
+            current_value,
+            1 + net_return,
+            monthly_contribution * 12,
+            years_to_contribute,
+            max(0, years_until_income - years_to_contribute)
+        )
         
         cash_value_at_income = balance
         
@@ -0,0 +1,186 @@
+"""
+Financial Math Kernel
+Future value, present value, payment, NPER, amortization and compounding
+shared by the projection, calculator and wealth velocity engines
+
+Every function accepts scalars or NumPy arrays (broadcast together) and
+mirrors the scalar formula it replaces operation for operation, so porting
+an engine to the kernel does not move its outputs by a single bit.
+"""
+
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+
+# ================= POWER TABLES ================= #
+
+@lru_cache(maxsize=256)
+def _power_table(rate: float, periods: int) -> np.ndarray:
+    # Python pow, not np.power: the two differ in the last bit for some
+    # inputs and the engines' scalar formulas use **
+    table = np.array([(1 + rate) ** n for n in range(periods + 1)], dtype=float)
+    table.flags.writeable = False
+    return table
+
+
+def power_table(rate: float, periods: int) -> np.ndarray:
+    """(1 + rate) ** n for n = 0..periods (cached per rate, read-only)"""
+    return _power_table(float(rate), int(periods))
+
+
+def growth_power(rate: Any, nper: Any) -> Any:
+    """(1 + rate) ** nper, read from the power table when rate is a scalar and nper whole"""
+    nper_array = np.asarray(nper)
+    if np.ndim(rate) == 0 and nper_array.dtype.kind in 'iu' and (nper_array >= 0).all():
+        powers = power_table(rate, int(nper_array.max(initial=0)))[nper_array]
+        return float(powers) if np.ndim(nper) == 0 else powers
+    return (1 + np.asarray(rate, dtype=float)) ** nper_array
+
+
+# ================= TIME VALUE ================= #
+
+def fv(rate: Any, nper: Any, pmt: Any = 0.0, pv: Any = 0.0) -> Any:
+    """
+    Future value of pv plus an ordinary annuity of pmt per period
+
+    FV = PV(1+r)^n + PMT * [((1+r)^n - 1) / r]   (PMT * n when r == 0)
+    Growth-positive sign convention: deposits and balances are positive.
+    """
+    power = growth_power(rate, nper)
+    nonzero = np.asarray(rate) != 0
+    annuity = np.where(
+        nonzero,
+        pmt * ((power - 1) / np.where(nonzero, rate, 1)),
+        pmt * np.asarray(nper)
+    )
+    result = pv * power + annuity
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def pv(rate: Any, nper: Any, pmt: Any = 0.0, fv: Any = 0.0) -> Any:
+    """
+    Present value of a lump sum fv after nper periods plus an ordinary annuity of pmt per period
+
+    PV = FV / (1+r)^n + PMT * [(1 - (1+r)^-n) / r]   (PMT * n when r == 0)
+    """
+    power = growth_power(rate, nper)
+    nonzero = np.asarray(rate) != 0
+    annuity = np.where(
+        nonzero,
+        pmt * ((1 - 1 / power) / np.where(nonzero, rate, 1)),
+        pmt * np.asarray(nper)
+    )
+    result = fv / power + annuity
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def pmt(rate: Any, nper: Any, pv: Any, fv: Any = 0.0) -> Any:
+    """
+    Level payment per period that pays pv down to fv over nper periods
+
+    PMT = (PV(1+r)^n - FV) * r / ((1+r)^n - 1)   ((PV - FV) / n when r == 0)
+    """
+    power = growth_power(rate, nper)
+    nonzero = np.asarray(rate) != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(
+            nonzero,
+            (pv * power - fv) * rate / np.where(nonzero, power - 1, 1),
+            (pv - fv) / np.asarray(nper, dtype=float)
+        )
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def nper(rate: Any, pmt: Any, pv: Any) -> Any:
+    """
+    Periods for a payment of pmt to retire a balance of pv
+
+    n = -log(1 - r*PV/PMT) / log(1+r)   (PV / PMT when r == 0)
+    inf when the payment does not cover the interest.
+    """
+    rate = np.asarray(rate, dtype=float)
+    pmt = np.asarray(pmt, dtype=float)
+    pv = np.asarray(pv, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covered = pmt > rate * pv
+        ratio = np.where(covered, 1 - rate * pv / np.where(pmt != 0, pmt, 1), 1)
+        result = np.where(
+            rate != 0,
+            -np.log(ratio) / np.log1p(np.where(rate != 0, rate, 1)),
+            pv / np.where(pmt != 0, pmt, np.nan)
+        )
+        result = np.where(covered & (pmt > 0), result, np.inf)
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def amortization_schedule(rate: Any, pmt: Any, pv: Any, periods: int) -> np.ndarray:
+    """
+    Remaining balance after each of periods payments, shaped (..., periods + 1)
+
+    Interest accrues before each payment and balances stop at zero.
+    """
+    balance = np.asarray(pv, dtype=float)
+    growth = 1 + np.asarray(rate, dtype=float)
+    pmt = np.asarray(pmt, dtype=float)
+    shape = np.broadcast(balance, growth, pmt).shape
+    schedule = np.empty(shape + (periods + 1,))
+    balance = np.broadcast_to(balance, shape)
+    schedule[..., 0] = balance
+    for period in range(1, periods + 1):
+        balance = np.maximum(balance * growth - pmt, 0)
+        schedule[..., period] = balance
+    return schedule
+
+
+# ================= STEPPED COMPOUNDING ================= #
+
+def compound(balance: Any, growth: Any, contribution: Any, contributing_periods: Any, growth_periods: Any = 0) -> Any:
+    """
+    Balance after contributing_periods of (balance + contribution) * growth
+    followed by growth_periods of balance * growth
+
+    This is the year loop shared by the calculator and plan valuation, done
+    step by step (not in closed form) so results match the loops exactly.
+    All-scalar calls run as a plain Python loop; array calls broadcast and
+    handle elements in different phases with masked steps.
+    """
+    if all(np.ndim(value) == 0 for value in (balance, growth, contribution, contributing_periods, growth_periods)):
+        for _ in range(contributing_periods):
+            balance = (balance + contribution) * growth
+        for _ in range(growth_periods):
+            balance = balance * growth
+        return balance
+
+    contributing_periods = np.asarray(contributing_periods)
+    phase_end = contributing_periods + np.asarray(growth_periods)
+    balance = np.broadcast_to(np.asarray(balance, dtype=float),
+                              np.broadcast(balance, growth, contribution, phase_end).shape)
+
+    # Periods where every element is in the same phase skip the masked update
+    all_contributing = int(contributing_periods.min(initial=0))
+    all_growing = (int(contributing_periods.max(initial=0)), int(phase_end.min(initial=0)))
+    for period in range(int(phase_end.max(initial=0))):
+        if period < all_contributing:
+            balance = (balance + contribution) * growth
+        elif all_growing[0] <= period < all_growing[1]:
+            balance = balance * growth
+        else:
+            balance = np.where(
+                period < contributing_periods,
+                (balance + contribution) * growth,
+                np.where(period < phase_end, balance * growth, balance)
+            )
+    return balance
+
+
+def compound_series(start: np.ndarray, growth: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Values of start compounded by (1 + growth) for periods 0..periods, shaped (cases, periods + 1)
+    multiply.accumulate runs strictly left to right, matching repeated *= in the scalar engines
+    """
+    factors = np.empty((len(start), periods + 1))
+    factors[:, 0] = start
+    factors[:, 1:] = (1 + growth)[:, None]
+    return np.multiply.accumulate(factors, axis=1)
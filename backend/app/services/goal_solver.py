@@ -0,0 +1,220 @@
+"""
+Goal-Seek Solver
+Answers "what would it take" questions on top of the projection engine:
+the monthly contribution, expense cut or return needed to reach a target
+net worth by a given age, or the earliest age the target is reached
+"""
+
+import math
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from app.services.projection_engine import ProjectionEngine
+from app.services.projection_kernel import run_projection_kernel
+
+
+class GoalSolver:
+    """
+    Bracketed root-finder over the vectorized projection kernel
+
+    Each iteration evaluates a batch of candidates along the kernel's case
+    axis in one pass and narrows the bracket to the first candidate that
+    reaches the goal (k-section search, assuming net worth rises with the
+    unknown). Evaluations are memoized per solve, so bracket endpoints and
+    repeated candidates are never re-run.
+    """
+
+    # Solvable unknowns
+    UNKNOWNS = ['monthly_contribution', 'retirement_age', 'expense_cut', 'return']
+
+    # Stop once the bracket is this narrow
+    TOLERANCES = {
+        'monthly_contribution': 1.0,  # $1 / month
+        'expense_cut': 1.0,           # $1 / month
+        'return': 0.0001              # 0.01% annual return
+    }
+
+    CANDIDATES_PER_ITERATION = 16
+    MAX_ITERATIONS = 20
+    MAX_AGE = 100
+
+    def __init__(self, engine: Optional[ProjectionEngine] = None):
+        self.engine = engine or ProjectionEngine()
+
+    # ================= PUBLIC API ================= #
+
+    def solve(
+        self,
+        user_data: Dict[str, Any],
+        unknown: str,
+        target_net_worth: float,
+        target_age: Optional[int] = None,
+        scenario: Any = "predicted",
+        bounds: Optional[List[float]] = None,
+        plan_type: str = "Roth IRA"
+    ) -> Dict[str, Any]:
+        """
+        Solve for the smallest value of unknown that reaches target_net_worth
+
+        - monthly_contribution: new monthly contribution to a plan_type plan
+          from now until target_age
+        - expense_cut: reduction in monthly expenses
+        - return: annual return earned by investments and every plan
+        - retirement_age: earliest age net worth reaches the target
+          (target_age is not used)
+        """
+        if unknown not in self.UNKNOWNS:
+            raise ValueError(f"Invalid unknown. Must be one of: {', '.join(self.UNKNOWNS)}")
+
+        params = self.engine.resolve_scenario(scenario)
+
+        if unknown == 'monthly_contribution' and plan_type not in params['plan_returns']:
+            raise ValueError(f"Invalid plan_type. Must be one of: {', '.join(params['plan_returns'])}")
+
+        if unknown == 'retirement_age':
+            return self._solve_retirement_age(user_data, params, target_net_worth)
+
+        if target_age is None or target_age <= user_data['age']:
+            raise ValueError("target_age must be greater than the current age")
+
+        lower, upper = bounds if bounds is not None else self._default_bounds(user_data, unknown)
+        if lower >= upper:
+            raise ValueError("bounds must be [lower, upper] with lower < upper")
+
+        years = target_age - user_data['age']
+        evaluations = {}
+
+        def evaluate(values: List[float]) -> None:
+            pending = [value for value in values if value not in evaluations]
+            if pending:
+                inputs = self._build_inputs(user_data, params, unknown, pending, years, plan_type)
+                net_worth = run_projection_kernel(inputs, years, fields=('net_worth',))['net_worth'][:, -1]
+                evaluations.update(zip(pending, net_worth.tolist()))
+
+        evaluate([lower, upper])
+        result = {
+            'unknown': unknown,
+            'scenario': params['name'],
+            'target_net_worth': target_net_worth,
+            'target_age': target_age,
+            'bounds': [lower, upper]
+        }
+
+        if evaluations[lower] >= target_net_worth:
+            return {**result, 'solved': True, 'value': self._round(unknown, lower),
+                    'projected_net_worth': round(evaluations[lower], 2), 'iterations': 0,
+                    'evaluations': len(evaluations)}
+        if evaluations[upper] < target_net_worth:
+            return {**result, 'solved': False, 'value': None,
+                    'projected_net_worth': round(evaluations[upper], 2), 'iterations': 0,
+                    'evaluations': len(evaluations),
+                    'message': 'Target not reachable within bounds'}
+
+        # Invariant: lower misses the target, upper reaches it
+        iterations = 0
+        while upper - lower > self.TOLERANCES[unknown] and iterations < self.MAX_ITERATIONS:
+            candidates = np.linspace(lower, upper, self.CANDIDATES_PER_ITERATION + 2)[1:-1].tolist()
+            evaluate(candidates)
+            iterations += 1
+            for candidate in candidates:
+                if evaluations[candidate] >= target_net_worth:
+                    upper = candidate
+                    break
+                lower = candidate
+
+        return {**result, 'solved': True, 'value': self._round(unknown, upper),
+                'projected_net_worth': round(evaluations[upper], 2), 'iterations': iterations,
+                'evaluations': len(evaluations)}
+
+    # ================= INTERNALS ================= #
+
+    def _solve_retirement_age(
+        self,
+        user_data: Dict[str, Any],
+        params: Dict[str, Any],
+        target_net_worth: float
+    ) -> Dict[str, Any]:
+        """
+        Earliest age net worth reaches the target
+
+        Retirement age only ends the projection horizon, so a single run
+        to MAX_AGE gives net worth at every candidate age.
+        """
+        years = self.MAX_AGE - user_data['age']
+        inputs = self.engine._build_kernel_inputs(user_data, [params])
+        net_worth = run_projection_kernel(inputs, years, fields=('net_worth',))['net_worth'][0]
+
+        result = {
+            'unknown': 'retirement_age',
+            'scenario': params['name'],
+            'target_net_worth': target_net_worth,
+            'bounds': [user_data['age'], self.MAX_AGE],
+            'iterations': 1,
+            'evaluations': 1
+        }
+        reached = np.flatnonzero(net_worth >= target_net_worth)
+        if not len(reached):
+            return {**result, 'solved': False, 'value': None,
+                    'projected_net_worth': round(float(net_worth[-1]), 2) if len(net_worth) else None,
+                    'message': f'Target not reached by age {self.MAX_AGE}'}
+        return {**result, 'solved': True, 'value': user_data['age'] + int(reached[0]),
+                'projected_net_worth': round(float(net_worth[reached[0]]), 2)}
+
+    def _default_bounds(self, user_data: Dict[str, Any], unknown: str) -> List[float]:
+        """Search range when the caller gives none"""
+        if unknown == 'monthly_contribution':
+            return [0.0, float(user_data['monthly_income'] + user_data.get('side_income', 0))]
+        if unknown == 'expense_cut':
+            return [0.0, float(user_data['monthly_expenses'])]
+        return [0.0, 0.20]
+
+    def _build_inputs(
+        self,
+        user_data: Dict[str, Any],
+        params: Dict[str, Any],
+        unknown: str,
+        values: List[float],
+        years: int,
+        plan_type: str
+    ) -> Dict[str, Any]:
+        """Kernel inputs with one case per candidate value of the unknown"""
+        values = np.array(values, dtype=float)
+
+        if unknown == 'monthly_contribution':
+            new_plan = {
+                'plan_type': plan_type,
+                'cash_value': 0,
+                'monthly_contribution': 0,
+                'years_to_contribute': years,
+                'user_current_age': user_data['age']
+            }
+            user_data = {**user_data, 'plans': user_data.get('plans', []) + [new_plan]}
+
+        inputs = self.engine._build_kernel_inputs(user_data, [params] * len(values))
+
+        if unknown == 'monthly_contribution':
+            contributions = np.array(inputs['plan_annual_contribution'])
+            matches = np.array(inputs['plan_employer_match'])
+            contributions[:, -1] = values * 12
+            matches[:, -1] = [
+                self.engine._calculate_employer_match(new_plan, annual) for annual in (values * 12).tolist()
+            ]
+            inputs['plan_annual_contribution'] = contributions
+            inputs['plan_employer_match'] = matches
+        elif unknown == 'expense_cut':
+            inputs['annual_expenses'] = (user_data['monthly_expenses'] - values) * 12
+        elif unknown == 'return':
+            plans = user_data.get('plans', [])
+            inputs['investment_return'] = values
+            inputs['plan_growth_factor'] = np.array([
+                [self.engine._plan_growth_factor(plan['plan_type'], {plan['plan_type']: rate}) for plan in plans]
+                for rate in values.tolist()
+            ], dtype=float).reshape(len(values), len(plans))
+
+        return inputs
+
+    def _round(self, unknown: str, value: float) -> float:
+        # Round up so the reported value still reaches the goal
+        scale = 10000 if unknown == 'return' else 100
+        return math.ceil(round(value * scale, 6)) / scale
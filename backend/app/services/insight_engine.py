@@ -4,32 +4,397 @@ Personalized financial analysis based on CFP standards & Federal Reserve benchma
 Pure algorithmic analysis – no UI logic
 """
 
-from typing import Dict, List, Any
+import operator
+from functools import reduce
+from typing import Dict, List, Any, Callable, Optional
+
+import numpy as np
+
+from app.services.percentiles import get_percentile_table
+
+
+# ================= RULE TABLE ================= #
+#
+# Conditions are (metric, op, value) tuples, a list of them (all must hold)
+# or None (always holds). Metrics are the core metrics plus the derived
+# values in InsightEngine._build_context.
+
+# Health score components: (name, max points, tiers). The first tier whose
+# condition holds gives (points, status); points may name a metric.
+HEALTH_SCORE_RULES = [
+    #  1. Emergency Fund (20 points) - EXACT MATCH TO YOUR CRITERIA
+    ("emergency_fund", 20, [
+        (("months_covered", ">=", 6), 20, "excellent"),
+        (("months_covered", ">=", 3), 15, "good"),
+        (("months_covered", ">=", 1), 10, "fair"),
+        (None, 5, "poor"),
+    ]),
+    #  2. Debt Management (25 points) - EXACT MATCH TO YOUR CRITERIA
+    ("debt_management", 25, [
+        (("debt", "==", 0), 25, "excellent"),
+        (("debt_to_income", "<", 0.10), 22, "excellent"),
+        (("debt_to_income", "<", 0.20), 18, "good"),
+        (("debt_to_income", "<=", 0.36), 15, "fair"),
+        (None, 8, "poor"),
+    ]),
+    # 3. Savings Rate (20 points) - EXACT MATCH TO YOUR CRITERIA
+    ("savings_rate", 20, [
+        (("savings_rate", ">=", 0.40), 20, "elite"),
+        (("savings_rate", ">=", 0.30), 18, "excellent"),
+        (("savings_rate", ">=", 0.20), 15, "good"),
+        (("savings_rate", ">=", 0.10), 10, "fair"),
+        (None, 5, "poor"),
+    ]),
+    #  4. Investment Diversification (20 points) - EXACT MATCH TO YOUR CRITERIA
+    ("investment_diversification", 20, [
+        (("diversification_score", ">=", 18), "diversification_score", "excellent"),
+        (("diversification_score", ">=", 12), "diversification_score", "good"),
+        (("diversification_score", ">=", 6), "diversification_score", "fair"),
+        (None, "diversification_score", "poor"),
+    ]),
+    # 5. Income Stability (15 points) - 10 base for having main income source
+    ("income_stability", 15, [
+        (("side_income_pct", ">=", 0.05), 15, "excellent"),
+        (None, 10, "good"),
+    ]),
+]
+
+# Overall rating from the total score
+HEALTH_RATINGS = [
+    (("score", ">=", 85), "Excellent"),
+    (("score", ">=", 70), "Good"),
+    (("score", ">=", 55), "Fair"),
+    (None, "Needs Improvement"),
+]
+
+# Message rules in output order. A rule with "first_of" holds alternatives
+# (an if / elif chain): only the first one whose condition holds fires.
+# Item fields are constants, "{metric:format}" templates, {"metric": name}
+# values, {"when", "then", "else"} choices, or lists of those.
+INSIGHT_RULES = [
+    # ---------- strengths ----------
+    {"section": "strengths", "first_of": [
+        {"id": "strength.elite_savings_rate", "when": ("savings_rate", ">=", 0.40), "item": {
+            "title": "Elite Savings Rate",
+            "description": "You're saving {savings_rate:.0%} of your income monthly - top 10% nationally",
+            "category": "savings"}},
+        {"id": "strength.strong_savings_habit", "when": ("savings_rate", ">=", 0.20), "item": {
+            "title": "Strong Savings Habit",
+            "description": "Saving {savings_rate:.0%} of income exceeds national average",
+            "category": "savings"}},
+    ]},
+    {"section": "strengths", "id": "strength.emergency_fund", "when": ("months_covered", ">=", 6), "item": {
+        "title": "Fully Funded Emergency Fund",
+        "description": "{months_covered:.1f} months of expenses covered",
+        "category": "emergency"}},
+    {"section": "strengths", "first_of": [
+        {"id": "strength.debt_free", "when": ("debt", "==", 0), "item": {
+            "title": "Debt-Free",
+            "description": "No debt allows maximum flexibility for wealth building",
+            "category": "debt"}},
+        {"id": "strength.low_debt", "when": ("debt_to_income", "<", 0.10), "item": {
+            "title": "Low Debt Burden",
+            "description": "Debt-to-income ratio of {debt_to_income:.0%} is excellent",
+            "category": "debt"}},
+    ]},
+    {"section": "strengths", "id": "strength.diversified", "when": ("diversification_score", ">=", 15), "item": {
+        "title": "Well-Diversified Portfolio",
+        "description": "Investment diversification score: {diversification_score}/20",
+        "category": "investments"}},
+    {"section": "strengths", "id": "strength.side_income", "when": ("side_income_pct", ">=", 0.05), "item": {
+        "title": "Income Diversification",
+        "description": "{side_income_pct:.0%} of income from side sources provides financial resilience",
+        "category": "income"}},
+
+    # ---------- vulnerabilities ----------
+    {"section": "vulnerabilities", "id": "vulnerability.emergency_fund", "when": ("months_covered", "<", 3), "item": {
+        "title": "Emergency Fund Critically Low",
+        "severity": {"when": ("months_covered", "<", 1), "then": "high", "else": "medium"},
+        "description": "Only {months_covered:.1f} months coverage. Target: 6 months (${emergency_fund_target:,.0f})",
+        "gap": {"metric": "emergency_fund_gap"}}},
+    {"section": "vulnerabilities", "id": "vulnerability.savings_rate", "when": ("savings_rate", "<", 0.10), "item": {
+        "title": "Low Savings Rate",
+        "severity": "medium",
+        "description": "Only saving {savings_rate:.0%} of monthly income (Target: 20%+)"}},
+    {"section": "vulnerabilities", "id": "vulnerability.debt_to_income", "when": ("debt_to_income", ">", 0.36), "item": {
+        "title": "High Debt-to-Income Ratio",
+        "severity": {"when": ("debt_to_income", ">", 0.50), "then": "high", "else": "medium"},
+        "description": "{debt_to_income:.0%} exceeds recommended 36% threshold"}},
+    {"section": "vulnerabilities", "id": "vulnerability.diversification", "when": ("diversification_score", "<", 12), "item": {
+        "title": "Incomplete Investment Diversification",
+        "severity": "medium",
+        "description": "Diversification score is {diversification_score}/20. Consider adding retirement accounts or multiple investment types"}},
+    {"section": "vulnerabilities", "id": "vulnerability.single_income", "when": ("side_income_pct", "==", 0), "item": {
+        "title": "Single Point of Income Failure",
+        "severity": "low",
+        "description": "No side income — vulnerable if primary income is lost"}},
+
+    # ---------- immediate actions ----------
+    {"section": "immediate_actions", "id": "action.emergency_fund", "when": ("months_covered", "<", 6), "item": {
+        "priority": 1,
+        "title": "Build Emergency Fund",
+        "description": "Increase from ${savings:,.0f} to ${emergency_fund_target:,.0f}",
+        "action_steps": [
+            "Redirect ${monthly_surplus:,.0f}/month to high-yield savings",
+            {"when": ("months_to_emergency_fund", "truthy", None),
+             "then": "Target: Fully funded in {months_to_emergency_fund:.0f} months",
+             "else": "Review budget to increase surplus"},
+            "Keep in FDIC-insured account with 4.5%+ APY"
+        ],
+        "timeline": {"when": ("months_to_emergency_fund", "truthy", None),
+                     "then": "{months_to_emergency_fund:.0f} months", "else": "Ongoing"},
+        "impact": "Protects against job loss, medical emergencies, car repairs",
+        "category": "emergency_fund"}},
+    {"section": "immediate_actions", "id": "action.savings_rate", "when": ("savings_rate", "<", 0.20), "item": {
+        "priority": 2,
+        "title": "Increase Savings Rate",
+        "description": "Currently saving {savings_rate:.0%}, target: 20%",
+        "action_steps": [
+            "Increase monthly savings by ${savings_gap:,.0f}",
+            "Automate transfers on payday",
+            "Review budget for expense cuts"
+        ],
+        "timeline": "Start immediately",
+        "impact": "Reach 20% savings rate (${savings_target:,.0f}/month)",
+        "category": "savings"}},
+    {"section": "immediate_actions", "id": "action.debt", "when": [("debt", ">", 0), ("debt_to_income", ">", 0.20)], "item": {
+        "priority": 3,
+        "title": "Reduce Debt Burden",
+        "description": "Pay down ${debt:,.0f} balance",
+        "action_steps": [
+            "Use debt avalanche method (highest interest first)",
+            "Allocate ${debt_allocation:,.0f}/month to debt",
+            {"when": ("months_to_payoff", "truthy", None),
+             "then": "Debt-free in {months_to_payoff:.0f} months",
+             "else": "Increase income or reduce expenses"}
+        ],
+        "timeline": {"when": ("months_to_payoff", "truthy", None),
+                     "then": "{months_to_payoff:.0f} months", "else": "Ongoing"},
+        "impact": "Frees ${monthly_surplus:,.0f}/month for investing",
+        "category": "debt"}},
+
+    # ---------- alerts ----------
+    {"section": "alerts", "id": "alert.emergency_fund", "when": ("months_covered", "<", 2), "item": {
+        "type": "critical",
+        "title": "⚠️ Emergency Fund Dangerously Low",
+        "message": "One unexpected expense could derail your financial plan",
+        "action": "Priority: Build to 6 months expenses immediately"}},
+    {"section": "alerts", "id": "alert.debt_to_income", "when": ("debt_to_income", ">", 0.50), "item": {
+        "type": "critical",
+        "title": "⚠️ Debt Burden Excessive",
+        "message": "{debt_to_income:.0%} debt-to-income is unsustainable",
+        "action": "Consider debt consolidation or credit counseling"}},
+]
+
+INSIGHT_SECTIONS = ["strengths", "vulnerabilities", "immediate_actions", "alerts"]
+
+# op -> factory of fn(context) comparing one metric with a constant
+_OPERATORS = {
+    ">=": lambda metric, value: lambda ctx: ctx[metric] >= value,
+    ">": lambda metric, value: lambda ctx: ctx[metric] > value,
+    "<=": lambda metric, value: lambda ctx: ctx[metric] <= value,
+    "<": lambda metric, value: lambda ctx: ctx[metric] < value,
+    "==": lambda metric, value: lambda ctx: ctx[metric] == value,
+}
+
+
+# ================= RULE COMPILER ================= #
+
+def _always(ctx: Dict[str, Any]) -> bool:
+    return True
+
+
+def _compile_condition(spec: Any) -> Callable[[Dict[str, Any]], Any]:
+    """Condition spec -> fn(context), on scalars or NumPy arrays alike"""
+    if spec is None:
+        return _always
+    if isinstance(spec, list):
+        parts = [_compile_condition(part) for part in spec]
+        return lambda ctx: reduce(operator.and_, (part(ctx) for part in parts))
+    metric, op, value = spec
+    if op == "truthy":
+        return lambda ctx: ctx[metric]
+    if op not in _OPERATORS:
+        raise ValueError(f"Unknown rule operator: {op}")
+    return _OPERATORS[op](metric, value)
+
+
+def _compile_field(spec: Any) -> Callable[[Dict[str, Any]], Any]:
+    """Item field spec -> fn(context) building its value for one user"""
+    if isinstance(spec, dict) and "when" in spec:
+        condition, then, otherwise = _compile_condition(spec["when"]), _compile_field(spec["then"]), _compile_field(spec["else"])
+        return lambda ctx: then(ctx) if condition(ctx) else otherwise(ctx)
+    if isinstance(spec, dict) and "metric" in spec:
+        metric = spec["metric"]
+        return lambda ctx: ctx[metric]
+    if isinstance(spec, dict):
+        # Constant fields are filled in once; the copy keeps the spec's key order
+        template = {key: value if _is_constant(value) else None for key, value in spec.items()}
+        fields = [(key, _compile_field(value)) for key, value in spec.items() if not _is_constant(value)]
+
+        def build(ctx):
+            item = template.copy()
+            for key, field in fields:
+                item[key] = field(ctx)
+            return item
+        return build
+    if isinstance(spec, list):
+        fields = [_compile_field(value) for value in spec]
+        return lambda ctx: [field(ctx) for field in fields]
+    if isinstance(spec, str) and "{" in spec:
+        return lambda ctx: spec.format_map(ctx)
+    return lambda ctx: spec
+
+
+def _is_constant(spec: Any) -> bool:
+    """Whether a field spec is a plain value (containers always build fresh copies)"""
+    return not isinstance(spec, (dict, list)) and not (isinstance(spec, str) and "{" in spec)
+
+
+def _compile_rules() -> Dict[str, Any]:
+    """
+    Evaluation plan for the rule table, built once at import
+
+    The same compiled conditions serve analyze_financial_profile (scalar
+    context) and analyze_batch (array context). Message rules are
+    (section, [(id, condition, build_item), ...]) alternatives.
+    """
+    return {
+        "health_score": [
+            (name, maxv, [(_compile_condition(tier[0]),) + tuple(tier[1:]) for tier in tiers])
+            for name, maxv, tiers in HEALTH_SCORE_RULES
+        ],
+        "ratings": [(_compile_condition(condition), rating) for condition, rating in HEALTH_RATINGS],
+        "messages": [
+            (rule["section"], [
+                (alternative["id"], _compile_condition(alternative["when"]), _compile_field(alternative["item"]))
+                for alternative in rule.get("first_of", [rule])
+            ])
+            for rule in INSIGHT_RULES
+        ],
+    }
+
+
+_EVALUATION_PLAN = _compile_rules()
 
 
 class InsightEngine:
+    # Output version, part of ResultCache keys (bump when outputs change)
+    VERSION = "2"
+
+    # Plan types counted as retirement accounts for diversification
+    RETIREMENT_PLAN_TYPES = {'Roth IRA', 'Traditional 401k', 'Roth 401k', 'Solo 401k'}
+
+    # Inputs of analyze_batch, one array per field
+    BATCH_COLUMNS = [
+        "age", "monthly_income", "side_income", "monthly_expenses", "savings", "investments",
+        "debt", "plan_contributions", "has_retirement_plan", "plan_type_count"
+    ]
+
     def __init__(self):
+        # Peer medians per age band, read from the empirical quantile table
+        table = get_percentile_table()
         self.BENCHMARKS = {
-            "25-34": {"median_net_worth": 14000, "median_savings_rate": 0.05, "top_10_savings_rate": 0.20},
-            "35-44": {"median_net_worth": 91000, "median_savings_rate": 0.08, "top_10_savings_rate": 0.25},
-            "45-54": {"median_net_worth": 168000, "median_savings_rate": 0.12, "top_10_savings_rate": 0.30},
+            band: {
+                "median_net_worth": table.quantile("net_worth", band, 50),
+                "median_savings_rate": table.quantile("savings_rate", band, 50),
+                "top_10_savings_rate": table.quantile("savings_rate", band, 90),
+            }
+            for band in table.bands
         }
 
     # ================= PUBLIC API ================= #
 
     def analyze_financial_profile(self, user_data: Dict[str, Any], projections: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Full analysis for one user
+
+        Every section comes out of a single pass of the compiled rule
+        table over one precomputed metrics context.
+        """
         metrics = self._calculate_core_metrics(user_data)
+        context = self._build_context(metrics, user_data.get("plans", []))
+
+        health_score, sections = self._evaluate(context)
 
         return {
             "metrics": metrics,
-            "health_score": self._calculate_health_score(metrics, user_data),
-            "strengths": self._identify_strengths(metrics, user_data),
-            "vulnerabilities": self._identify_vulnerabilities(metrics, user_data),
-            "immediate_actions": self._generate_immediate_actions(metrics, user_data),
-            "alerts": self._generate_alerts(metrics),
+            "health_score": health_score,
+            **sections,
             "benchmarks": self._compare_to_benchmarks(metrics, user_data),
         }
 
+    def analyze_batch(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate the rule table for many users at once
+
+        columns holds one equal-length array per BATCH_COLUMNS field (see
+        build_columns). Returns core metric arrays, health scores (total,
+        rating and per-component score / status arrays) and, per message
+        rule id, a boolean array of the users it fires for.
+        """
+        columns = {name: np.asarray(columns[name], dtype=float) for name in self.BATCH_COLUMNS}
+        metrics = self._calculate_core_metrics_columns(columns)
+        diversification_score = (
+            np.where(columns["investments"] > 0, 8, 0)
+            + np.where(columns["has_retirement_plan"] > 0, 8, 0)
+            + np.where(columns["plan_type_count"] >= 2, 4, 0)
+        )
+        context = {**metrics, "diversification_score": diversification_score}
+        size = len(diversification_score)
+
+        score = np.zeros(size, dtype=int)
+        breakdown = {}
+        for name, maxv, tiers in _EVALUATION_PLAN["health_score"]:
+            tier = self._first_matching_tier(tiers, context, size)
+            points = np.select(
+                [tier == i for i in range(len(tiers))],
+                [context[points] if isinstance(points, str) else points for condition, points, status in tiers]
+            )
+            score = score + points
+            breakdown[name] = {
+                "score": points,
+                "max": maxv,
+                "status": np.array([status for condition, points, status in tiers], dtype=object)[tier]
+            }
+        ratings = _EVALUATION_PLAN["ratings"]
+        rating = np.array([label for condition, label in ratings], dtype=object)[
+            self._first_matching_tier(ratings, {"score": score}, size)
+        ]
+
+        fired = {}
+        for section, alternatives in _EVALUATION_PLAN["messages"]:
+            taken = np.zeros(size, dtype=bool)
+            for rule_id, condition, build_item in alternatives:
+                fired[rule_id] = np.broadcast_to(condition(context), size) & ~taken
+                taken = taken | fired[rule_id]
+
+        return {
+            "metrics": metrics,
+            "health_score": {"score": score, "rating": rating, "breakdown": breakdown},
+            "rules": fired,
+        }
+
+    def build_columns(self, user_data_list: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Column store for analyze_batch from analyze_financial_profile-style user dicts"""
+        rows = []
+        for u in user_data_list:
+            plans = u.get("plans", [])
+            rows.append((
+                u.get("age", 30),
+                u.get("monthly_income", 0),
+                u.get("side_income", 0),
+                u.get("monthly_expenses", 0),
+                u.get("savings", 0),
+                u.get("investments", 0),
+                u.get("debt", 0),
+                sum(p.get('monthly_contribution', 0) for p in plans),
+                any(p.get('plan_type') in self.RETIREMENT_PLAN_TYPES for p in plans),
+                len(set(p.get('plan_type') for p in plans)),
+            ))
+        table = np.array(rows, dtype=float).reshape(len(rows), len(self.BATCH_COLUMNS))
+        return {name: table[:, i] for i, name in enumerate(self.BATCH_COLUMNS)}
+
     # ================= METRICS ================= #
 
     def _calculate_core_metrics(self, u: Dict[str, Any]) -> Dict[str, Any]:
@@ -79,75 +444,86 @@ class InsightEngine:
             "net_worth": savings + investments - debt,
         }
 
+    def _calculate_core_metrics_columns(self, c: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """_calculate_core_metrics over column arrays"""
+        total_income = c["monthly_income"] + c["side_income"]
+        annual_income = total_income * 12
+
+        def ratio(numerator, denominator):
+            return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0.0)
+
+        return {
+            "monthly_income": c["monthly_income"],
+            "side_income": c["side_income"],
+            "total_income": total_income,
+            "monthly_expenses": c["monthly_expenses"],
+            "savings": c["savings"],
+            "investments": c["investments"],
+            "debt": c["debt"],
+            "monthly_surplus": total_income - c["monthly_expenses"],
+            "plan_contributions": c["plan_contributions"],
+            "savings_rate": ratio(c["plan_contributions"], total_income),
+            "months_covered": ratio(c["savings"], c["monthly_expenses"]),
+            "debt_to_income": ratio(c["debt"], annual_income),
+            "side_income_pct": ratio(c["side_income"], total_income),
+            "net_worth": c["savings"] + c["investments"] - c["debt"],
+        }
+
+    def _build_context(self, m: Dict[str, Any], plans: List[Dict]) -> Dict[str, Any]:
+        """Core metrics plus every derived value the rule table refers to, computed once"""
+        emergency_fund_target = m["monthly_expenses"] * 6
+        emergency_fund_gap = emergency_fund_target - m["savings"]
+        savings_target = m["total_income"] * 0.20
+        surplus = m["monthly_surplus"]
+
+        return {
+            **m,
+            "diversification_score": self._calculate_diversification_score(plans, m["investments"]),
+            "emergency_fund_target": emergency_fund_target,
+            "emergency_fund_gap": emergency_fund_gap,
+            "months_to_emergency_fund": emergency_fund_gap / surplus if surplus > 0 else None,
+            "savings_target": savings_target,
+            "savings_gap": savings_target - m["plan_contributions"],
+            "months_to_payoff": m["debt"] / surplus if surplus > 0 else None,
+            "debt_allocation": min(surplus, m["debt"]),
+        }
+
     # ================= HEALTH SCORE ================= #
 
-    def _calculate_health_score(self, m: Dict[str, Any], u: Dict[str, Any]) -> Dict[str, Any]:
+    def _evaluate(self, context: Dict[str, Any]) -> tuple:
+        """(health_score, sections) for one user's context, in one pass over the rule table"""
         score = 0
         breakdown = {}
-
-        def add(name, val, maxv, status):
-            nonlocal score
-            score += val
-            breakdown[name] = {"score": val, "max": maxv, "status": status}
-
-        #  1. Emergency Fund (20 points) - EXACT MATCH TO YOUR CRITERIA
-        months = m["months_covered"]
-        if months >= 6:
-            add("emergency_fund", 20, 20, "excellent")
-        elif months >= 3:
-            add("emergency_fund", 15, 20, "good")
-        elif months >= 1:
-            add("emergency_fund", 10, 20, "fair")
-        else:
-            add("emergency_fund", 5, 20, "poor")
-
-        #  2. Debt Management (25 points) - EXACT MATCH TO YOUR CRITERIA
-        dti = m["debt_to_income"]
-        if m["debt"] == 0:
-            add("debt_management", 25, 25, "excellent")
-        elif dti < 0.10:
-            add("debt_management", 22, 25, "excellent")
-        elif dti < 0.20:
-            add("debt_management", 18, 25, "good")
-        elif dti <= 0.36:
-            add("debt_management", 15, 25, "fair")
-        else:
-            add("debt_management", 8, 25, "poor")
-
-        # 3. Savings Rate (20 points) - EXACT MATCH TO YOUR CRITERIA
-        sr = m["savings_rate"]
-        if sr >= 0.40:
-            add("savings_rate", 20, 20, "elite")
-        elif sr >= 0.30:
-            add("savings_rate", 18, 20, "excellent")
-        elif sr >= 0.20:
-            add("savings_rate", 15, 20, "good")
-        elif sr >= 0.10:
-            add("savings_rate", 10, 20, "fair")
-        else:
-            add("savings_rate", 5, 20, "poor")
-
-        #  4. Investment Diversification (20 points) - EXACT MATCH TO YOUR CRITERIA
-        div_score = self._calculate_diversification_score(u.get("plans", []), m["investments"])
-        status = "excellent" if div_score >= 18 else "good" if div_score >= 12 else "fair" if div_score >= 6 else "poor"
-        add("investment_diversification", div_score, 20, status)
-
-        # 5. Income Stability (15 points) - EXACT MATCH TO YOUR CRITERIA
-        income_score = 10  # Base for having main income source
-        if m["side_income_pct"] >= 0.05:
-            income_score = 15
-        status = "excellent" if income_score == 15 else "good"
-        add("income_stability", income_score, 15, status)
-
-        # Overall rating
-        rating = (
-            "Excellent" if score >= 85
-            else "Good" if score >= 70
-            else "Fair" if score >= 55
-            else "Needs Improvement"
-        )
-
-        return {"score": score, "rating": rating, "breakdown": breakdown}
+        for name, maxv, tiers in _EVALUATION_PLAN["health_score"]:
+            for condition, points, status in tiers:
+                if condition(context):
+                    value = context[points] if isinstance(points, str) else points
+                    score += value
+                    breakdown[name] = {"score": value, "max": maxv, "status": status}
+                    break
+
+        totals = {"score": score}
+        for condition, label in _EVALUATION_PLAN["ratings"]:
+            if condition(totals):
+                rating = label
+                break
+
+        sections = {section: [] for section in INSIGHT_SECTIONS}
+        for section, alternatives in _EVALUATION_PLAN["messages"]:
+            for rule_id, condition, build_item in alternatives:
+                if condition(context):
+                    sections[section].append(build_item(context))
+                    break
+
+        return {"score": score, "rating": rating, "breakdown": breakdown}, sections
+
+    def _first_matching_tier(self, tiers: List[tuple], context: Dict[str, Any], size: int) -> np.ndarray:
+        """Index of the first tier whose condition holds, per user"""
+        conditions = [
+            np.broadcast_to(tier[0](context), size)
+            for tier in tiers
+        ]
+        return np.argmax(np.array(conditions), axis=0)
 
     # Investment Diversification Scoring - EXACT MATCH TO YOUR CRITERIA
     def _calculate_diversification_score(self, plans: List[Dict], investments: float) -> int:
@@ -166,8 +542,7 @@ class InsightEngine:
             score += 8
         
         # +8 points for retirement account
-        retirement_types = {'Roth IRA', 'Traditional 401k', 'Roth 401k', 'Solo 401k'}
-        has_retirement = any(p.get('plan_type') in retirement_types for p in plans)
+        has_retirement = any(p.get('plan_type') in self.RETIREMENT_PLAN_TYPES for p in plans)
         if has_retirement:
             score += 8
         
@@ -178,169 +553,11 @@ class InsightEngine:
         
         return score
 
-    # ================= STRENGTHS ================= #
-
-    def _identify_strengths(self, m, u):
-        s = []
-
-        # Savings rate strength (now using correct calculation)
-        if m["savings_rate"] >= 0.40:
-            s.append({"title": "Elite Savings Rate", "description": f"You're saving {m['savings_rate']:.0%} of your income monthly - top 10% nationally", "category": "savings"})
-        elif m["savings_rate"] >= 0.20:
-            s.append({"title": "Strong Savings Habit", "description": f"Saving {m['savings_rate']:.0%} of income exceeds national average", "category": "savings"})
-
-        if m["months_covered"] >= 6:
-            s.append({"title": "Fully Funded Emergency Fund", "description": f"{m['months_covered']:.1f} months of expenses covered", "category": "emergency"})
-
-        if m["debt"] == 0:
-            s.append({"title": "Debt-Free", "description": "No debt allows maximum flexibility for wealth building", "category": "debt"})
-        elif m["debt_to_income"] < 0.10:
-            s.append({"title": "Low Debt Burden", "description": f"Debt-to-income ratio of {m['debt_to_income']:.0%} is excellent", "category": "debt"})
-
-        div_score = self._calculate_diversification_score(u.get("plans", []), m["investments"])
-        if div_score >= 15:
-            s.append({"title": "Well-Diversified Portfolio", "description": f"Investment diversification score: {div_score}/20", "category": "investments"})
-
-        if m["side_income_pct"] >= 0.05:
-            s.append({"title": "Income Diversification", "description": f"{m['side_income_pct']:.0%} of income from side sources provides financial resilience", "category": "income"})
-
-        return s
-
-    # ================= VULNERABILITIES ================= #
-
-    def _identify_vulnerabilities(self, m, u):
-        v = []
-
-        if m["months_covered"] < 3:
-            target = m["monthly_expenses"] * 6
-            gap = target - m["savings"]
-            severity = "high" if m["months_covered"] < 1 else "medium"
-            v.append({
-                "title": "Emergency Fund Critically Low", 
-                "severity": severity, 
-                "description": f"Only {m['months_covered']:.1f} months coverage. Target: 6 months (${target:,.0f})", 
-                "gap": gap
-            })
-
-        # Now using correct savings_rate
-        if m["savings_rate"] < 0.10:
-            v.append({
-                "title": "Low Savings Rate", 
-                "severity": "medium", 
-                "description": f"Only saving {m['savings_rate']:.0%} of monthly income (Target: 20%+)"
-            })
-
-        if m["debt_to_income"] > 0.36:
-            severity = "high" if m["debt_to_income"] > 0.50 else "medium"
-            v.append({
-                "title": "High Debt-to-Income Ratio", 
-                "severity": severity, 
-                "description": f"{m['debt_to_income']:.0%} exceeds recommended 36% threshold"
-            })
-
-        div_score = self._calculate_diversification_score(u.get("plans", []), m["investments"])
-        if div_score < 12:
-            v.append({
-                "title": "Incomplete Investment Diversification", 
-                "severity": "medium", 
-                "description": f"Diversification score is {div_score}/20. Consider adding retirement accounts or multiple investment types"
-            })
-
-        if m["side_income_pct"] == 0:
-            v.append({
-                "title": "Single Point of Income Failure", 
-                "severity": "low", 
-                "description": "No side income — vulnerable if primary income is lost"
-            })
-
-        return v
-
-    # ================= ACTIONS ================= #
-
-    def _generate_immediate_actions(self, m, u):
-        a = []
-
-        if m["months_covered"] < 6:
-            target = m["monthly_expenses"] * 6
-            gap = target - m["savings"]
-            months = gap / m["monthly_surplus"] if m["monthly_surplus"] > 0 else None
-            
-            a.append({
-                "priority": 1,
-                "title": "Build Emergency Fund",
-                "description": f"Increase from ${m['savings']:,.0f} to ${target:,.0f}",
-                "action_steps": [
-                    f"Redirect ${m['monthly_surplus']:,.0f}/month to high-yield savings",
-                    f"Target: Fully funded in {months:.0f} months" if months else "Review budget to increase surplus",
-                    "Keep in FDIC-insured account with 4.5%+ APY"
-                ],
-                "timeline": f"{months:.0f} months" if months else "Ongoing",
-                "impact": "Protects against job loss, medical emergencies, car repairs",
-                "category": "emergency_fund"
-            })
-
-        if m["savings_rate"] < 0.20:
-            target_savings = m["total_income"] * 0.20
-            current_savings = m["plan_contributions"]
-            gap = target_savings - current_savings
-            
-            a.append({
-                "priority": 2,
-                "title": "Increase Savings Rate",
-                "description": f"Currently saving {m['savings_rate']:.0%}, target: 20%",
-                "action_steps": [
-                    f"Increase monthly savings by ${gap:,.0f}",
-                    "Automate transfers on payday",
-                    "Review budget for expense cuts"
-                ],
-                "timeline": "Start immediately",
-                "impact": f"Reach 20% savings rate (${target_savings:,.0f}/month)",
-                "category": "savings"
-            })
-
-        if m["debt"] > 0 and m["debt_to_income"] > 0.20:
-            months_to_payoff = m["debt"] / m["monthly_surplus"] if m["monthly_surplus"] > 0 else None
-            a.append({
-                "priority": 3,
-                "title": "Reduce Debt Burden",
-                "description": f"Pay down ${m['debt']:,.0f} balance",
-                "action_steps": [
-                    "Use debt avalanche method (highest interest first)",
-                    f"Allocate ${min(m['monthly_surplus'], m['debt']):,.0f}/month to debt",
-                    f"Debt-free in {months_to_payoff:.0f} months" if months_to_payoff else "Increase income or reduce expenses"
-                ],
-                "timeline": f"{months_to_payoff:.0f} months" if months_to_payoff else "Ongoing",
-                "impact": f"Frees ${m['monthly_surplus']:,.0f}/month for investing",
-                "category": "debt"
-            })
-
-        return a
-
-    # ================= ALERTS ================= #
-
-    def _generate_alerts(self, m):
-        alerts = []
-        if m["months_covered"] < 2:
-            alerts.append({
-                "type": "critical", 
-                "title": "⚠️ Emergency Fund Dangerously Low", 
-                "message": "One unexpected expense could derail your financial plan",
-                "action": "Priority: Build to 6 months expenses immediately"
-            })
-        if m["debt_to_income"] > 0.50:
-            alerts.append({
-                "type": "critical", 
-                "title": "⚠️ Debt Burden Excessive", 
-                "message": f"{m['debt_to_income']:.0%} debt-to-income is unsustainable",
-                "action": "Consider debt consolidation or credit counseling"
-            })
-        return alerts
-
     # ================= BENCHMARKS ================= #
 
     def _compare_to_benchmarks(self, m, u):
-        age = u.get("age", 30)
-        group = "25-34" if age < 35 else "35-44" if age < 45 else "45-54"
+        age = u.get("age") or 30
+        group = get_percentile_table().band(age)
         b = self.BENCHMARKS[group]
         
         return {
@@ -348,32 +565,16 @@ class InsightEngine:
             "net_worth": {
                 "user": m["net_worth"], 
                 "median": b["median_net_worth"],
-                "percentile": self._calculate_percentile(m["net_worth"], b["median_net_worth"])
+                "percentile": self._calculate_percentile("net_worth", age, m["net_worth"])
             },
             "savings_rate": {
                 "user": m["savings_rate"], 
                 "median": b["median_savings_rate"], 
                 "top_10": b["top_10_savings_rate"],
-                "percentile": self._calculate_percentile(m["savings_rate"], b["median_savings_rate"])
+                "percentile": self._calculate_percentile("savings_rate", age, m["savings_rate"])
             },
         }
     
-    def _calculate_percentile(self, user_value: float, median_value: float) -> int:
-        """Estimate percentile based on distance from median"""
-        if median_value == 0:
-            return 50
-        
-        ratio = user_value / median_value
-        
-        if ratio >= 2.0:
-            return 90
-        elif ratio >= 1.5:
-            return 75
-        elif ratio >= 1.0:
-            return 60
-        elif ratio >= 0.75:
-            return 50
-        elif ratio >= 0.50:
-            return 40
-        else:
-            return 25
\ No newline at end of file
+    def _calculate_percentile(self, metric: str, age: float, user_value: float) -> int:
+        """Percentile within the user's age band from the empirical quantile table"""
+        return get_percentile_table().percentile(metric, age, user_value)
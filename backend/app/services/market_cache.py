@@ -0,0 +1,281 @@
+"""
+Market Data Cache
+Shared cache for upstream market data (S&P 500 prices, news headlines)
+with pluggable storage: an in-process dict, a SQLite file shared by every
+worker process on the host, or a Redis-compatible server
+
+Every backend stores the same JSON-able envelope ({"data", "fetched_at"})
+and freshness is judged here from fetched_at, so TTLs and
+stale-while-revalidate behave identically whichever backend is configured.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.services.result_cache import SQLiteCacheTier
+
+logger = logging.getLogger(__name__)
+
+
+class DictCacheBackend:
+    """
+    In-process backend: entries are private to one worker process
+
+    Values are stored JSON-encoded, like the shared backends, so every read
+    decodes a new copy and callers can never modify a stored entry.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}  # key -> (expires_at, JSON-encoded value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Stored value for key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            raw = entry[1]
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value under key for ttl_seconds"""
+        raw = json.dumps(value)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, raw)
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Store value only if key is missing or expired; True when stored"""
+        raw = json.dumps(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                return False
+            self._entries[key] = (time.time() + ttl_seconds, raw)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisCacheBackend:
+    """
+    Backend over a Redis-compatible client (redis-py, valkey, fakeredis, ...)
+
+    Entries are shared by every worker on every host using the server.
+    Errors are logged and treated as misses so an outage degrades to
+    direct upstream fetches rather than failed requests.
+    """
+
+    def __init__(self, client: Any, prefix: str = "market:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisCacheBackend':
+        """Connect with redis-py (an optional dependency, imported on first use)"""
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("MARKET_CACHE_URL points at Redis but the 'redis' package is not installed")
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Any:
+        """Stored value for key, or None when missing, expired or unreachable"""
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Market cache read error: {str(e)}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value under key for ttl_seconds (errors are logged, not raised)"""
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl_seconds * 1000)))
+        except Exception as e:
+            logger.warning(f"Market cache write error: {str(e)}")
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """SET NX: True when stored (or when Redis is unreachable, so callers still fetch)"""
+        try:
+            return bool(self.client.set(self.prefix + key, json.dumps(value),
+                                        px=max(1, int(ttl_seconds * 1000)), nx=True))
+        except Exception as e:
+            logger.warning(f"Market cache write error: {str(e)}")
+            return True
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Market cache write error: {str(e)}")
+
+
+class _Flight:
+    """One in-progress upstream fetch that concurrent callers in this process wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MarketDataCache:
+    """
+    Stale-while-revalidate cache with single-flight fetches
+
+    Within a process, threads that miss the same key share one fetch.
+    Across processes, a short lease in the backend lets only one worker
+    call upstream; the others serve their expired entry meanwhile, or wait
+    for the leaseholder's result when they have nothing cached.
+    """
+
+    # Expired entries are kept this long as fallbacks for failed fetches
+    STALE_TTL_SECONDS = 7 * 24 * 3600
+
+    # A fetch holding the cross-worker lease longer than this is presumed dead
+    LEASE_SECONDS = 30
+
+    # Longest a caller with nothing cached waits on another fetch
+    FETCH_WAIT_SECONDS = 30
+    POLL_SECONDS = 0.05
+
+    def __init__(self, backend: Any = None):
+        self.backend = backend if backend is not None else DictCacheBackend()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    # ================= PUBLIC API ================= #
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fresh_seconds: float,
+        fetch: Callable[[], Any],
+        fallback: Callable[[Optional[Any], Optional[Exception]], Any]
+    ) -> Any:
+        """
+        Cached data for key, fetched at most once across threads and workers when expired
+
+        fetch returns fresh JSON-able data or raises. When no fresh data can
+        be had, fallback(stale_data, error) decides the answer: stale_data
+        is the expired value (None if there is none) and error the fetch
+        exception (None if another worker's fetch did not finish in time).
+        Exceptions raised by fallback propagate to every waiting caller.
+        Returned values are never the stored entry (backends decode a copy
+        per read), but callers that waited on the same fetch share one.
+        """
+        entry = self.backend.get(key)
+        if entry is not None and self.is_fresh(entry, fresh_seconds):
+            return entry['data']
+        stale = entry['data'] if entry is not None else None
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            if stale is not None:
+                return stale
+            if not flight.done.wait(self.FETCH_WAIT_SECONDS):
+                return fallback(None, None)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetch_shared(key, fresh_seconds, stale, fetch, fallback)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored {"data", "fetched_at"} envelope for key, fresh or not (None if missing)"""
+        return self.backend.get(key)
+
+    def put(self, key: str, data: Any) -> None:
+        """Store freshly fetched data under key"""
+        self.backend.set(key, {'data': data, 'fetched_at': time.time()}, self.STALE_TTL_SECONDS)
+
+    def acquire_lease(self, name: str, seconds: float) -> bool:
+        """Claim a named lease shared by every worker on the backend; True when claimed"""
+        return self.backend.add(f"lease:{name}", True, seconds)
+
+    def release_lease(self, name: str) -> None:
+        self.backend.delete(f"lease:{name}")
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], fresh_seconds: float) -> bool:
+        return time.time() - entry['fetched_at'] < fresh_seconds
+
+    # ================= INTERNALS ================= #
+
+    def _fetch_shared(self, key, fresh_seconds, stale, fetch, fallback) -> Any:
+        if not self.acquire_lease(key, self.LEASE_SECONDS):
+            # Another worker is fetching: serve stale, or wait for its result
+            if stale is not None:
+                return stale
+            deadline = time.monotonic() + self.FETCH_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_SECONDS)
+                entry = self.backend.get(key)
+                if entry is not None and self.is_fresh(entry, fresh_seconds):
+                    return entry['data']
+            return fallback(None, None)
+
+        try:
+            data = fetch()
+        except Exception as e:
+            logger.error(f"Error fetching {key}: {str(e)}")
+            return fallback(stale, e)
+        else:
+            self.put(key, data)
+            return data
+        finally:
+            self.release_lease(key)
+
+
+def make_cache_backend(url: Optional[str]) -> Any:
+    """
+    Backend for a MARKET_CACHE_URL
+
+    unset               in-process dict (one cache per worker)
+    sqlite:////abs/path SQLite file shared by the workers on this host
+    redis://host:port/n Redis (also rediss:// and unix://)
+    """
+    if not url:
+        return DictCacheBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheTier(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported MARKET_CACHE_URL: {url}")
+
+
+_market_cache = None
+_market_cache_lock = threading.Lock()
+
+
+def get_market_cache() -> MarketDataCache:
+    """Process-wide cache on the backend named by Config.MARKET_CACHE_URL"""
+    global _market_cache
+    with _market_cache_lock:
+        if _market_cache is None:
+            from app.config import Config
+            _market_cache = MarketDataCache(make_cache_backend(Config.MARKET_CACHE_URL))
+        return _market_cache
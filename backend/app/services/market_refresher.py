@@ -0,0 +1,96 @@
+"""
+Market Data Refresher
+Keeps SP500Service's cached data warm from outside the request path, so
+requests read the cache instead of waiting on Yahoo Finance
+
+Runs as a daemon thread in each web worker, started by the worker's first
+request (MARKET_REFRESH=thread), or as a separate process,
+'flask refresh-market-data' (MARKET_REFRESH=sidecar).
+Either way it wakes on the service's refresh_interval() cadence: every
+minute while the market is open, every few hours over the weekend.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional
+
+from app.services.sp500_service import SP500Service
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataRefresher:
+    """Refresh loop around SP500Service.refresh()"""
+
+    # Held while refreshing so workers sharing a backend don't refresh in parallel
+    LEASE_NAME = "sp500:refresh"
+    LEASE_SECONDS = 120
+
+    # Wait before retrying after an unexpected error in a refresh
+    RETRY_SECONDS = 60
+
+    def __init__(self, service: SP500Service):
+        self.service = service
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ================= PUBLIC API ================= #
+
+    def run_once(self) -> Dict[str, bool]:
+        """One refresh (see SP500Service.refresh); empty when another worker holds the lease"""
+        cache = self.service.cache
+        if not cache.acquire_lease(self.LEASE_NAME, self.LEASE_SECONDS):
+            return {}
+        try:
+            return self.service.refresh()
+        finally:
+            cache.release_lease(self.LEASE_NAME)
+
+    def run(self) -> None:
+        """Refresh on the market-hours cadence until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                wait = self.service.refresh_interval()
+            except Exception as e:
+                logger.error(f"Market data refresh error: {str(e)}")
+                wait = self.RETRY_SECONDS
+            self._stop.wait(wait)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Run in a daemon thread (no-op when already running)"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="market-data-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_market_refresher(service: SP500Service) -> MarketDataRefresher:
+    """
+    Start this process's refresher thread for service (once per process)
+
+    Cheap once running, so it can be called on every request; a forked
+    child has no running thread and starts its own.
+    """
+    global _refresher
+    refresher = _refresher
+    if refresher is not None and refresher.is_running():
+        return refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = MarketDataRefresher(service)
+        _refresher.start()
+        return _refresher
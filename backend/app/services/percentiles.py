@@ -0,0 +1,166 @@
+"""
+Percentile Tables
+Empirical per-age-band quantiles for net worth, savings rate and wealth
+velocity, used by the insight and wealth velocity engines to place a user
+within their age group
+
+The quantiles live in app/data/benchmark_quantiles.json (the editable
+source) and are compiled to a float64 .npy array of shape
+(metrics, bands, levels) that every worker memory-maps. A lookup is a
+binary search over one band's quantiles plus a linear interpolation
+between the two surrounding levels.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+SOURCE_PATH = os.path.join(DATA_DIR, 'benchmark_quantiles.json')
+TABLE_PATH = os.path.join(DATA_DIR, 'benchmark_quantiles.npy')
+
+
+class PercentileTable:
+    """
+    Memory-mapped quantile table
+
+    Bands are closed above at max_age (the last band is open-ended), and
+    values beyond the outermost quantiles clamp to the first / last level.
+    """
+
+    def __init__(self, table: np.ndarray, metadata: Dict[str, Any]):
+        self.table = table
+        self.metadata = metadata
+        self.levels = [float(level) for level in metadata['levels']]
+        self.bands = [band['label'] for band in metadata['bands']]
+        self._band_limits = [
+            band['max_age'] if band['max_age'] is not None else float('inf')
+            for band in metadata['bands']
+        ]
+        self._metric_index = {metric: i for i, metric in enumerate(metadata['metrics'])}
+        # Scalar lookups bisect plain lists: indexing the memmap per call costs more than the search
+        self._rows = table.tolist()
+
+    # ================= BUILD / LOAD ================= #
+
+    @classmethod
+    def build(cls, source: str = SOURCE_PATH, path: str = TABLE_PATH) -> 'PercentileTable':
+        """Compile the JSON source to path (plus path.json)"""
+        table, metadata = cls._compile(source)
+        np.save(path, table)
+        with open(cls._metadata_path(path), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return cls.load(path, source)
+
+    @classmethod
+    def load(cls, path: str = TABLE_PATH, source: str = SOURCE_PATH) -> 'PercentileTable':
+        """
+        Map a table written by build()
+
+        Falls back to compiling the source in memory when the table is
+        missing or out of date with it.
+        """
+        try:
+            with open(cls._metadata_path(path)) as f:
+                metadata = json.load(f)
+            if metadata.get('source_hash') == cls._source_hash(source):
+                return cls(np.load(path, mmap_mode='r'), metadata)
+            logger.warning("Percentile table is stale; rebuild it with 'flask build-benchmark-quantiles'")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Percentile table unavailable: {str(e)}")
+        return cls(*cls._compile(source))
+
+    # ================= PUBLIC API ================= #
+
+    def band(self, age: float) -> str:
+        """Label of the age band containing age"""
+        return self.bands[bisect.bisect_left(self._band_limits, age)]
+
+    def quantile(self, metric: str, band: str, level: float) -> float:
+        """Value at a tabulated percentile level (e.g. 50 for the median) in one age band"""
+        return self._rows[self._metric_index[metric]][self.bands.index(band)][self.levels.index(level)]
+
+    def percentile(self, metric: str, age: float, value: float) -> int:
+        """Percentile of value among age's band, interpolated between tabulated levels"""
+        row = self._rows[self._metric_index[metric]][bisect.bisect_left(self._band_limits, age)]
+        upper = bisect.bisect_right(row, value)
+        if upper == 0:
+            return int(self.levels[0])
+        if upper == len(self.levels):
+            return int(self.levels[-1])
+
+        low_value, high_value = row[upper - 1], row[upper]
+        fraction = (value - low_value) / (high_value - low_value)
+        return round(self.levels[upper - 1] + fraction * (self.levels[upper] - self.levels[upper - 1]))
+
+    def percentiles(self, metric: str, ages: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """percentile() over arrays of ages and values"""
+        ages = np.asarray(ages, dtype=float)
+        values = np.asarray(values, dtype=float)
+        levels = np.asarray(self.levels)
+        rows = np.asarray(self.table[self._metric_index[metric]])[
+            np.searchsorted(self._band_limits, ages, side='left')
+        ]
+
+        upper = (rows <= values[:, None]).sum(axis=1)
+        inner = np.clip(upper, 1, len(levels) - 1)
+        low_value = np.take_along_axis(rows, inner[:, None] - 1, axis=1)[:, 0]
+        high_value = np.take_along_axis(rows, inner[:, None], axis=1)[:, 0]
+        fraction = (values - low_value) / (high_value - low_value)
+        result = np.round(levels[inner - 1] + fraction * (levels[inner] - levels[inner - 1]))
+        result = np.where(upper == 0, levels[0], np.where(upper == len(levels), levels[-1], result))
+        return result.astype(int)
+
+    # ================= INTERNALS ================= #
+
+    @classmethod
+    def _compile(cls, source: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        with open(source) as f:
+            data = json.load(f)
+
+        bands = [band['label'] for band in data['bands']]
+        table = np.array([
+            [data['quantiles'][metric][band] for band in bands]
+            for metric in data['metrics']
+        ], dtype=float)
+        if table.shape[-1] != len(data['levels']) or (np.diff(table, axis=-1) <= 0).any():
+            raise ValueError("Quantiles must list one strictly increasing value per level")
+
+        metadata = {
+            'source_hash': cls._source_hash(source),
+            'metrics': data['metrics'],
+            'bands': data['bands'],
+            'levels': data['levels']
+        }
+        return table, metadata
+
+    @staticmethod
+    def _metadata_path(path: str) -> str:
+        return f"{path}.json"
+
+    @staticmethod
+    def _source_hash(source: str) -> str:
+        with open(source, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+
+_percentile_table = None
+_percentile_table_lock = threading.Lock()
+
+
+def get_percentile_table() -> PercentileTable:
+    """Process-wide table mapped from app/data/benchmark_quantiles.npy"""
+    global _percentile_table
+    with _percentile_table_lock:
+        if _percentile_table is None:
+            _percentile_table = PercentileTable.load()
+        return _percentile_table
@@ -4,9 +4,17 @@ Calculates year-by-year net worth, cash flow, and milestones
 Follows US financial planning standards and real cash flow behavior
 """
 
-from typing import Dict, List, Any
+import math
+from typing import Dict, List, Any, Iterator, Optional
 from datetime import datetime
 
+import numpy as np
+
+from app.services import finmath
+from app.services.executor import ComputeExecutor, attach_shared_array
+from app.services.financial_calculator import FinancialCalculator
+from app.services.projection_kernel import iter_projection_kernel, monthly_plan_balances, run_projection_kernel
+
 
 class ProjectionEngine:
     """
@@ -15,7 +23,10 @@ class ProjectionEngine:
     Following realistic US financial planning principles
     """
     
-    def __init__(self):
+    # Output version, part of ResultCache keys (bump when outputs change)
+    VERSION = "2"
+    
+    def __init__(self, incremental_plan_values: bool = True):
         # US Market Historical Averages
         self.INFLATION_RATE = 0.03  # 3% historical average
         self.SAVINGS_ACCOUNT_RATE = 0.005  # 0.5% HYSA (realistic post-2023)
@@ -33,14 +44,117 @@ class ProjectionEngine:
             "worst": 0.03       # Bear market/recession
         }
         
+        # Plan-specific return rates (US market historical averages)
+        self.PLAN_RETURNS = {
+            "predicted": {
+                "Max-Funded IUL": 0.065,
+                "Whole Life (IBC)": 0.045,
+                "Roth IRA": 0.08,
+                "Traditional 401k": 0.08,
+                "Roth 401k": 0.08,
+                "Solo 401k": 0.08,
+                "HSA": 0.06,
+                "529 Plan": 0.07,
+                "Real Estate": 0.09,
+                "Private Equity": 0.12,
+                "CDs / Savings": 0.025,
+                "Non-Qual Annuity": 0.04
+            },
+            "best": {
+                "Max-Funded IUL": 0.085,
+                "Whole Life (IBC)": 0.055,
+                "Roth IRA": 0.12,
+                "Traditional 401k": 0.12,
+                "Roth 401k": 0.12,
+                "Solo 401k": 0.12,
+                "HSA": 0.09,
+                "529 Plan": 0.10,
+                "Real Estate": 0.15,
+                "Private Equity": 0.18,
+                "CDs / Savings": 0.04,
+                "Non-Qual Annuity": 0.06
+            },
+            "worst": {
+                "Max-Funded IUL": 0.03,
+                "Whole Life (IBC)": 0.025,
+                "Roth IRA": 0.02,
+                "Traditional 401k": 0.02,
+                "Roth 401k": 0.02,
+                "Solo 401k": 0.02,
+                "HSA": 0.02,
+                "529 Plan": 0.03,
+                "Real Estate": 0.04,
+                "Private Equity": 0.05,
+                "CDs / Savings": 0.015,
+                "Non-Qual Annuity": 0.02
+            }
+        }
+        
+        # Monte Carlo assumptions: annual volatility of taxable investments
+        # (plans use the per-vehicle volatility from FinancialCalculator)
+        self.MARKET_VOLATILITY = 0.15  # S&P 500 long-run annual volatility
+        self.MONTE_CARLO_PERCENTILES = [5, 25, 50, 75, 95]
+        self.MONTE_CARLO_BLOCK_PATHS = 5000  # Paths per independently seeded block
+        
+        # Insurance products pay policy fees out of their credited returns
+        self.INSURANCE_PLAN_TYPES = ["Max-Funded IUL", "Whole Life (IBC)", "Non-Qual Annuity"]
+        self.INSURANCE_POLICY_FEES = 0.015  # 1.5% average policy fees
+        
+        # Plans eligible for employer match
+        self.EMPLOYER_MATCH_PLAN_TYPES = ['Traditional 401k', 'Roth 401k', 'Solo 401k']
+        
+        # Year-by-year output fields (row format order)
+        self.ROW_FIELDS = [
+            'year', 'age', 'annual_income', 'annual_expenses', 'annual_surplus',
+            'debt_payment', 'savings', 'investments', 'plan_contributions',
+            'employer_match', 'plan_cash_values', 'plan_details', 'total_assets',
+            'total_liabilities', 'net_worth', 'debt_remaining', 'emergency_fund_status'
+        ]
+        self.ROUNDED_FIELDS = [
+            'annual_income', 'annual_expenses', 'annual_surplus', 'debt_payment',
+            'savings', 'investments', 'plan_contributions', 'employer_match',
+            'plan_cash_values', 'total_assets', 'total_liabilities', 'net_worth',
+            'debt_remaining'
+        ]
+        
+        # Per-month detail fields for monthly resolution (output name -> annual row field)
+        self.MONTHLY_FIELDS = {
+            'income': 'annual_income',
+            'expenses': 'annual_expenses',
+            'surplus': 'annual_surplus',
+            'debt_payment': 'debt_payment',
+            'savings': 'savings',
+            'investments': 'investments',
+            'plan_contributions': 'plan_contributions',
+            'employer_match': 'employer_match',
+            'plan_cash_values': 'plan_cash_values',
+            'net_worth': 'net_worth',
+            'debt_remaining': 'debt_remaining'
+        }
+        
+        # Response layouts: one dict per year, or one list per field
+        self.OUTPUT_FORMATS = ['rows', 'columnar']
+        
+        # Fewest scenarios worth a vectorized kernel pass; below this the
+        # per-scenario scalar loop is faster (e.g. the default three)
+        self.KERNEL_MIN_CASES = 6
+        
+        # Carry plan balances forward year by year instead of replaying
+        # every plan from its starting cash value for each projected year
+        self.incremental_plan_values = incremental_plan_values
+        
     def generate_full_projection(
         self,
         user_data: Dict[str, Any],
-        scenario: str = "predicted"
+        scenario: str = "predicted",
+        output_format: str = "rows"
     ) -> Dict[str, Any]:
         """
         Generate complete financial projection from current age to retirement
         
+        output_format "columnar" returns one list per field instead of one
+        dict per year (built by the vectorized kernel, see generate_scenarios)
+        
         Following US financial planning waterfall:
         1. Pay mandatory expenses
         2. Pay minimum debt payments
@@ -50,6 +164,8 @@ class ProjectionEngine:
         6. Max out tax-advantaged accounts
         7. Invest surplus in taxable accounts
         """
+        if output_format == "columnar":
+            return self.generate_scenarios(user_data, [scenario], output_format)[scenario]
         
         current_age = user_data['age']
         retirement_age = user_data.get('retirement_age', 65)
@@ -76,6 +192,11 @@ class ProjectionEngine:
         # Emergency fund target (6 months expenses - US standard)
         emergency_fund_target = annual_expenses / 2
         
+        # Per-plan balances carried forward from year to year
+        plan_states = None
+        if self.incremental_plan_values:
+            plan_states = self._init_plan_states(user_data.get('plans', []), scenario)
+        
         # Year-by-year projection
         for year in range(years_to_retirement + 1):
             current_year = datetime.now().year + year
@@ -147,12 +268,17 @@ class ProjectionEngine:
                 annual_surplus = 0
             
             # --- FINANCIAL PLANS (401k, IRA, IUL) - Grow separately ---
-            plan_values = self._calculate_plan_values(
-                user_data.get('plans', []),
-                age,
-                year,
-                scenario
-            )
+            if plan_states is not None:
+                if year > 0:
+                    self._advance_plan_states(plan_states, year - 1)
+                plan_values = self._summarize_plan_states(plan_states)
+            else:
+                plan_values = self._calculate_plan_values(
+                    user_data.get('plans', []),
+                    age,
+                    year,
+                    scenario
+                )
             
             # --- NET WORTH CALCULATION (US Standard) ---
             # Assets = Liquid + Investments + Retirement Accounts
@@ -178,7 +304,7 @@ class ProjectionEngine:
                 'total_liabilities': round(total_liabilities, 2),
                 'net_worth': round(net_worth, 2),
                 'debt_remaining': round(debt, 2),
-                'emergency_fund_status': 'Fully Funded' if savings >= emergency_fund_target else f'{(savings/emergency_fund_target)*100:.0f}% Funded'
+                'emergency_fund_status': self._emergency_fund_status(savings, emergency_fund_target)
             })
             
             # Apply growth rates for next year
@@ -196,6 +322,620 @@ class ProjectionEngine:
             'summary': summary
         }
     
+    def generate_scenarios(
+        self,
+        user_data: Dict[str, Any],
+        scenarios: List[Any] = ("predicted", "best", "worst"),
+        output_format: str = "rows"
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate projections for several scenarios in one vectorized pass
+        
+        Scenarios are names from INVESTMENT_RETURNS or custom scenario
+        dicts (see resolve_scenario). Output per scenario matches
+        generate_full_projection. Fewer than KERNEL_MIN_CASES named
+        scenarios in rows format run through the scalar engine instead.
+        
+        With output_format "columnar", 'projections' holds one list per
+        field (year, age, net_worth, ...), 'plan_types' and a
+        'plan_values' matrix indexed [plan][year], skipping per-year dicts.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Invalid format. Must be one of: {', '.join(self.OUTPUT_FORMATS)}")
+        
+        scenario_params = [self.resolve_scenario(s) for s in scenarios]
+        if output_format == "rows" and len(scenarios) < self.KERNEL_MIN_CASES and all(
+            isinstance(s, str) and s in self.INVESTMENT_RETURNS for s in scenarios
+        ):
+            return {s: self.generate_full_projection(user_data, s) for s in scenarios}
+        
+        years = max(user_data.get('retirement_age', 65) - user_data['age'], -1)
+        
+        inputs = self._build_kernel_inputs(user_data, scenario_params)
+        results = run_projection_kernel(inputs, years)
+        
+        output = {}
+        for case, params in enumerate(scenario_params):
+            columns = self._kernel_columns(results, case, user_data)
+            output[params['name']] = {
+                'scenario': params['name'],
+                'projections': columns if output_format == "columnar" else self._columns_to_rows(columns),
+                'summary': self._calculate_summary_from_columns(columns, user_data)
+            }
+        return output
+    
+    def iter_scenario_records(
+        self,
+        user_data: Dict[str, Any],
+        scenarios: List[Any] = ("predicted", "best", "worst")
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream projections for several scenarios one year at a time
+        
+        Yields {'type': 'year', 'scenario': name, ...row} for every scenario
+        each projected year, then one {'type': 'summary', 'scenario': name,
+        'summary': {...}} per scenario. Rows and summaries match
+        generate_scenarios. Only the current year's rows are built at a
+        time; the kernel's numeric series (a few floats per scenario and
+        year) are still computed for the whole horizon up front.
+        """
+        scenario_params = [self.resolve_scenario(s) for s in scenarios]
+        names = [params['name'] for params in scenario_params]
+        years = max(user_data.get('retirement_age', 65) - user_data['age'], -1)
+        plan_types = [plan['plan_type'] for plan in user_data.get('plans', [])]
+        start_year = datetime.now().year
+        
+        inputs = self._build_kernel_inputs(user_data, scenario_params)
+        
+        # Running summary inputs per scenario
+        totals = [
+            {'first_year': None, 'last_year': None, 'debt_free_year': None, 'debt_free_age': None,
+             'plan_contributions': 0, 'employer_match': 0, 'debt_payment': 0}
+            for _ in names
+        ]
+        
+        for year, state in enumerate(iter_projection_kernel(inputs, years)):
+            rounded = {field: np.round(state[field], 2).tolist() for field in self.ROUNDED_FIELDS}
+            plan_values = np.round(state['plan_values'], 2).tolist()
+            savings = state['savings'].tolist()
+            targets = state['emergency_fund_target'].tolist()
+            
+            for case, name in enumerate(names):
+                values = {field: rounded[field][case] for field in self.ROUNDED_FIELDS}
+                values.update({
+                    'year': start_year + year,
+                    'age': user_data['age'] + year,
+                    'plan_details': dict(zip(plan_types, plan_values[case])),
+                    'emergency_fund_status': self._emergency_fund_status(savings[case], targets[case])
+                })
+                row = {field: values[field] for field in self.ROW_FIELDS}
+                
+                total = totals[case]
+                if total['first_year'] is None:
+                    total['first_year'] = row
+                total['last_year'] = row
+                if total['debt_free_year'] is None and row['debt_remaining'] == 0:
+                    total['debt_free_year'] = row['year']
+                    total['debt_free_age'] = row['age']
+                for field in ('plan_contributions', 'employer_match', 'debt_payment'):
+                    total[field] += row[field]
+                
+                yield {'type': 'year', 'scenario': name, **row}
+        
+        for name, total in zip(names, totals):
+            summary = {}
+            if total['first_year'] is not None:
+                summary = self._build_summary(
+                    total['first_year'],
+                    total['last_year'],
+                    total['debt_free_year'],
+                    total['debt_free_age'],
+                    total['plan_contributions'],
+                    total['employer_match'],
+                    total['debt_payment'],
+                    user_data
+                )
+            yield {'type': 'summary', 'scenario': name, 'summary': summary}
+    
+    def generate_monthly_projection(
+        self,
+        user_data: Dict[str, Any],
+        scenario: Any = "predicted",
+        output_format: str = "rows",
+        include_months: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Generate a projection simulated month by month
+        
+        Contributions, debt interest and payments, emergency fund build-up
+        and investment growth are applied every month (annual rates are
+        converted to their monthly equivalents; debt interest accrues at
+        APR / 12). Pay raises and expense inflation still step once a year.
+        
+        Returns annual rollups in the generate_full_projection layout:
+        flows are summed over the year and balances are year-end values.
+        include_months adds 'monthly_projections' with per-month detail.
+        
+        Plan balances are closed-form (see monthly_plan_balances) and only
+        the path-dependent cash-flow waterfall is stepped month by month.
+        Plans follow the annual engine's funding rules: balances receive
+        contributions for the first years_to_contribute projection years,
+        while the paycheck deduction runs for the plan's contribution window
+        counted from its start age.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Invalid format. Must be one of: {', '.join(self.OUTPUT_FORMATS)}")
+        
+        params = self.resolve_scenario(scenario)
+        plans = user_data.get('plans', [])
+        current_age = user_data['age']
+        year_count = max(user_data.get('retirement_age', 65) - current_age + 1, 0)
+        months = year_count * 12
+        
+        # --- PLANS (closed form) ---
+        # Paycheck contributions run for years_to_contribute years from the
+        # plan's start age (the user's current age when unknown); balances
+        # are funded for the first years_to_contribute projection years
+        annual_contributions = np.array([plan.get('monthly_contribution', 0) * 12 for plan in plans], dtype=float)
+        annual_matches = np.array([
+            self._calculate_employer_match(plan, contribution)
+            for plan, contribution in zip(plans, annual_contributions.tolist())
+        ], dtype=float)
+        start_ages = np.array([
+            plan['user_current_age'] if plan.get('user_current_age') is not None else current_age
+            for plan in plans
+        ], dtype=float)
+        years_to_contribute = np.array([plan.get('years_to_contribute', 0) for plan in plans], dtype=float)
+        contributing_years = np.clip(years_to_contribute - (current_age - start_ages), 0, year_count)
+        contributing_months = (np.ceil(contributing_years) * 12).astype(int)
+        funded_months = (np.ceil(np.clip(years_to_contribute, 0, year_count)) * 12).astype(int)
+        
+        monthly_growth = np.array([
+            self._plan_growth_factor(plan['plan_type'], params['plan_returns']) for plan in plans
+        ], dtype=float) ** (1 / 12)
+        plan_balances = monthly_plan_balances(
+            np.array([plan.get('cash_value', 0) for plan in plans], dtype=float),
+            (annual_contributions + annual_matches) / 12,
+            monthly_growth,
+            funded_months,
+            months
+        ).reshape(len(plans), months)
+        
+        month_index = np.arange(months)
+        contributing = month_index[None, :] < contributing_months[:, None]
+        plan_contributions = (annual_contributions[:, None] / 12 * contributing).sum(axis=0)
+        employer_match = (annual_matches[:, None] / 12 * contributing).sum(axis=0)
+        plan_cash_values = plan_balances.sum(axis=0)
+        
+        # --- INCOME & EXPENSES (annual raises / inflation) ---
+        year_of_month = month_index // 12
+        monthly_income = (user_data['monthly_income'] + user_data.get('side_income', 0)) * \
+            (1 + params['income_growth']) ** year_of_month
+        monthly_expenses = user_data['monthly_expenses'] * (1 + params['expense_growth']) ** year_of_month
+        
+        # --- CASH-FLOW WATERFALL (month by month) ---
+        savings = user_data['savings']
+        investments = user_data['investments']
+        debt = user_data['debt']
+        debt_growth = 1 + user_data.get('debt_interest_rate', self.DEFAULT_DEBT_INTEREST) / 12
+        investment_growth = (1 + params['investment_return']) ** (1 / 12)
+        savings_growth = (1 + self.SAVINGS_ACCOUNT_RATE) ** (1 / 12)
+        
+        track = {field: [] for field in ('annual_surplus', 'debt_payment', 'savings', 'investments', 'debt')}
+        for income, expenses, contribution in zip(
+            monthly_income.tolist(), monthly_expenses.tolist(), plan_contributions.tolist()
+        ):
+            emergency_fund_target = expenses * 6
+            surplus = income - expenses - contribution
+            
+            debt_payment = 0
+            if debt > 0:
+                debt *= debt_growth
+                if savings > emergency_fund_target:
+                    debt_payment = min(debt, surplus + (savings - emergency_fund_target))
+                else:
+                    debt_payment = min(debt, max(0, surplus))
+                debt -= debt_payment
+                surplus -= debt_payment
+                if debt < 0:
+                    surplus += abs(debt)
+                    debt = 0
+            
+            if savings < emergency_fund_target and surplus > 0:
+                fund_contribution = min(surplus, emergency_fund_target - savings)
+                savings += fund_contribution
+                surplus -= fund_contribution
+            else:
+                savings *= savings_growth
+            
+            if investments > 0:
+                investments *= investment_growth
+            if surplus > 0 and debt == 0 and savings >= emergency_fund_target:
+                investments += surplus
+                surplus = 0
+            elif surplus > 0:
+                savings += surplus
+                surplus = 0
+            
+            track['annual_surplus'].append(surplus)
+            track['debt_payment'].append(debt_payment)
+            track['savings'].append(savings)
+            track['investments'].append(investments)
+            track['debt'].append(debt)
+        
+        monthly = {field: np.array(values, dtype=float) for field, values in track.items()}
+        monthly.update({
+            'annual_income': monthly_income,
+            'annual_expenses': monthly_expenses,
+            'plan_contributions': plan_contributions,
+            'employer_match': employer_match,
+            'plan_cash_values': plan_cash_values,
+        })
+        monthly['total_assets'] = monthly['savings'] + monthly['investments'] + plan_cash_values
+        monthly['total_liabilities'] = monthly['debt']
+        monthly['net_worth'] = monthly['total_assets'] - monthly['debt']
+        monthly['debt_remaining'] = monthly['debt']
+        monthly['emergency_fund_target'] = monthly_expenses * 6
+        
+        # --- ANNUAL ROLLUPS ---
+        flow_fields = ('annual_income', 'annual_expenses', 'annual_surplus', 'debt_payment',
+                       'plan_contributions', 'employer_match')
+        year_end = np.arange(11, months, 12)
+        results = {
+            field: (values.reshape(year_count, 12).sum(axis=1) if field in flow_fields else values[year_end])[None, :]
+            for field, values in monthly.items()
+        }
+        results['plan_values'] = plan_balances[None, :, year_end]
+        
+        columns = self._kernel_columns(results, 0, user_data)
+        projection = {
+            'scenario': params['name'],
+            'resolution': 'monthly',
+            'projections': columns if output_format == "columnar" else self._columns_to_rows(columns),
+            'summary': self._calculate_summary_from_columns(columns, user_data)
+        }
+        
+        if include_months:
+            start_year = datetime.now().year
+            month_columns = {
+                'year': (start_year + year_of_month).tolist(),
+                'month': (month_index % 12 + 1).tolist(),
+                'age': (current_age + year_of_month).tolist()
+            }
+            for name, field in self.MONTHLY_FIELDS.items():
+                month_columns[name] = np.round(monthly[field], 2).tolist()
+            if output_format == "columnar":
+                projection['monthly_projections'] = month_columns
+            else:
+                fields = list(month_columns)
+                projection['monthly_projections'] = [
+                    dict(zip(fields, values)) for values in zip(*month_columns.values())
+                ]
+        
+        return projection
+    
+    def generate_grid(
+        self,
+        user_data: Dict[str, Any],
+        retirement_ages: List[int],
+        contribution_multipliers: List[float] = (1.0,),
+        expense_multipliers: List[float] = (1.0,),
+        scenarios: List[Any] = ("predicted",),
+        include_paths: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Net worth at retirement for every cell of a what-if grid
+        
+        Axes, in output order: scenario x contribution multiplier (scales
+        every plan's monthly contribution) x expense multiplier x
+        retirement age. Retirement age only ends the horizon, so each
+        (scenario, contribution, expense) combination is one kernel case
+        run to the oldest age and every age is read off the same path;
+        the whole grid is a single vectorized kernel call.
+        
+        include_paths adds the yearly net worth path of each case.
+        """
+        retirement_ages = list(retirement_ages)
+        contribution_multipliers = [float(m) for m in contribution_multipliers]
+        expense_multipliers = [float(m) for m in expense_multipliers]
+        scenario_params = [self.resolve_scenario(s) for s in scenarios]
+        
+        axes = (scenario_params, contribution_multipliers, expense_multipliers, retirement_ages)
+        if not all(axes):
+            raise ValueError("Every grid axis needs at least one value")
+        if min(retirement_ages) < user_data['age']:
+            raise ValueError("Retirement ages cannot be below the current age")
+        
+        plans = user_data.get('plans', [])
+        years = max(retirement_ages) - user_data['age']
+        shape = (len(scenario_params), len(contribution_multipliers), len(expense_multipliers))
+        
+        # One case per (scenario, contribution, expense) combination, scenario-major
+        case_params = [params for params in scenario_params for _ in range(shape[1] * shape[2])]
+        case_contribution = np.tile(np.repeat(contribution_multipliers, shape[2]), shape[0])
+        case_expense = np.tile(expense_multipliers, shape[0] * shape[1])
+        
+        inputs = self._build_kernel_inputs(user_data, case_params)
+        inputs['annual_expenses'] = inputs['annual_expenses'] * case_expense
+        inputs['plan_annual_contribution'] = inputs['plan_annual_contribution'] * case_contribution[:, None]
+        inputs['plan_employer_match'] = np.array([
+            [self._calculate_employer_match(plan, annual) for plan, annual in zip(plans, row)]
+            for row in inputs['plan_annual_contribution'].tolist()
+        ], dtype=float).reshape(len(case_params), len(plans))
+        
+        net_worth = run_projection_kernel(inputs, years, fields=('net_worth',))['net_worth']
+        age_index = np.array(retirement_ages) - user_data['age']
+        
+        grid = {
+            'axes': {
+                'scenario': [params['name'] for params in scenario_params],
+                'contribution_multiplier': contribution_multipliers,
+                'expense_multiplier': expense_multipliers,
+                'retirement_age': retirement_ages
+            },
+            'shape': list(shape) + [len(retirement_ages)],
+            'net_worth': np.round(net_worth[:, age_index], 2).reshape(*shape, len(retirement_ages)).tolist()
+        }
+        if include_paths:
+            grid['paths'] = {
+                'age': [user_data['age'] + year for year in range(years + 1)],
+                'net_worth': np.round(net_worth, 2).reshape(*shape, years + 1).tolist()
+            }
+        return grid
+    
+    def generate_monte_carlo(
+        self,
+        user_data: Dict[str, Any],
+        scenario: str = "predicted",
+        paths: int = 10000,
+        seed: Optional[int] = None,
+        target_net_worth: Optional[float] = None,
+        executor: Optional[ComputeExecutor] = None
+    ) -> Dict[str, Any]:
+        """
+        Simulate stochastic market paths around a scenario's average returns
+        
+        Every path draws one market shock per year; taxable investments and
+        each plan move with that shock scaled by their own volatility
+        (MARKET_VOLATILITY and FinancialCalculator.VEHICLE_ASSUMPTIONS).
+        All paths run through the projection kernel as one (paths x years)
+        array computation. The same seed always reproduces the same bands.
+        
+        With an executor, large runs are split into path blocks that worker
+        processes write straight into a shared (paths x years) array.
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+        
+        params = self.resolve_scenario(scenario)
+        years = max(user_data.get('retirement_age', 65) - user_data['age'], -1)
+        plans = user_data.get('plans', [])
+        
+        inputs = self._build_kernel_inputs(user_data, [params])
+        inputs['investment_volatility'] = self.MARKET_VOLATILITY
+        inputs['plan_volatility'] = np.array([
+            FinancialCalculator.VEHICLE_ASSUMPTIONS.get(plan['plan_type'], {}).get('volatility', self.MARKET_VOLATILITY)
+            for plan in plans
+        ], dtype=float)
+        
+        # Paths are simulated in fixed-size blocks, each with its own child
+        # seed, so results do not depend on how blocks are spread over workers
+        block_starts = list(range(0, paths, self.MONTE_CARLO_BLOCK_PATHS))
+        block_seeds = np.random.SeedSequence(seed).spawn(len(block_starts))
+        blocks = [
+            (start, min(start + self.MONTE_CARLO_BLOCK_PATHS, paths), block_seed)
+            for start, block_seed in zip(block_starts, block_seeds)
+        ]
+        
+        def summarize(net_worth):
+            return self._summarize_monte_carlo(net_worth, user_data, params['name'], paths, seed, target_net_worth)
+        
+        if executor is not None and executor.should_offload(paths):
+            return executor.run_shared(
+                _monte_carlo_block_worker,
+                (paths, max(years + 1, 0)),
+                [(inputs, years, start, stop, block_seed) for start, stop, block_seed in blocks],
+                reduce=summarize
+            )
+        
+        net_worth = np.concatenate([
+            _simulate_monte_carlo_block(inputs, years, stop - start, block_seed)
+            for start, stop, block_seed in blocks
+        ])
+        return summarize(net_worth)
+    
+    def generate_cohort_summaries(
+        self,
+        user_data_list: List[Dict[str, Any]],
+        scenario: str = "predicted",
+        executor: Optional[ComputeExecutor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Projection summaries for many users (cohort recomputations)
+        Large cohorts are sharded across the executor's worker processes
+        """
+        jobs = [(user_data, scenario) for user_data in user_data_list]
+        if executor is not None:
+            return executor.map(_projection_summaries, jobs)
+        return _projection_summaries(jobs)
+    
+    def _summarize_monte_carlo(
+        self,
+        net_worth: np.ndarray,
+        user_data: Dict[str, Any],
+        scenario: str,
+        paths: int,
+        seed: int,
+        target_net_worth: Optional[float]
+    ) -> Dict[str, Any]:
+        """Percentile bands and target probability from simulated (paths x years) net worth"""
+        year_count = net_worth.shape[1]
+        start_year = datetime.now().year
+        
+        bands = {}
+        if year_count:
+            values = np.percentile(net_worth, self.MONTE_CARLO_PERCENTILES, axis=0)
+            for percentile, band in zip(self.MONTE_CARLO_PERCENTILES, values):
+                bands[f'p{percentile}'] = np.round(band, 2).tolist()
+        
+        summary = {
+            'ending_net_worth': {name: band[-1] for name, band in bands.items()},
+            'target_net_worth': target_net_worth,
+            'probability_of_target': None
+        }
+        if target_net_worth is not None and year_count:
+            summary['probability_of_target'] = round(float(np.mean(net_worth[:, -1] >= target_net_worth)), 4)
+        
+        return {
+            'scenario': scenario,
+            'mode': 'monte_carlo',
+            'paths': paths,
+            'seed': seed,
+            'years': [start_year + year for year in range(year_count)],
+            'ages': [user_data['age'] + year for year in range(year_count)],
+            'net_worth_percentiles': bands,
+            'summary': summary
+        }
+    
+    def resolve_scenario(self, scenario: Any) -> Dict[str, Any]:
+        """
+        Resolve a scenario to its growth and return assumptions
+        
+        Accepts a scenario name ("predicted", "best", "worst") or a custom
+        scenario dict with a "name" and any of "income_growth",
+        "expense_growth", "investment_return" and "plan_returns".
+        Missing custom values fall back to the predicted scenario.
+        """
+        if isinstance(scenario, str):
+            if scenario not in self.INVESTMENT_RETURNS:
+                raise ValueError(f"Unknown scenario: {scenario}")
+            return {
+                'name': scenario,
+                'income_growth': self._get_income_growth_rate(scenario),
+                'expense_growth': self._get_expense_growth_rate(scenario),
+                'investment_return': self.INVESTMENT_RETURNS[scenario],
+                'plan_returns': self.PLAN_RETURNS[scenario]
+            }
+        
+        if not isinstance(scenario, dict) or not scenario.get('name'):
+            raise ValueError("Custom scenarios must be objects with a name")
+        
+        params = self.resolve_scenario("predicted")
+        params['name'] = str(scenario['name'])
+        for key in ('income_growth', 'expense_growth', 'investment_return'):
+            if key in scenario:
+                if not isinstance(scenario[key], (int, float)) or isinstance(scenario[key], bool):
+                    raise ValueError(f"Custom scenario '{params['name']}': {key} must be a number")
+                params[key] = float(scenario[key])
+        if 'plan_returns' in scenario:
+            plan_returns = scenario['plan_returns']
+            if not isinstance(plan_returns, dict) or not all(
+                isinstance(rate, (int, float)) and not isinstance(rate, bool) for rate in plan_returns.values()
+            ):
+                raise ValueError(f"Custom scenario '{params['name']}': plan_returns must map plan types to numbers")
+            params['plan_returns'] = {**params['plan_returns'], **plan_returns}
+        return params
+    
+    def _build_kernel_inputs(
+        self,
+        user_data: Dict[str, Any],
+        scenario_params: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Lay out user data and scenario assumptions as kernel arrays (one case per scenario)"""
+        plans = user_data.get('plans', [])
+        case_count = len(scenario_params)
+        
+        annual_contributions = [plan.get('monthly_contribution', 0) * 12 for plan in plans]
+        employer_matches = [
+            self._calculate_employer_match(plan, contribution)
+            for plan, contribution in zip(plans, annual_contributions)
+        ]
+        plan_shape = (case_count, len(plans))
+        
+        def per_case(value):
+            return np.full(case_count, value, dtype=float)
+        
+        return {
+            'start_age': user_data['age'],
+            'savings': per_case(user_data['savings']),
+            'investments': per_case(user_data['investments']),
+            'debt': per_case(user_data['debt']),
+            'debt_interest_rate': per_case(user_data.get('debt_interest_rate', self.DEFAULT_DEBT_INTEREST)),
+            'annual_income': per_case((user_data['monthly_income'] + user_data.get('side_income', 0)) * 12),
+            'annual_expenses': per_case(user_data['monthly_expenses'] * 12),
+            'income_growth': np.array([p['income_growth'] for p in scenario_params], dtype=float),
+            'expense_growth': np.array([p['expense_growth'] for p in scenario_params], dtype=float),
+            'investment_return': np.array([p['investment_return'] for p in scenario_params], dtype=float),
+            'savings_rate': self.SAVINGS_ACCOUNT_RATE,
+            'plan_cash_value': np.broadcast_to(
+                np.array([plan.get('cash_value', 0) for plan in plans], dtype=float), plan_shape
+            ),
+            'plan_annual_contribution': np.broadcast_to(np.array(annual_contributions, dtype=float), plan_shape),
+            'plan_employer_match': np.broadcast_to(np.array(employer_matches, dtype=float), plan_shape),
+            'plan_growth_factor': np.array([
+                [self._plan_growth_factor(plan['plan_type'], p['plan_returns']) for plan in plans]
+                for p in scenario_params
+            ], dtype=float).reshape(plan_shape),
+            'plan_years_to_contribute': np.array(
+                [plan.get('years_to_contribute', 0) for plan in plans], dtype=float
+            ),
+            'plan_start_age': np.array(
+                [plan['user_current_age'] if plan.get('user_current_age') is not None else np.nan for plan in plans],
+                dtype=float
+            )
+        }
+    
+    def _kernel_columns(
+        self,
+        results: Dict[str, np.ndarray],
+        case: int,
+        user_data: Dict[str, Any]
+    ) -> Dict[str, List]:
+        """
+        Round one case of kernel output into per-field lists (one entry per year)
+        This is the columnar response format
+        """
+        year_count = results['net_worth'].shape[1]
+        start_year = datetime.now().year
+        plan_types = [plan['plan_type'] for plan in user_data.get('plans', [])]
+        
+        columns = {
+            'year': [start_year + year for year in range(year_count)],
+            'age': [user_data['age'] + year for year in range(year_count)]
+        }
+        for field in self.ROUNDED_FIELDS:
+            columns[field] = np.round(results[field][case], 2).tolist()
+        
+        # Plan-by-year matrix: plan_values[plan][year]
+        columns['plan_types'] = plan_types
+        columns['plan_values'] = np.round(results['plan_values'][case], 2).tolist()
+        
+        columns['emergency_fund_status'] = [
+            self._emergency_fund_status(savings, target)
+            for savings, target in zip(
+                results['savings'][case].tolist(),
+                results['emergency_fund_target'][case].tolist()
+            )
+        ]
+        return columns
+    
+    def _columns_to_rows(self, columns: Dict[str, List]) -> List[Dict[str, Any]]:
+        """Convert columnar projections to the year-by-year row format"""
+        plan_details = [
+            dict(zip(columns['plan_types'], values))
+            for values in zip(*columns['plan_values'])
+        ] if columns['plan_types'] else [{} for _ in columns['year']]
+        columns = {**columns, 'plan_details': plan_details}
+        
+        fields = [field for field in self.ROW_FIELDS if field in columns]
+        return [dict(zip(fields, values)) for values in zip(*(columns[f] for f in fields))]
+    
+    def _emergency_fund_status(self, savings: float, emergency_fund_target: float) -> str:
+        """Emergency fund label for a projection year"""
+        if savings >= emergency_fund_target:
+            return 'Fully Funded'
+        return f'{(savings/emergency_fund_target)*100:.0f}% Funded'
+    
     def _get_income_growth_rate(self, scenario: str) -> float:
         """Get income growth rate based on scenario"""
         if scenario == "best":
@@ -241,17 +981,7 @@ class ProjectionEngine:
             total_employee += annual_contribution
             
             # Employer match (401k plans only)
-            plan_type = plan.get('plan_type', '')
-            if plan.get('employer_match_enabled') and plan_type in ['Traditional 401k', 'Roth 401k', 'Solo 401k']:
-                annual_salary = plan.get('user_annual_salary', 0)
-                match_percentage = plan.get('employer_match_percentage', 0)
-                match_cap = plan.get('employer_match_cap', 0)
-                
-                if annual_salary > 0:
-                    employee_contribution_rate = annual_contribution / annual_salary
-                    matched_rate = min(employee_contribution_rate, match_cap)
-                    employer_match = annual_salary * matched_rate * match_percentage
-                    total_employer_match += employer_match
+            total_employer_match += self._calculate_employer_match(plan, annual_contribution)
             
             details[plan['plan_type']] = {
                 'employee': annual_contribution,
@@ -264,6 +994,71 @@ class ProjectionEngine:
             'details': details
         }
     
+    def _calculate_employer_match(self, plan: Dict, annual_contribution: float) -> float:
+        """Annual employer match for a plan (401k plans only)"""
+        if not plan.get('employer_match_enabled') or plan.get('plan_type', '') not in self.EMPLOYER_MATCH_PLAN_TYPES:
+            return 0
+        
+        annual_salary = plan.get('user_annual_salary', 0)
+        match_percentage = plan.get('employer_match_percentage', 0)
+        match_cap = plan.get('employer_match_cap', 0)
+        
+        if annual_salary <= 0:
+            return 0
+        
+        employee_rate = annual_contribution / annual_salary
+        matched_rate = min(employee_rate, match_cap)
+        return annual_salary * matched_rate * match_percentage
+    
+    def _plan_growth_factor(self, plan_type: str, plan_returns: Dict[str, float]) -> float:
+        """Yearly growth multiplier for a plan (net of insurance policy fees)"""
+        return_rate = plan_returns.get(plan_type, 0.05)
+        if plan_type in self.INSURANCE_PLAN_TYPES:
+            return 1 + return_rate - self.INSURANCE_POLICY_FEES
+        return 1 + return_rate
+    
+    def _init_plan_states(self, plans: List[Dict], scenario: str) -> List[Dict[str, Any]]:
+        """
+        Build the per-plan state carried through the projection
+        Contribution and growth factor are resolved once per plan
+        """
+        states = []
+        for plan in plans:
+            annual_contribution = plan.get('monthly_contribution', 0) * 12
+            employer_match_annual = self._calculate_employer_match(plan, annual_contribution)
+            
+            states.append({
+                'plan_type': plan['plan_type'],
+                'value': plan.get('cash_value', 0),
+                'annual_contribution': annual_contribution + employer_match_annual,
+                'years_to_contribute': plan.get('years_to_contribute', 0),
+                'growth_factor': self._plan_growth_factor(plan['plan_type'], self.PLAN_RETURNS[scenario])
+            })
+        return states
+    
+    def _advance_plan_states(self, states: List[Dict[str, Any]], year: int) -> None:
+        """
+        Apply one year of contributions and growth to every plan
+        Same step as one iteration of the replay in _calculate_plan_values
+        """
+        for state in states:
+            if year < state['years_to_contribute']:
+                state['value'] += state['annual_contribution']
+            state['value'] *= state['growth_factor']
+    
+    def _summarize_plan_states(self, states: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Total and per-plan cash values for the current projection year"""
+        total_cash_value = 0
+        details = {}
+        for state in states:
+            total_cash_value += state['value']
+            details[state['plan_type']] = round(state['value'], 2)
+        
+        return {
+            'total_cash_value': total_cash_value,
+            'details': details
+        }
+    
     def _calculate_plan_values(
         self,
         plans: List[Dict],
@@ -274,54 +1069,10 @@ class ProjectionEngine:
         """
         Calculate cash values of financial plans
         Includes employer match in growth calculations
+        Replays every plan from its starting cash value (replay mode,
+        used when incremental_plan_values is disabled)
         """
         
-        # Plan-specific return rates (US market historical averages)
-        plan_returns = {
-            "predicted": {
-                "Max-Funded IUL": 0.065,
-                "Whole Life (IBC)": 0.045,
-                "Roth IRA": 0.08,
-                "Traditional 401k": 0.08,
-                "Roth 401k": 0.08,
-                "Solo 401k": 0.08,
-                "HSA": 0.06,
-                "529 Plan": 0.07,
-                "Real Estate": 0.09,
-                "Private Equity": 0.12,
-                "CDs / Savings": 0.025,
-                "Non-Qual Annuity": 0.04
-            },
-            "best": {
-                "Max-Funded IUL": 0.085,
-                "Whole Life (IBC)": 0.055,
-                "Roth IRA": 0.12,
-                "Traditional 401k": 0.12,
-                "Roth 401k": 0.12,
-                "Solo 401k": 0.12,
-                "HSA": 0.09,
-                "529 Plan": 0.10,
-                "Real Estate": 0.15,
-                "Private Equity": 0.18,
-                "CDs / Savings": 0.04,
-                "Non-Qual Annuity": 0.06
-            },
-            "worst": {
-                "Max-Funded IUL": 0.03,
-                "Whole Life (IBC)": 0.025,
-                "Roth IRA": 0.02,
-                "Traditional 401k": 0.02,
-                "Roth 401k": 0.02,
-                "Solo 401k": 0.02,
-                "HSA": 0.02,
-                "529 Plan": 0.03,
-                "Real Estate": 0.04,
-                "Private Equity": 0.05,
-                "CDs / Savings": 0.015,
-                "Non-Qual Annuity": 0.02
-            }
-        }
-        
         total_cash_value = 0
         details = {}
         
@@ -332,36 +1083,21 @@ class ProjectionEngine:
             annual_contribution = monthly_contribution * 12
             
             # Calculate employer match
-            employer_match_annual = 0
-            if plan.get('employer_match_enabled') and plan_type in ['Traditional 401k', 'Roth 401k', 'Solo 401k']:
-                annual_salary = plan.get('user_annual_salary', 0)
-                match_percentage = plan.get('employer_match_percentage', 0)
-                match_cap = plan.get('employer_match_cap', 0)
-                
-                if annual_salary > 0:
-                    employee_rate = annual_contribution / annual_salary
-                    matched_rate = min(employee_rate, match_cap)
-                    employer_match_annual = annual_salary * matched_rate * match_percentage
+            employer_match_annual = self._calculate_employer_match(plan, annual_contribution)
             
             # Total annual contribution (employee + employer)
             total_annual_contribution = annual_contribution + employer_match_annual
             
-            # Get return rate for this plan and scenario
-            return_rate = plan_returns[scenario].get(plan_type, 0.05)
-            
-            # Calculate growth over years
-            value = current_value
-            for year in range(years_elapsed):
-                # Add contributions if still in contribution period
-                if year < plan.get('years_to_contribute', 0):
-                    value += total_annual_contribution
-                
-                # Apply returns (minus fees for insurance products)
-                if plan_type in ["Max-Funded IUL", "Whole Life (IBC)", "Non-Qual Annuity"]:
-                    fees = 0.015  # 1.5% average policy fees
-                    value *= (1 + return_rate - fees)
-                else:
-                    value *= (1 + return_rate)
+            # Contributions while still in contribution period, then growth
+            # (returns minus fees for insurance products)
+            contributing_years = min(years_elapsed, max(0, math.ceil(plan.get('years_to_contribute', 0))))
+            value = finmath.compound(
+                current_value,
+                self._plan_growth_factor(plan_type, self.PLAN_RETURNS[scenario]),
+                total_annual_contribution,
+                contributing_years,
+                years_elapsed - contributing_years
+            )
             
             total_cash_value += value
             details[plan_type] = round(value, 2)
@@ -399,6 +1135,66 @@ class ProjectionEngine:
         total_employer_match = sum(p.get('employer_match', 0) for p in projections)
         total_debt_paid = sum(p['debt_payment'] for p in projections)
         
+        return self._build_summary(
+            first_year,
+            last_year,
+            debt_free_year,
+            debt_free_age,
+            total_contributed,
+            total_employer_match,
+            total_debt_paid,
+            user_data
+        )
+    
+    def _calculate_summary_from_columns(
+        self,
+        columns: Dict[str, List],
+        user_data: Dict
+    ) -> Dict[str, Any]:
+        """Calculate summary statistics from columnar projections"""
+        
+        if not columns['year']:
+            return {}
+        
+        first_year = {'net_worth': columns['net_worth'][0]}
+        last_year = {
+            field: columns[field][-1]
+            for field in ('net_worth', 'savings', 'investments', 'plan_cash_values')
+        }
+        
+        # Find debt-free date
+        debt_free_year = None
+        debt_free_age = None
+        for index, debt_remaining in enumerate(columns['debt_remaining']):
+            if debt_remaining == 0:
+                debt_free_year = columns['year'][index]
+                debt_free_age = columns['age'][index]
+                break
+        
+        return self._build_summary(
+            first_year,
+            last_year,
+            debt_free_year,
+            debt_free_age,
+            sum(columns['plan_contributions']),
+            sum(columns['employer_match']),
+            sum(columns['debt_payment']),
+            user_data
+        )
+    
+    def _build_summary(
+        self,
+        first_year: Dict,
+        last_year: Dict,
+        debt_free_year: int,
+        debt_free_age: int,
+        total_contributed: float,
+        total_employer_match: float,
+        total_debt_paid: float,
+        user_data: Dict
+    ) -> Dict[str, Any]:
+        """Assemble summary statistics from first/last year values and running totals"""
+        
         # Final values
         final_net_worth = last_year['net_worth']
         final_savings = last_year['savings']
@@ -433,4 +1229,53 @@ class ProjectionEngine:
             'income_replacement_rate': round(
                 (total_retirement_income / (user_data['monthly_income'] * 12)) * 100, 1
             ) if user_data.get('monthly_income') else 0
-        }
\ No newline at end of file
+        }
+
+
+# ================= WORKER FUNCTIONS ================= #
+# Module-level so they can be pickled to ComputeExecutor worker processes
+
+def _simulate_monte_carlo_block(
+    inputs: Dict[str, Any],
+    years: int,
+    block_paths: int,
+    block_seed: np.random.SeedSequence
+) -> np.ndarray:
+    """Net worth for one block of Monte Carlo paths, shaped (block_paths, years + 1)"""
+    block_inputs = dict(inputs)
+    for key in ('savings', 'investments', 'debt', 'debt_interest_rate', 'annual_income',
+                'annual_expenses', 'income_growth', 'expense_growth', 'investment_return'):
+        block_inputs[key] = np.broadcast_to(inputs[key], (block_paths,))
+    plan_shape = (block_paths, np.shape(inputs['plan_cash_value'])[1])
+    for key in ('plan_cash_value', 'plan_annual_contribution', 'plan_employer_match', 'plan_growth_factor'):
+        block_inputs[key] = np.broadcast_to(inputs[key], plan_shape)
+    
+    rng = np.random.default_rng(block_seed)
+    block_inputs['shocks'] = rng.standard_normal((block_paths, max(years + 1, 0)))
+    
+    return run_projection_kernel(block_inputs, years, fields=('net_worth',))['net_worth']
+
+
+def _monte_carlo_block_worker(
+    shm_name: str,
+    shape: tuple,
+    inputs: Dict[str, Any],
+    years: int,
+    start: int,
+    stop: int,
+    block_seed: np.random.SeedSequence
+) -> None:
+    """Simulate one path block and write it into the shared result array"""
+    shm, net_worth = attach_shared_array(shm_name, shape)
+    try:
+        net_worth[start:stop] = _simulate_monte_carlo_block(inputs, years, stop - start, block_seed)
+    finally:
+        del net_worth
+        shm.close()
+
+
+def _projection_summaries(jobs: List[tuple]) -> List[Dict[str, Any]]:
+    """Projection summary for each (user_data, scenario) job"""
+    engine = ProjectionEngine()
+    return [engine.generate_full_projection(user_data, scenario)['summary'] for user_data, scenario in jobs]
+
@@ -0,0 +1,270 @@
+"""
+Vectorized Projection Kernel
+Runs the ProjectionEngine cash-flow waterfall for many cases at once
+Each case (a scenario, a Monte Carlo path, a what-if cell) is one row of
+the batch axis and every waterfall branch is a masked array operation
+"""
+
+from typing import Dict, Any, Iterator, Iterable, Optional
+
+import numpy as np
+
+from app.services.finmath import compound_series
+
+
+# Per-year fields produced by the kernel, all shaped (cases,)
+KERNEL_FIELDS = (
+    'annual_income',
+    'annual_expenses',
+    'annual_surplus',
+    'debt_payment',
+    'savings',
+    'investments',
+    'plan_contributions',
+    'employer_match',
+    'plan_cash_values',
+    'total_assets',
+    'total_liabilities',
+    'net_worth',
+    'debt_remaining',
+    'emergency_fund_target',
+)
+
+
+def _plan_series(inputs: Dict[str, Any], years: int, keep_plan_values: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Precompute the plan side of the projection, which does not depend on the waterfall
+
+    Returns per-year plan contributions and employer match (cases, years + 1),
+    plan values (cases, plans, years + 1, only when keep_plan_values) and
+    their total (cases, years + 1).
+    """
+    cash_value = np.asarray(inputs['plan_cash_value'], dtype=float)
+    contribution = np.asarray(inputs['plan_annual_contribution'], dtype=float)
+    match = np.asarray(inputs['plan_employer_match'], dtype=float)
+    growth = np.asarray(inputs['plan_growth_factor'], dtype=float)
+    years_to_contribute = np.asarray(inputs['plan_years_to_contribute'], dtype=float)
+    start_age = np.asarray(inputs['plan_start_age'], dtype=float)
+    case_count, plan_count = cash_value.shape
+    year_index = np.arange(years + 1)
+
+    # Paycheck contributions stop once the user has aged past the plan's
+    # contribution window (plans without a start age never age out)
+    ages = inputs['start_age'] + year_index
+    years_since_start = np.where(np.isnan(start_age)[:, None], 0, ages[None, :] - start_age[:, None])
+    contributing = years_since_start < years_to_contribute[:, None]
+
+    plan_contributions = np.zeros((case_count, years + 1))
+    employer_match = np.zeros((case_count, years + 1))
+    for p in range(plan_count):
+        plan_contributions = plan_contributions + np.where(contributing[p], contribution[:, p:p + 1], 0)
+        employer_match = employer_match + np.where(contributing[p], match[:, p:p + 1], 0)
+
+    # Plan balances compound from cash value, funded during the first years_to_contribute years
+    total_contribution = contribution + match
+    shocks = inputs.get('shocks')
+    values = np.empty((case_count, plan_count, years + 1)) if keep_plan_values else None
+    plan_cash_values = np.empty((case_count, years + 1))
+    value = cash_value.copy()
+    for year in range(years + 1):
+        if year > 0:
+            funded = (year - 1) < years_to_contribute
+            year_growth = growth
+            if shocks is not None:
+                year_growth = np.maximum(growth + inputs['plan_volatility'] * shocks[:, year, None], 0)
+            value = np.where(funded, value + total_contribution, value) * year_growth
+        if keep_plan_values:
+            values[:, :, year] = value
+
+        total = np.zeros(case_count)
+        for p in range(plan_count):
+            total = total + value[:, p]
+        plan_cash_values[:, year] = total
+
+    return {
+        'plan_contributions': plan_contributions,
+        'employer_match': employer_match,
+        'plan_values': values,
+        'plan_cash_values': plan_cash_values,
+    }
+
+
+def iter_projection_kernel(
+    inputs: Dict[str, Any],
+    years: int,
+    keep_plan_values: bool = True
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield the state of every case for projection years 0..years
+
+    Expected inputs (B cases, P plans):
+        savings, investments, debt, debt_interest_rate      (B,)
+        annual_income, annual_expenses                       (B,)
+        income_growth, expense_growth, investment_return     (B,)
+        savings_rate                                         scalar
+        start_age                                            scalar
+        plan_cash_value, plan_annual_contribution,
+        plan_employer_match, plan_growth_factor              (B, P)
+        plan_years_to_contribute, plan_start_age             (P,)  (start age NaN = unknown)
+
+    Optional stochastic inputs:
+        shocks                                               (B, years + 1) market shocks
+        investment_volatility                                scalar or (B,)
+        plan_volatility                                      (P,)
+    Each year's investment and plan growth factors are shifted by
+    volatility x shock (floored at a total loss).
+
+    Operations mirror ProjectionEngine.generate_full_projection step for
+    step, so each case matches the scalar engine bit for bit. Branches
+    no case takes in a given year are skipped entirely.
+    """
+    if years < 0:
+        return
+
+    savings = np.array(inputs['savings'], dtype=float)
+    investments = np.array(inputs['investments'], dtype=float)
+    debt = np.array(inputs['debt'], dtype=float)
+    debt_growth = 1 + np.asarray(inputs['debt_interest_rate'], dtype=float)
+    investment_growth = 1 + np.asarray(inputs['investment_return'], dtype=float)
+    savings_growth = 1 + inputs['savings_rate']
+
+    income = compound_series(np.asarray(inputs['annual_income'], dtype=float),
+                              np.asarray(inputs['income_growth'], dtype=float), years)
+    expenses = compound_series(np.asarray(inputs['annual_expenses'], dtype=float),
+                                np.asarray(inputs['expense_growth'], dtype=float), years)
+    emergency_fund_targets = expenses / 2
+    plans = _plan_series(inputs, years, keep_plan_values)
+    shocks = inputs.get('shocks')
+
+    zeros = np.zeros_like(savings)
+
+    for year in range(years + 1):
+        emergency_fund_target = emergency_fund_targets[:, year]
+        annual_surplus = income[:, year] - expenses[:, year] - plans['plan_contributions'][:, year]
+
+        # --- DEBT MANAGEMENT ---
+        debt_payment = zeros
+        has_debt = debt > 0
+        if np.count_nonzero(has_debt):
+            debt = np.where(has_debt, debt * debt_growth, debt)
+            available_for_debt = np.where(
+                savings > emergency_fund_target,
+                annual_surplus + (savings - emergency_fund_target),
+                np.maximum(0, annual_surplus)
+            )
+            debt_payment = np.where(has_debt, np.minimum(debt, available_for_debt), zeros)
+            debt = debt - debt_payment
+            annual_surplus = annual_surplus - debt_payment
+            overpaid = has_debt & (debt < 0)
+            if np.count_nonzero(overpaid):
+                annual_surplus = np.where(overpaid, annual_surplus - debt, annual_surplus)
+                debt = np.where(overpaid, zeros, debt)
+
+        # --- SAVINGS & EMERGENCY FUND ---
+        build_fund = (savings < emergency_fund_target) & (annual_surplus > 0)
+        if np.count_nonzero(build_fund):
+            fund_contribution = np.where(
+                build_fund,
+                np.minimum(annual_surplus, emergency_fund_target - savings),
+                zeros
+            )
+            savings = np.where(build_fund, savings + fund_contribution, savings * savings_growth)
+            annual_surplus = annual_surplus - fund_contribution
+        else:
+            savings = savings * savings_growth
+
+        # --- INVESTMENTS ---
+        year_investment_growth = investment_growth
+        if shocks is not None:
+            year_investment_growth = np.maximum(
+                investment_growth + inputs['investment_volatility'] * shocks[:, year], 0
+            )
+        investments = np.where(investments > 0, investments * year_investment_growth, investments)
+        has_surplus = annual_surplus > 0
+        if np.count_nonzero(has_surplus):
+            invest_surplus = has_surplus & (debt == 0) & (savings >= emergency_fund_target)
+            investments = np.where(invest_surplus, investments + annual_surplus, investments)
+            savings = np.where(has_surplus & ~invest_surplus, savings + annual_surplus, savings)
+            annual_surplus = np.where(has_surplus, zeros, annual_surplus)
+
+        plan_cash_values = plans['plan_cash_values'][:, year]
+        total_assets = savings + investments + plan_cash_values
+
+        yield {
+            'annual_income': income[:, year],
+            'annual_expenses': expenses[:, year],
+            'annual_surplus': annual_surplus,
+            'debt_payment': debt_payment,
+            'savings': savings,
+            'investments': investments,
+            'plan_contributions': plans['plan_contributions'][:, year],
+            'employer_match': plans['employer_match'][:, year],
+            'plan_cash_values': plan_cash_values,
+            'plan_values': plans['plan_values'][:, :, year] if keep_plan_values else None,
+            'total_assets': total_assets,
+            'total_liabilities': debt,
+            'net_worth': total_assets - debt,
+            'debt_remaining': debt,
+            'emergency_fund_target': emergency_fund_target,
+        }
+
+
+def run_projection_kernel(
+    inputs: Dict[str, Any],
+    years: int,
+    fields: Optional[Iterable[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Run the kernel over the whole horizon
+
+    Returns each requested field as a (cases, years + 1) array and
+    'plan_values' as (cases, plans, years + 1) when requested.
+    """
+    fields = tuple(fields) if fields is not None else KERNEL_FIELDS + ('plan_values',)
+    case_count = len(np.atleast_1d(inputs['savings']))
+    plan_count = np.shape(inputs['plan_cash_value'])[1]
+    year_count = max(years + 1, 0)
+
+    results = {}
+    for field in fields:
+        if field == 'plan_values':
+            results[field] = np.empty((case_count, plan_count, year_count))
+        else:
+            results[field] = np.empty((case_count, year_count))
+
+    for year, state in enumerate(iter_projection_kernel(inputs, years, 'plan_values' in fields)):
+        for field in fields:
+            results[field][..., year] = state[field]
+
+    return results
+
+
+def monthly_plan_balances(
+    cash_value: np.ndarray,
+    monthly_contribution: np.ndarray,
+    monthly_growth: np.ndarray,
+    contributing_months: np.ndarray,
+    months: int
+) -> np.ndarray:
+    """
+    Closed-form month-end plan balances, shaped (plans, months)
+
+    Each month the contribution is added and the balance then grows by
+    monthly_growth (the annual engine's order), for the first
+    contributing_months months; afterwards the balance only compounds.
+    """
+    cash_value = np.asarray(cash_value, dtype=float)[:, None]
+    contribution = np.asarray(monthly_contribution, dtype=float)[:, None]
+    growth = np.asarray(monthly_growth, dtype=float)[:, None]
+    funded = np.minimum(np.arange(1, months + 1)[None, :], np.asarray(contributing_months)[:, None])
+    elapsed = np.arange(1, months + 1)[None, :]
+
+    # Sum of growth^(elapsed - k + 1) for k = 1..funded (geometric series)
+    level = np.abs(growth - 1) < 1e-12
+    safe_rate = np.where(level, 1.0, growth - 1)
+    annuity = np.where(
+        level,
+        funded,
+        growth ** (elapsed - funded + 1) * (growth ** funded - 1) / safe_rate
+    )
+    return cash_value * growth ** elapsed + contribution * annuity
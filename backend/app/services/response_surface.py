@@ -0,0 +1,235 @@
+"""
+Response Surface
+Precomputed FinancialCalculator tables for answering /api/calculator/compare
+without running the year-by-year projection
+
+A projection depends on the ages only through two whole-year counts
+(contributing years and growth years before income starts), and is linear
+in the annual contribution and starting value:
+
+    cash_value = current_value * A[c, g] + annual_contribution * B[c, g]
+
+so the table stores A and B for every vehicle, case and (c, g) on the grid,
+and a lookup is an exact linear interpolation between those coefficients.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from app.services.financial_calculator import FinancialCalculator
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseSurface:
+    """
+    Memory-mapped coefficient table for one tax / inflation assumption
+
+    The table is a float64 .npy array of shape
+    (vehicles, cases, contributing years, growth years, 2) with a JSON
+    sidecar describing it. Every worker process maps the same file, so
+    the pages are shared and loading is instant.
+    """
+
+    # Grid covers ages 18-80: up to 62 contributing and 62 growth years
+    MAX_CONTRIBUTING_YEARS = 62
+    MAX_GROWTH_YEARS = 62
+
+    # Results stay within one cent of calculate_projection: a lookup is
+    # answered only while its floating-point error bound is below half a cent
+    MAX_ERROR = 0.005
+
+    def __init__(self, table: np.ndarray, metadata: Dict[str, Any]):
+        self.table = table
+        self.metadata = metadata
+        self.tax_rate = metadata['tax_rate']
+        self.inflation_rate = metadata['inflation_rate']
+        self._vehicle_index = {plan_type: i for i, plan_type in enumerate(metadata['plan_types'])}
+        self._tax_advantage = [
+            FinancialCalculator.VEHICLE_ASSUMPTIONS[plan_type]['tax_advantage']
+            for plan_type in metadata['plan_types']
+        ]
+
+    # ================= BUILD / LOAD ================= #
+
+    @classmethod
+    def build(cls, path: str, tax_rate: float = 0.25, inflation_rate: float = 0.03) -> 'ResponseSurface':
+        """
+        Compute the coefficient table and write it to path (plus path.json)
+
+        Coefficients are stepped with the same float operations as
+        FinancialCalculator, one year at a time across the whole grid.
+        """
+        calculator = FinancialCalculator(tax_rate=tax_rate, inflation_rate=inflation_rate)
+        plan_types = list(FinancialCalculator.VEHICLE_ASSUMPTIONS)
+        assumptions = calculator._vehicle_arrays(plan_types)
+        avg_return = assumptions['avg_return'][:, None]
+        volatility = assumptions['volatility'][:, None]
+        rates = np.hstack([
+            avg_return + volatility,
+            avg_return,
+            np.maximum(avg_return - volatility, 0.01)
+        ])
+        growth = 1 + (rates - assumptions['policy_cost'][:, None] - inflation_rate)
+        if (growth <= 0).any():
+            raise ValueError("Response surface requires positive growth factors")
+
+        contributing = cls.MAX_CONTRIBUTING_YEARS + 1
+        growing = cls.MAX_GROWTH_YEARS + 1
+        table = np.empty(growth.shape + (contributing, growing, 2))
+
+        # Phase 1: value of 1.0 starting value / 1.0 annual contribution after c years
+        value = np.ones(growth.shape)
+        unit = np.zeros(growth.shape)
+        for c in range(contributing):
+            if c:
+                value = value * growth
+                unit = (unit + 1) * growth
+            table[:, :, c, 0, 0] = value
+            table[:, :, c, 0, 1] = unit
+
+        # Phase 2: growth years before income
+        for g in range(1, growing):
+            table[:, :, :, g, :] = table[:, :, :, g - 1, :] * growth[:, :, None, None]
+
+        metadata = {
+            'version': FinancialCalculator.VERSION,
+            'assumptions_hash': cls._assumptions_hash(),
+            'plan_types': plan_types,
+            'cases': FinancialCalculator.CASES,
+            'tax_rate': tax_rate,
+            'inflation_rate': inflation_rate,
+            'max_contributing_years': cls.MAX_CONTRIBUTING_YEARS,
+            'max_growth_years': cls.MAX_GROWTH_YEARS
+        }
+        np.save(path, table)
+        with open(cls._metadata_path(path), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ResponseSurface']:
+        """
+        Map a table written by build()
+
+        Returns None when the file is missing or was built for a different
+        calculator version or set of vehicle assumptions.
+        """
+        try:
+            with open(cls._metadata_path(path)) as f:
+                metadata = json.load(f)
+            table = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Response surface unavailable: {str(e)}")
+            return None
+
+        if metadata.get('version') != FinancialCalculator.VERSION or \
+                metadata.get('assumptions_hash') != cls._assumptions_hash():
+            logger.warning("Response surface is stale; rebuild it with 'flask build-response-surface'")
+            return None
+        return cls(table, metadata)
+
+    # ================= PUBLIC API ================= #
+
+    def matches(self, calculator: FinancialCalculator) -> bool:
+        """Whether the table was built for this calculator's tax and inflation rates"""
+        return calculator.tax_rate == self.tax_rate and calculator.inflation_rate == self.inflation_rate
+
+    def lookup(
+        self,
+        plan_type: str,
+        current_age: int,
+        monthly_contribution: float,
+        years_to_contribute: int,
+        income_start_age: int,
+        income_end_age: int,
+        current_value: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        calculate_projection from the table, or None outside the grid
+
+        Callers fall back to FinancialCalculator on None. Inputs outside the
+        grid include unknown vehicles, non-integer ages, negative amounts
+        and anything whose error bound exceeds MAX_ERROR.
+        """
+        vehicle = self._vehicle_index.get(plan_type)
+        if vehicle is None:
+            return None
+        for value in (current_age, years_to_contribute, income_start_age, income_end_age):
+            if not isinstance(value, int) or isinstance(value, bool):
+                return None
+        for value in (monthly_contribution, current_value):
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value < float('inf'):
+                return None
+
+        contributing_years = years_to_contribute
+        growth_years = max(0, (income_start_age - current_age) - years_to_contribute)
+        if not 0 <= contributing_years <= self.MAX_CONTRIBUTING_YEARS or growth_years > self.MAX_GROWTH_YEARS:
+            return None
+
+        annual_contribution = monthly_contribution * 12
+        total_contributed = 0
+        for year in range(years_to_contribute):
+            total_contributed += annual_contribution
+        years_compounded = contributing_years + growth_years
+        years_of_income = income_end_age - income_start_age
+
+        coefficients = self.table[vehicle, :, contributing_years, growth_years, :].tolist()
+        # Each stepped year and the final combination round at most a few times
+        error_factor = (4 * years_compounded + 10) * sys.float_info.epsilon
+
+        result = {"plan_type": plan_type}
+        for case, (value_coefficient, contribution_coefficient) in zip(self.metadata['cases'], coefficients):
+            if years_compounded:
+                cash_value_at_income = current_value * value_coefficient + annual_contribution * contribution_coefficient
+                if cash_value_at_income * error_factor >= self.MAX_ERROR:
+                    return None
+            else:
+                cash_value_at_income = current_value
+            annual_income_before_tax = cash_value_at_income / years_of_income if years_of_income > 0 else 0
+            if self._tax_advantage[vehicle]:
+                annual_income_after_tax = annual_income_before_tax
+            else:
+                annual_income_after_tax = annual_income_before_tax * (1 - self.tax_rate)
+
+            result[case] = {
+                "total_contributed": round(total_contributed, 2),
+                "cash_value": round(cash_value_at_income, 2),
+                "annual_income_before_tax": round(annual_income_before_tax, 2),
+                "annual_income_after_tax": round(annual_income_after_tax, 2)
+            }
+        return result
+
+    # ================= INTERNALS ================= #
+
+    @staticmethod
+    def _metadata_path(path: str) -> str:
+        return f"{path}.json"
+
+    @staticmethod
+    def _assumptions_hash() -> str:
+        blob = json.dumps(FinancialCalculator.VEHICLE_ASSUMPTIONS, sort_keys=True)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+_response_surface = None
+_response_surface_loaded = False
+_response_surface_lock = threading.Lock()
+
+
+def get_response_surface() -> Optional[ResponseSurface]:
+    """Process-wide table mapped from Config.RESPONSE_SURFACE_PATH (None when not built)"""
+    global _response_surface, _response_surface_loaded
+    with _response_surface_lock:
+        if not _response_surface_loaded:
+            from app.config import Config
+            if Config.RESPONSE_SURFACE_PATH:
+                _response_surface = ResponseSurface.load(Config.RESPONSE_SURFACE_PATH)
+            _response_surface_loaded = True
+        return _response_surface
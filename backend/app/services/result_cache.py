@@ -0,0 +1,262 @@
+"""
+Result Cache
+In-process cache for engine outputs (projections, insights, wealth velocity)
+and memoized FinancialCalculator projections
+Entries are keyed by a content hash of the engine inputs, so any change to
+a user's snapshot or plans produces a new key; write routes also drop the
+user's entries explicitly so stale results never outlive their TTL
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and hit/miss counters
+
+    Values are shared between requests and must not be mutated by callers.
+    An optional shared tier (e.g. SQLiteCacheTier) is consulted on local
+    misses and written on every store, so other worker processes can
+    reuse results; it only holds JSON-able values and expires by TTL.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600, shared_tier: Optional['SQLiteCacheTier'] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_tier = shared_tier
+        self._entries = OrderedDict()  # key -> (expires_at, user_id, value)
+        self._user_keys = {}           # user_id -> set of keys
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    # ================= KEYS ================= #
+
+    @staticmethod
+    def make_key(namespace: str, version: str, payload: Any) -> str:
+        """
+        Stable content hash of an engine call
+
+        namespace names the engine method, version the engine's VERSION
+        (bump it whenever outputs change) and payload its JSON-able inputs.
+        """
+        blob = json.dumps([namespace, version, payload], sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    # ================= PUBLIC API ================= #
+
+    def get(self, key: str) -> Any:
+        """Cached value for key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove(key)
+
+        if self.shared_tier is not None:
+            value = self.shared_tier.get(key)
+            if value is not None:
+                self._store(None, key, value)
+                with self._lock:
+                    self._shared_hits += 1
+                return value
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, user_id: Any, key: str, value: Any) -> None:
+        """Store value under key, owned by user_id (None for shared results)"""
+        self._store(user_id, key, value)
+        if self.shared_tier is not None:
+            self.shared_tier.set(key, value, self.ttl_seconds)
+
+    def get_or_compute(self, user_id: Any, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            # Compute outside the lock so slow engines don't serialize requests
+            value = compute()
+            self.put(user_id, key, value)
+        return value
+
+    def invalidate_user(self, user_id: Any) -> int:
+        """Drop every entry computed for user_id, returning how many were removed"""
+        with self._lock:
+            keys = self._user_keys.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self._hits + self._shared_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'shared_tier': self.shared_tier is not None,
+                'hits': self._hits,
+                'shared_hits': self._shared_hits,
+                'misses': self._misses,
+                'hit_rate': round((self._hits + self._shared_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
+
+    # ================= INTERNALS ================= #
+
+    def _store(self, user_id: Any, key: str, value: Any) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user_id, value)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._user_keys.get(entry[1])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[entry[1]]
+
+
+class SQLiteCacheTier:
+    """
+    Cross-worker cache tier backed by a local SQLite file
+
+    Every worker process on the host opens the same file, so a result
+    computed by one worker is a hit for the others. Values are stored as
+    JSON with an absolute expiry time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)"
+        )
+
+    def get(self, key: str) -> Any:
+        """Stored value for key, or None when missing or expired"""
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache tier read error: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value under key for ttl_seconds (errors are logged, not raised)"""
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl_seconds)
+            )
+            connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache tier write error: {str(e)}")
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Store value only if key is missing or expired; True when stored (or on errors)"""
+        try:
+            cursor = self._connection().execute(
+                "INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE cache_entries.expires_at <= ?",
+                (key, json.dumps(value), time.time() + ttl_seconds, time.time())
+            )
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logger.warning(f"Cache tier write error: {str(e)}")
+            return True
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache tier write error: {str(e)}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+
+_result_cache = None
+_calculator_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache configured from Config (RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL)"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            from app.config import Config
+            _result_cache = ResultCache(
+                max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+                ttl_seconds=Config.RESULT_CACHE_TTL
+            )
+        return _result_cache
+
+
+def get_calculator_cache() -> ResultCache:
+    """
+    Process-wide FinancialCalculator memo (CALCULATOR_CACHE_MAX_ENTRIES, CALCULATOR_CACHE_TTL)
+    Set CALCULATOR_CACHE_PATH to share entries across worker processes
+    """
+    global _calculator_cache
+    with _result_cache_lock:
+        if _calculator_cache is None:
+            from app.config import Config
+            shared_tier = SQLiteCacheTier(Config.CALCULATOR_CACHE_PATH) if Config.CALCULATOR_CACHE_PATH else None
+            _calculator_cache = ResultCache(
+                max_entries=Config.CALCULATOR_CACHE_MAX_ENTRIES,
+                ttl_seconds=Config.CALCULATOR_CACHE_TTL,
+                shared_tier=shared_tier
+            )
+        return _calculator_cache
+
@@ -0,0 +1,276 @@
+"""
+Snapshot History
+Appends a compact row to snapshot_history on every snapshot update, keeps
+the daily / monthly / yearly net worth rollups current, and reads history
+back for velocity acceleration and the net worth timeline
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import select, case
+
+from app.extensions import db
+from app.models import SnapshotHistory, NetWorthRollup
+from app.services.wealth_velocity_engine import WealthVelocityEngine
+
+logger = logging.getLogger(__name__)
+
+# How far back the acceleration metric compares velocity
+ACCELERATION_LOOKBACK = timedelta(days=182)
+
+# Rollup resolutions, finest first
+ROLLUP_RESOLUTIONS = ["day", "month", "year"]
+
+# Most points a timeline query returns at any resolution
+MAX_TIMELINE_POINTS = 400
+
+
+def velocity_user_data(snapshot, plans: List) -> Dict[str, Any]:
+    """WealthVelocityEngine input for a FinancialSnapshot and the user's FinancialPlans"""
+    # Calculate VERIFIED monthly contributions (what we can prove is being saved)
+    monthly_plan_contributions = sum(plan.monthly_contribution for plan in plans)
+
+    # Total assets include plan cash values
+    total_assets = snapshot.savings + snapshot.investments
+    total_assets += sum(plan.cash_value for plan in plans)
+
+    return {
+        'age': snapshot.age,
+        'monthly_income': snapshot.net_income,
+        'side_income': snapshot.side_income,
+        'monthly_expenses': snapshot.monthly_expenses,
+        'savings': snapshot.savings,
+        'investments': snapshot.investments,
+        'debt': snapshot.debt,
+        'net_worth': total_assets - snapshot.debt,
+        'monthly_plan_contributions': monthly_plan_contributions,  # VERIFIED savings
+        'savings_rate': _calculate_savings_rate(snapshot, monthly_plan_contributions)
+    }
+
+
+def history_values(snapshot, plans: List) -> Dict[str, Any]:
+    """
+    snapshot_history column values for a snapshot and the user's plans
+
+    velocity_bp is None when the engine cannot score the snapshot, so a
+    bad input never costs the user their history row.
+    """
+    user_data = velocity_user_data(snapshot, plans)
+    try:
+        velocity = WealthVelocityEngine().calculate_wealth_velocity(user_data)['velocity']
+        velocity_bp = round(velocity * 100)
+    except Exception as e:
+        logger.error(f"Error calculating velocity for user {snapshot.user_id}: {str(e)}")
+        velocity_bp = None
+
+    return {
+        'user_id': snapshot.user_id,
+        'net_worth': round(user_data['net_worth']),
+        'total_assets': round(user_data['net_worth'] + snapshot.debt),
+        'debt': round(snapshot.debt),
+        'monthly_income': round(snapshot.net_income + snapshot.side_income),
+        'monthly_plan_contributions': round(user_data['monthly_plan_contributions']),
+        'velocity_bp': velocity_bp
+    }
+
+
+def record_snapshot(snapshot, plans: List, recorded_at: datetime = None) -> Optional[SnapshotHistory]:
+    """
+    Add a history row for the snapshot's current values to the session
+
+    The caller commits, so the history row and its rollup updates land in
+    the same transaction as the snapshot update they record. They are
+    written in a savepoint: if recording fails it is rolled back alone,
+    logged, and None is returned, leaving the snapshot update to commit.
+    """
+    try:
+        with db.session.begin_nested():
+            entry = SnapshotHistory(
+                recorded_at=recorded_at or datetime.now(timezone.utc),
+                **history_values(snapshot, plans)
+            )
+            db.session.add(entry)
+            db.session.flush()
+            _update_rollups(entry)
+        return entry
+    except Exception as e:
+        logger.error(f"Error recording snapshot history for user {snapshot.user_id}: {str(e)}")
+        return None
+
+
+def velocity_as_of(user_id: int, as_of: datetime) -> Optional[float]:
+    """Velocity from the latest scored history row at or before as_of (an index seek on user_id, recorded_at)"""
+    velocity_bp = db.session.execute(
+        select(SnapshotHistory.velocity_bp)
+        .where(
+            SnapshotHistory.user_id == user_id,
+            SnapshotHistory.recorded_at <= as_of,
+            SnapshotHistory.velocity_bp.is_not(None)
+        )
+        .order_by(SnapshotHistory.recorded_at.desc())
+        .limit(1)
+    ).scalar()
+    return velocity_bp / 100 if velocity_bp is not None else None
+
+
+def historical_velocity_data(user_id: int, now: datetime = None) -> Optional[Dict[str, Any]]:
+    """WealthVelocityEngine historical_data, or None without history from ACCELERATION_LOOKBACK ago"""
+    now = now or datetime.now(timezone.utc)
+    velocity = velocity_as_of(user_id, now - ACCELERATION_LOOKBACK)
+    if velocity is None:
+        return None
+    return {'velocity_6mo_ago': velocity}
+
+
+def period_start(resolution: str, day: date) -> date:
+    """First day of the rollup period containing day"""
+    if resolution == "day":
+        return day
+    if resolution == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def period_count(resolution: str, start: date, end: date) -> int:
+    """Rollup periods touched by the inclusive range start..end"""
+    if resolution == "day":
+        return (end - start).days + 1
+    if resolution == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return end.year - start.year + 1
+
+
+def choose_resolution(start: date, end: date) -> Optional[str]:
+    """Finest resolution that fits start..end in MAX_TIMELINE_POINTS (None if none does)"""
+    for resolution in ROLLUP_RESOLUTIONS:
+        if period_count(resolution, start, end) <= MAX_TIMELINE_POINTS:
+            return resolution
+    return None
+
+
+def first_recorded_day(user_id: int) -> Optional[date]:
+    """Day of the user's earliest recorded snapshot (None without history)"""
+    return db.session.execute(
+        select(NetWorthRollup.period_start)
+        .where(NetWorthRollup.user_id == user_id, NetWorthRollup.resolution == "day")
+        .order_by(NetWorthRollup.period_start)
+        .limit(1)
+    ).scalar()
+
+
+def net_worth_timeline(user_id: int, resolution: str, start: date, end: date) -> List[Dict[str, Any]]:
+    """
+    Pre-aggregated net worth points for start..end at one resolution
+
+    A primary-key range read over net_worth_rollups; periods without any
+    snapshot update have no point.
+    """
+    rollups = db.session.execute(
+        select(NetWorthRollup)
+        .where(
+            NetWorthRollup.user_id == user_id,
+            NetWorthRollup.resolution == resolution,
+            NetWorthRollup.period_start >= period_start(resolution, start),
+            NetWorthRollup.period_start <= end
+        )
+        .order_by(NetWorthRollup.period_start)
+    ).scalars()
+    return [
+        {
+            "period": rollup.period_start.isoformat(),
+            "open": rollup.open,
+            "close": rollup.close,
+            "low": rollup.low,
+            "high": rollup.high,
+            "average": round(rollup.total / rollup.samples, 2),
+            "samples": rollup.samples
+        }
+        for rollup in rollups
+    ]
+
+
+def _update_rollups(entry: SnapshotHistory):
+    """
+    Fold one history row into its day, month and year rollups
+
+    Each fold is a single upsert (natively on SQLite / PostgreSQL), so
+    concurrent saves for the same period neither race to insert the row
+    nor lose each other's total / samples increments.
+    """
+    day = entry.recorded_at.date()
+    rows = [
+        {
+            "user_id": entry.user_id,
+            "resolution": resolution,
+            "period_start": period_start(resolution, day),
+            "open": entry.net_worth,
+            "close": entry.net_worth,
+            "low": entry.net_worth,
+            "high": entry.net_worth,
+            "total": entry.net_worth,
+            "samples": 1
+        }
+        for resolution in ROLLUP_RESOLUTIONS
+    ]
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        for row in rows:
+            _fold_rollup(row)
+        return
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    rollups = NetWorthRollup.__table__
+    statement = dialect_insert(rollups)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[rollups.c.user_id, rollups.c.resolution, rollups.c.period_start],
+        set_={
+            "close": excluded.close,
+            "low": case((excluded.low < rollups.c.low, excluded.low), else_=rollups.c.low),
+            "high": case((excluded.high > rollups.c.high, excluded.high), else_=rollups.c.high),
+            "total": rollups.c.total + excluded.total,
+            "samples": rollups.c.samples + 1
+        }
+    )
+    db.session.execute(statement, rows)
+
+
+def _fold_rollup(row: Dict[str, Any]):
+    """ORM get-or-create fallback for other databases (not safe against concurrent saves)"""
+    key = (row["user_id"], row["resolution"], row["period_start"])
+    rollup = db.session.get(NetWorthRollup, key)
+    if rollup is None:
+        db.session.add(NetWorthRollup(**row))
+        return
+    rollup.close = row["close"]
+    rollup.low = min(rollup.low, row["low"])
+    rollup.high = max(rollup.high, row["high"])
+    rollup.total += row["total"]
+    rollup.samples += 1
+
+
+def _calculate_savings_rate(snapshot, plan_contributions: float) -> float:
+    """
+    Helper to calculate ACTUAL savings rate
+
+    Savings rate = (verified contributions) / (total income)
+
+    NOT the same as "cash flow surplus" because:
+    - Cash flow surplus might go to discretionary spending
+    - We only count what we KNOW is being saved
+    """
+    total_income = snapshot.net_income + snapshot.side_income
+
+    if total_income == 0:
+        return 0
+
+    # Savings rate = what percentage of income is being invested
+    savings_rate = (plan_contributions / total_income) if total_income > 0 else 0
+
+    return max(0, min(savings_rate, 1.0))  # Cap between 0-100%
@@ -5,10 +5,12 @@ Fetches S&P 500 data with proper error handling and caching
 
 import yfinance as yf
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 import logging
 import time
 
+from app.services.market_cache import MarketDataCache, get_market_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,180 +18,247 @@ class SP500Service:
     """
     Service for fetching S&P 500 data
     Simple implementation with caching and rate limiting
+    
+    Data is cached in a MarketDataCache (by default the process-wide one
+    configured by MARKET_CACHE_URL), which makes fetches single-flight:
+    however many requests miss the same key at once, across threads and
+    worker processes sharing the backend, exactly one calls Yahoo Finance.
+    
+    With background_refresh, a MarketDataRefresher keeps the current price
+    and STANDARD_PERIODS warm on the refresh_interval() cadence and requests
+    only read the cache; they fall back to fetching themselves only when an
+    entry is missing or has gone REFRESH_GRACE intervals without a refresh.
     """
     
     TICKER = "^GSPC"
     CACHE_DURATION_MINUTES = 15
     
-    def __init__(self):
-        self._cache = {}
-        self._cache_time = {}
+    # Historical periods the dashboard charts (always at a 1d interval)
+    STANDARD_PERIODS = ["1mo", "3mo", "6mo", "1y", "ytd"]
+    STANDARD_INTERVAL = "1d"
     
-    def _get_cached(self, key: str) -> Dict[str, Any]:
-        """Get cached data if still valid"""
-        if key not in self._cache or key not in self._cache_time:
-            return None
-        
-        age = datetime.now() - self._cache_time[key]
-        if age.total_seconds() / 60 < self.CACHE_DURATION_MINUTES:
-            logger.info(f"Returning cached data for {key}")
-            return self._cache[key]
-        
-        return None
+    # Seconds between background refreshes of the current price, by market status
+    REFRESH_SECONDS = {
+        "open": 60,
+        "pre_market": 300,
+        "post_market": 300,
+        "closed": 1800
+    }
+    WEEKEND_REFRESH_SECONDS = 6 * 3600
     
-    def _set_cache(self, key: str, data: Dict[str, Any]):
-        """Store data in cache"""
-        self._cache[key] = data
-        self._cache_time[key] = datetime.now()
+    # Missed refreshes tolerated before a request fetches for itself
+    REFRESH_GRACE = 3
+    
+    # Pause between consecutive Yahoo Finance calls in one refresh (rate limiting)
+    REFRESH_SPACING_SECONDS = 1
+    
+    def __init__(self, cache: MarketDataCache = None, background_refresh: bool = False):
+        self._cache = cache if cache is not None else get_market_cache()
+        self.background_refresh = background_refresh
+    
+    @property
+    def cache(self) -> MarketDataCache:
+        return self._cache
     
     def get_current_data(self) -> Dict[str, Any]:
         """
         Get current S&P 500 price
         Returns cached data if available, otherwise fetches fresh
         """
-        cache_key = "current"
-        
-        # Try cache first
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-        
-        try:
-            # Add small delay to avoid rate limiting
-            time.sleep(1)
-            
-            # Fetch data using simple history method (most reliable)
-            ticker = yf.Ticker(self.TICKER)
-            hist = ticker.history(period="5d")
-            
-            if hist.empty:
-                raise Exception("No data returned from Yahoo Finance")
-            
-            # Get latest data
-            latest = hist.iloc[-1]
-            current_price = float(latest['Close'])
-            
-            # Calculate change
-            if len(hist) >= 2:
-                previous = hist.iloc[-2]
-                previous_close = float(previous['Close'])
-            else:
-                previous_close = float(latest['Open'])
-            
-            change = current_price - previous_close
-            percent_change = (change / previous_close * 100) if previous_close != 0 else 0
-            
-            result = {
-                "ticker": self.TICKER,
-                "current_price": round(current_price, 2),
-                "change": round(change, 2),
-                "percent_change": round(percent_change, 2),
-                "previous_close": round(previous_close, 2),
-                "timestamp": datetime.now().isoformat(),
-                "market_status": self._get_market_status()
-            }
-            
-            # Cache it
-            self._set_cache(cache_key, result)
-            logger.info("Successfully fetched current S&P 500 data")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error fetching S&P 500 data: {str(e)}")
-            
-            # Return stale cache if available
-            if cache_key in self._cache:
-                logger.warning("Returning stale cached data")
-                stale = self._cache[cache_key]
-                stale['stale'] = True
-                return stale
-            
-            # Return mock data as last resort
-            logger.warning("Returning mock data")
-            return {
-                "ticker": self.TICKER,
-                "current_price": 4783.45,
-                "change": 23.67,
-                "percent_change": 0.50,
-                "previous_close": 4759.78,
-                "timestamp": datetime.now().isoformat(),
-                "market_status": "closed",
-                "mock": True,
-                "error": "Unable to fetch live data"
-            }
+        return self._get_or_fetch(
+            "current", self._max_age("current"), self._fetch_current, self._current_fallback
+        )
     
     def get_historical_data(self, period: str = "1mo", interval: str = "1d") -> Dict[str, Any]:
         """
         Get historical S&P 500 data
         """
-        cache_key = f"hist_{period}_{interval}"
+        key = self._historical_key(period, interval)
+        return self._get_or_fetch(
+            key,
+            self._max_age(key),
+            lambda: self._fetch_historical(period, interval),
+            lambda stale, error: self._historical_fallback(stale, period)
+        )
+    
+    # ================= BACKGROUND REFRESH ================= #
+    
+    def refresh_interval(self) -> float:
+        """Seconds until the next background refresh, from the market status"""
+        if datetime.now().weekday() >= 5:
+            return self.WEEKEND_REFRESH_SECONDS
+        return self.REFRESH_SECONDS[self._get_market_status()]
+    
+    def refresh(self) -> Dict[str, bool]:
+        """
+        Fetch the current price and STANDARD_PERIODS into the cache
         
-        # Try cache first
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
+        Entries refreshed within their cadence (e.g. by another worker) are
+        skipped. Returns whether each key fetched was stored; failures are
+        logged and leave the previous entry in place.
+        """
+        results = {}
+        for key, fetch in self._refresh_jobs().items():
+            # Re-fetch slightly early so wake-up jitter never pushes an entry back a whole cycle
+            entry = self._cache.get_entry(f"sp500:{key}")
+            if entry is not None and MarketDataCache.is_fresh(entry, self._cadence(key) * 0.9):
+                continue
+            if results:
+                time.sleep(self.REFRESH_SPACING_SECONDS)
+            try:
+                self._cache.put(f"sp500:{key}", fetch())
+                results[key] = True
+            except Exception as e:
+                logger.error(f"Error refreshing {key}: {str(e)}")
+                results[key] = False
+        return results
+    
+    def _refresh_jobs(self) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """Cache key -> upstream fetch for everything kept warm in the background"""
+        jobs = {"current": self._fetch_current}
+        for period in self.STANDARD_PERIODS:
+            key = self._historical_key(period, self.STANDARD_INTERVAL)
+            jobs[key] = lambda period=period: self._fetch_historical(period, self.STANDARD_INTERVAL)
+        return jobs
+    
+    def _cadence(self, key: str) -> float:
+        """Seconds between background refreshes of key (history is refreshed at most every CACHE_DURATION_MINUTES)"""
+        interval = self.refresh_interval()
+        if key == "current":
+            return interval
+        return max(interval, self.CACHE_DURATION_MINUTES * 60)
+    
+    def _max_age(self, key: str) -> float:
+        """Oldest entry a request serves without fetching"""
+        if not self.background_refresh or key not in self._refresh_jobs():
+            return self.CACHE_DURATION_MINUTES * 60
+        return self._cadence(key) * self.REFRESH_GRACE
+    
+    def _get_or_fetch(
+        self,
+        key: str,
+        max_age: float,
+        fetch: Callable[[], Dict[str, Any]],
+        fallback: Callable[[Optional[Dict[str, Any]], Optional[Exception]], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Cached data for key (backends decode a copy per read, so callers can never modify a cached entry)"""
+        return self._cache.get_or_fetch(f"sp500:{key}", max_age, fetch, fallback)
+    
+    @staticmethod
+    def _historical_key(period: str, interval: str) -> str:
+        return f"hist_{period}_{interval}"
+    
+    # ================= UPSTREAM ================= #
+    
+    def _fetch_current(self) -> Dict[str, Any]:
+        """Latest close and daily change from Yahoo Finance (raises on failure)"""
+        # Fetch data using simple history method (most reliable)
+        ticker = yf.Ticker(self.TICKER)
+        hist = ticker.history(period="5d")
         
-        try:
-            # Add delay
-            time.sleep(1)
-            
-            # Fetch historical data
-            ticker = yf.Ticker(self.TICKER)
-            hist = ticker.history(period=period, interval=interval)
-            
-            if hist.empty:
-                raise Exception(f"No historical data for period {period}")
-            
-            # Convert to list of dicts
-            data_points = []
-            for date, row in hist.iterrows():
-                data_points.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "timestamp": int(date.timestamp()),
-                    "open": round(float(row['Open']), 2),
-                    "high": round(float(row['High']), 2),
-                    "low": round(float(row['Low']), 2),
-                    "close": round(float(row['Close']), 2),
-                    "volume": int(row['Volume'])
-                })
-            
-            # Calculate stats
-            closes = [p['close'] for p in data_points]
-            statistics = {
-                "high": round(max(closes), 2),
-                "low": round(min(closes), 2),
-                "mean": round(sum(closes) / len(closes), 2),
-                "range": round(max(closes) - min(closes), 2),
-                "volatility": round(self._calculate_volatility(closes), 2)
-            }
-            
-            result = {
-                "ticker": self.TICKER,
-                "period": period,
-                "interval": interval,
-                "data": data_points,
-                "statistics": statistics,
-                "data_points_count": len(data_points)
-            }
-            
-            # Cache it
-            self._set_cache(cache_key, result)
-            logger.info(f"Successfully fetched historical data for {period}")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error fetching historical data: {str(e)}")
-            
-            # Return stale cache if available
-            if cache_key in self._cache:
-                logger.warning("Returning stale historical data")
-                return self._cache[cache_key]
-            
-            # Return mock data
-            logger.warning("Returning mock historical data")
-            return self._generate_mock_historical(period)
+        if hist.empty:
+            raise Exception("No data returned from Yahoo Finance")
+        
+        # Get latest data
+        latest = hist.iloc[-1]
+        current_price = float(latest['Close'])
+        
+        # Calculate change
+        if len(hist) >= 2:
+            previous = hist.iloc[-2]
+            previous_close = float(previous['Close'])
+        else:
+            previous_close = float(latest['Open'])
+        
+        change = current_price - previous_close
+        percent_change = (change / previous_close * 100) if previous_close != 0 else 0
+        
+        logger.info("Successfully fetched current S&P 500 data")
+        return {
+            "ticker": self.TICKER,
+            "current_price": round(current_price, 2),
+            "change": round(change, 2),
+            "percent_change": round(percent_change, 2),
+            "previous_close": round(previous_close, 2),
+            "timestamp": datetime.now().isoformat(),
+            "market_status": self._get_market_status()
+        }
+    
+    def _fetch_historical(self, period: str, interval: str) -> Dict[str, Any]:
+        """OHLCV points and summary statistics from Yahoo Finance (raises on failure)"""
+        # Fetch historical data
+        ticker = yf.Ticker(self.TICKER)
+        hist = ticker.history(period=period, interval=interval)
+        
+        if hist.empty:
+            raise Exception(f"No historical data for period {period}")
+        
+        # Convert to list of dicts
+        data_points = []
+        for date, row in hist.iterrows():
+            data_points.append({
+                "date": date.strftime("%Y-%m-%d"),
+                "timestamp": int(date.timestamp()),
+                "open": round(float(row['Open']), 2),
+                "high": round(float(row['High']), 2),
+                "low": round(float(row['Low']), 2),
+                "close": round(float(row['Close']), 2),
+                "volume": int(row['Volume'])
+            })
+        
+        # Calculate stats
+        closes = [p['close'] for p in data_points]
+        statistics = {
+            "high": round(max(closes), 2),
+            "low": round(min(closes), 2),
+            "mean": round(sum(closes) / len(closes), 2),
+            "range": round(max(closes) - min(closes), 2),
+            "volatility": round(self._calculate_volatility(closes), 2)
+        }
+        
+        logger.info(f"Successfully fetched historical data for {period}")
+        return {
+            "ticker": self.TICKER,
+            "period": period,
+            "interval": interval,
+            "data": data_points,
+            "statistics": statistics,
+            "data_points_count": len(data_points)
+        }
+    
+    # ================= FALLBACKS ================= #
+    
+    def _current_fallback(self, stale: Optional[Dict[str, Any]], error: Optional[Exception]) -> Dict[str, Any]:
+        """Stale cached price flagged as such, or mock data as a last resort"""
+        # Return stale cache if available
+        if stale is not None:
+            logger.warning("Returning stale cached data")
+            return {**stale, "stale": True}
+        
+        # Return mock data as last resort
+        logger.warning("Returning mock data")
+        return {
+            "ticker": self.TICKER,
+            "current_price": 4783.45,
+            "change": 23.67,
+            "percent_change": 0.50,
+            "previous_close": 4759.78,
+            "timestamp": datetime.now().isoformat(),
+            "market_status": "closed",
+            "mock": True,
+            "error": "Unable to fetch live data"
+        }
+    
+    def _historical_fallback(self, stale: Optional[Dict[str, Any]], period: str) -> Dict[str, Any]:
+        """Stale cached history, or mock data as a last resort"""
+        # Return stale cache if available
+        if stale is not None:
+            logger.warning("Returning stale historical data")
+            return stale
+        
+        # Return mock data
+        logger.warning("Returning mock historical data")
+        return self._generate_mock_historical(period)
     
     def _calculate_volatility(self, closes: list) -> float:
         """Calculate simple volatility"""
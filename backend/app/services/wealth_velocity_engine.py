@@ -9,7 +9,12 @@ Key Principles:
 4. Handle debt, emergency fund, and lifecycle stages properly
 """
 
-from typing import Dict, Any
+from typing import Dict, List, Any
+
+import numpy as np
+
+from app.services import finmath
+from app.services.percentiles import get_percentile_table
 
 
 class WealthVelocityEngine:
@@ -17,6 +22,9 @@ class WealthVelocityEngine:
     Professional wealth velocity calculator following institutional standards
     """
     
+    # Output version, part of ResultCache keys (bump when outputs change)
+    VERSION = "3"
+    
     # Standard asset allocation returns (Vanguard/Fidelity historical data)
     ASSET_RETURNS = {
         'aggressive': 0.095,    # 9.5% (80/20 stocks/bonds) - historical S&P 500 ~10%
@@ -39,6 +47,18 @@ class WealthVelocityEngine:
         "stagnant": 0.0        # <5% savings rate
     }
     
+    # Stage keys in calculate_batch's stage codes order
+    STAGES = ['debt_payoff', 'foundation', 'acceleration']
+    
+    # Inputs of calculate_batch, one array per field (age may be NaN)
+    BATCH_COLUMNS = [
+        'age', 'net_worth', 'savings', 'investments', 'debt', 'monthly_expenses',
+        'monthly_income', 'side_income', 'monthly_plan_contributions'
+    ]
+    
+    # Projection horizons in years, with their output labels
+    PROJECTION_HORIZONS = [(1, "one_year"), (3, "three_years"), (5, "five_years"), (10, "ten_years")]
+    
     def calculate_wealth_velocity(
         self, 
         user_data: Dict[str, Any],
@@ -73,6 +93,129 @@ class WealthVelocityEngine:
         else:  # acceleration stage
             return self._generate_acceleration_analysis(user_data, stage, historical_data)
     
+    def calculate_batch(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Headline numbers for many users at once
+        
+        columns holds one equal-length array per BATCH_COLUMNS field (see
+        build_columns). Stages are classified with masks and every stage's
+        formulas run over the whole batch, so 100k users take one pass.
+        Values are unrounded; only the numbers come back, and analysis()
+        renders the full message-bearing dict for the rows a caller needs.
+        
+        Returns arrays: stage (codes into STAGES), velocity, real_velocity,
+        percentile, savings_rate (%), annual_wealth_gain, expected_return_rate,
+        months_to_debt_free (NaN when not in debt payoff or not payable),
+        plus projections as {label: array}.
+        """
+        c = {name: np.asarray(columns[name], dtype=float) for name in self.BATCH_COLUMNS}
+        net_worth = c['net_worth']
+        debt = c['debt']
+        monthly_expenses = c['monthly_expenses']
+        monthly_income = c['monthly_income'] + c['side_income']
+        contributions = c['monthly_plan_contributions']
+        annual_contributions = contributions * 12
+        total_assets = c['savings'] + c['investments']
+        has_assets = total_assets > 0
+        safe_assets = np.where(has_assets, total_assets, 1)
+        
+        # Stages, as in _determine_financial_stage
+        in_debt = (net_worth < 0) | ((debt > monthly_expenses * 3) & (debt > 5000))
+        foundation = ~in_debt & (net_worth < 50000)
+        stage = np.where(in_debt, 0, np.where(foundation, 1, 2))
+        
+        # Foundation: blended cash / moderate return on total assets
+        investment_ratio = np.where(has_assets, c['investments'] / safe_assets, 0.1)
+        blended_rate = (investment_ratio * self.ASSET_RETURNS['moderate'] +
+                        (1 - investment_ratio) * self.ASSET_RETURNS['cash'])
+        foundation_growth = np.where(has_assets, total_assets * blended_rate, 0) + annual_contributions
+        with np.errstate(divide='ignore', invalid='ignore'):
+            foundation_velocity = np.where(
+                (net_worth < 5000) & (net_worth > 0),
+                (foundation_growth / 10000) * 100,
+                np.where(net_worth > 0, np.minimum((foundation_growth / net_worth) * 100, 50.0), 0.0)
+            )
+        foundation_rate = np.where(has_assets, blended_rate, self.ASSET_RETURNS['default'])
+        
+        # Acceleration: return tier from the equity allocation
+        allocation = np.where(has_assets, c['investments'] / safe_assets, 0.6)
+        acceleration_rate = np.select(
+            [allocation >= 0.8, allocation >= 0.5],
+            [self.ASSET_RETURNS['aggressive'], self.ASSET_RETURNS['moderate']],
+            self.ASSET_RETURNS['conservative']
+        )
+        acceleration_growth = total_assets * acceleration_rate + annual_contributions
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acceleration_velocity = np.minimum(
+                np.where(net_worth > 0, acceleration_growth / net_worth * 100, 0), 30.0
+            )
+        
+        velocity = np.select([stage == 1, stage == 2], [foundation_velocity, acceleration_velocity], 0.0)
+        annual_wealth_gain = np.select([stage == 1, stage == 2], [foundation_growth, acceleration_growth], 0.0)
+        expected_return_rate = np.select([stage == 1, stage == 2], [foundation_rate, acceleration_rate], 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            savings_rate = np.where(monthly_income > 0, contributions / monthly_income * 100, 0)
+        
+        # Percentiles: savings-rate tiers in foundation, empirical velocity quantiles in acceleration
+        ages = np.where(np.isnan(c['age']) | (c['age'] == 0), 30, c['age'])
+        foundation_percentile = np.select(
+            [savings_rate >= 20, savings_rate >= 15, savings_rate >= 10, savings_rate >= 5],
+            [80, 70, 60, 50], 30
+        )
+        percentile = np.select(
+            [stage == 1, stage == 2],
+            [foundation_percentile, get_percentile_table().percentiles('velocity', ages, velocity)],
+            0
+        )
+        
+        # Projections from today's net worth (zero while paying off debt)
+        projection_base = np.maximum(net_worth, 0)
+        horizons = np.array([years for years, label in self.PROJECTION_HORIZONS])
+        values = finmath.fv(
+            expected_return_rate[:, None], horizons,
+            pmt=annual_contributions[:, None], pv=projection_base[:, None]
+        )
+        values = np.where((stage == 0)[:, None], 0.0, values)
+        
+        # Debt payoff timeline at 15% APR
+        monthly_rate = 0.15 / 12
+        surplus = monthly_income - monthly_expenses - contributions
+        payable = in_debt & (surplus > 0) & (surplus > debt * monthly_rate)
+        months_to_debt_free = np.where(payable, finmath.nper(monthly_rate, surplus, debt), np.nan)
+        
+        return {
+            "stage": stage,
+            "velocity": velocity,
+            "real_velocity": np.where(stage == 0, 0.0, velocity - self.INFLATION_RATE),
+            "percentile": percentile,
+            "savings_rate": savings_rate,
+            "annual_wealth_gain": annual_wealth_gain,
+            "expected_return_rate": expected_return_rate,
+            "months_to_debt_free": months_to_debt_free,
+            "projections": {label: values[:, i] for i, (years, label) in enumerate(self.PROJECTION_HORIZONS)},
+        }
+    
+    def build_columns(self, user_data_list: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Column store for calculate_batch from calculate_wealth_velocity-style user dicts"""
+        rows = [
+            tuple(np.nan if u.get(name) is None else u.get(name) for name in self.BATCH_COLUMNS)
+            for u in user_data_list
+        ]
+        table = np.array(rows, dtype=float).reshape(len(rows), len(self.BATCH_COLUMNS))
+        return {name: table[:, i] for i, name in enumerate(self.BATCH_COLUMNS)}
+    
+    def analysis(
+        self,
+        columns: Dict[str, Any],
+        index: int,
+        historical_data: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Full calculate_wealth_velocity output (messages included) for one row of a batch"""
+        user_data = {name: float(columns[name][index]) for name in self.BATCH_COLUMNS}
+        if np.isnan(user_data['age']):
+            user_data['age'] = None
+        return self.calculate_wealth_velocity(user_data, historical_data)
+    
     def _determine_financial_stage(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Determine user's financial lifecycle stage
@@ -149,12 +292,7 @@ class WealthVelocityEngine:
             # Formula: n = -log(1 - (r*P/A)) / log(1+r) where r=monthly rate, P=principal, A=payment
             monthly_rate = debt_interest_rate / 12
             if monthly_surplus > (debt * monthly_rate):
-                months_to_debt_free = round(
-                    -1 * (
-                        (1 - (monthly_rate * debt / monthly_surplus)) / 
-                        (1 + monthly_rate)
-                    ) / 12, 1
-                )
+                months_to_debt_free = round(finmath.nper(monthly_rate, monthly_surplus, debt), 1)
             else:
                 months_to_debt_free = None
                 debt_payoff_date = "Payment doesn't cover interest - increase payments"
@@ -399,7 +537,7 @@ class WealthVelocityEngine:
         
         # Benchmark
         benchmark = self._get_benchmark_category(velocity)
-        percentile = self._calculate_percentile(velocity)
+        percentile = self._calculate_percentile(velocity, user_data.get('age') or 30)
         
         # Savings rate
         savings_rate = (monthly_plan_contributions / monthly_income * 100) if monthly_income > 0 else 0
@@ -470,22 +608,17 @@ class WealthVelocityEngine:
         Calculate realistic future value projections
         FV = PV(1+r)^n + PMT * [((1+r)^n - 1) / r]
         """
-        results = {}
-        
-        for years, label in [(1, "one_year"), (3, "three_years"), (5, "five_years"), (10, "ten_years")]:
-            # Future value of current assets
-            fv_current = current_net_worth * ((1 + expected_return) ** years)
-            
-            # Future value of annual contributions (ordinary annuity)
-            if expected_return > 0:
-                fv_contributions = annual_contribution * (((1 + expected_return) ** years - 1) / expected_return)
-            else:
-                fv_contributions = annual_contribution * years
-            
-            total_fv = fv_current + fv_contributions
-            results[label] = round(total_fv, 2)
+        horizons = self.PROJECTION_HORIZONS
+        
+        # Current assets plus annual contributions (ordinary annuity), all horizons at once
+        total_fv = finmath.fv(
+            expected_return,
+            [years for years, label in horizons],
+            pmt=annual_contribution,
+            pv=current_net_worth
+        )
         
-        return results
+        return {label: round(value, 2) for (years, label), value in zip(horizons, total_fv.tolist())}
     
     def _get_momentum(self, savings_rate: float) -> str:
         """Determine momentum based on savings rate"""
@@ -500,22 +633,9 @@ class WealthVelocityEngine:
         else:
             return "stagnant"
     
-    def _calculate_percentile(self, velocity: float) -> int:
-        """Estimate percentile based on velocity"""
-        if velocity >= 20:
-            return 95
-        elif velocity >= 15:
-            return 90
-        elif velocity >= 12:
-            return 80
-        elif velocity >= 10:
-            return 70
-        elif velocity >= 8:
-            return 60
-        elif velocity >= 5:
-            return 50
-        else:
-            return 40
+    def _calculate_percentile(self, velocity: float, age: float) -> int:
+        """Percentile within the user's age band from the empirical velocity quantiles"""
+        return get_percentile_table().percentile('velocity', age, velocity)
     
     def _get_benchmark_category(self, velocity: float) -> Dict[str, str]:
         """Get benchmark category"""
@@ -572,7 +692,7 @@ class WealthVelocityEngine:
                 f"You're saving ${annual_growth:,.0f}/year ({savings_rate:.1f}% rate). "
                 f"Consider paying off debt faster to accelerate wealth building."
             )
-        elif net_worth < 5000:
+        elif net_worth < 5000 and annual_growth > 0:
             return (
                 f"You're in early foundation building with ${net_worth:,.0f} net worth. "
                 f"You're adding ${annual_growth:,.0f}/year ({savings_rate:.1f}% savings rate) - "
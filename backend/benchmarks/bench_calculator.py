@@ -0,0 +1,151 @@
+"""
+Financial Calculator Benchmark
+Compares calling calculate_projection once per vehicle (the loop
+implementation) against the batched calculate_projections_batch path
+used by /api/calculator/compare-multiple, and slider sweeps through
+calculate_projection_sets (/api/calculator/batch), and the precomputed
+response surface against exact /compare calculations
+
+Run from backend/:
+    python -m benchmarks.bench_calculator
+"""
+
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from app.services.financial_calculator import FinancialCalculator
+from app.services.response_surface import ResponseSurface
+
+
+def run(horizons: List[int] = (10, 25, 45), vehicle_counts: List[int] = (1, 4, 12), repeat: int = 200):
+    calculator = FinancialCalculator()
+    vehicles = list(FinancialCalculator.VEHICLE_ASSUMPTIONS)
+
+    print(f"{'years':>6} {'vehicles':>9} {'loop ms':>9} {'batch ms':>9} {'speedup':>8}")
+    for years in horizons:
+        params = {
+            'current_age': 25,
+            'monthly_contribution': 500,
+            'years_to_contribute': years,
+            'income_start_age': 25 + years + 5,
+            'income_end_age': 25 + years + 30,
+            'current_value': 10000
+        }
+        for count in vehicle_counts:
+            plan_types = vehicles[:count]
+
+            def loop():
+                return [calculator.calculate_projection(plan_type=p, **params) for p in plan_types]
+
+            def batch():
+                return calculator.calculate_projections_batch(plan_types=plan_types, **params)
+
+            # Both paths must produce identical output
+            assert loop() == batch()
+
+            timings = []
+            for fn in (loop, batch):
+                best = float('inf')
+                for _ in range(3):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        fn()
+                    best = min(best, (time.perf_counter() - start) / repeat)
+                timings.append(best * 1000)
+            print(f"{years:>6} {count:>9} {timings[0]:>9.3f} {timings[1]:>9.3f} {timings[0] / timings[1]:>7.1f}x")
+
+
+def run_sliders(set_counts: List[int] = (10, 50, 200), vehicle_count: int = 4, repeat: int = 20):
+    calculator = FinancialCalculator()
+    plan_types = list(FinancialCalculator.VEHICLE_ASSUMPTIONS)[:vehicle_count]
+    base = {
+        'current_age': 30,
+        'monthly_contribution': 500,
+        'years_to_contribute': 25,
+        'income_start_age': 65,
+        'income_end_age': 90,
+        'current_value': 10000
+    }
+
+    print(f"\n{'slider':>15} {'sets':>5} {'loop ms':>9} {'batch ms':>9} {'speedup':>8}")
+    for slider in ('contribution', 'income_start_age'):
+        for count in set_counts:
+            if slider == 'contribution':
+                param_sets = [{**base, 'monthly_contribution': 25 * i} for i in range(count)]
+            else:
+                param_sets = [{**base, 'income_start_age': 55 + i % 30} for i in range(count)]
+
+            def loop():
+                return [[calculator.calculate_projection(plan_type=p, **params) for p in plan_types] for params in param_sets]
+
+            def batch():
+                return calculator.calculate_projection_sets(plan_types, param_sets)
+
+            assert loop() == batch()
+
+            timings = []
+            for fn in (loop, batch):
+                best = float('inf')
+                for _ in range(3):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        fn()
+                    best = min(best, (time.perf_counter() - start) / repeat)
+                timings.append(best * 1000)
+            print(f"{slider:>15} {count:>5} {timings[0]:>9.3f} {timings[1]:>9.3f} {timings[0] / timings[1]:>7.1f}x")
+
+
+def run_surface(queries: int = 20000, seed: int = 7):
+    calculator = FinancialCalculator()
+    vehicles = list(FinancialCalculator.VEHICLE_ASSUMPTIONS)
+    rng = random.Random(seed)
+
+    params = []
+    for _ in range(queries):
+        current_age = rng.randint(18, 80)
+        income_start_age = current_age + rng.randint(0, 40)
+        params.append({
+            'plan_type': rng.choice(vehicles),
+            'current_age': current_age,
+            'monthly_contribution': round(rng.uniform(0, 5000), 2),
+            'years_to_contribute': rng.randint(0, 40),
+            'income_start_age': income_start_age,
+            'income_end_age': income_start_age + rng.randint(1, 35),
+            'current_value': round(rng.uniform(0, 500000), 2)
+        })
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'response_surface.npy')
+        start = time.perf_counter()
+        surface = ResponseSurface.build(path)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        table = [surface.lookup(**p) for p in params]
+        lookup_us = (time.perf_counter() - start) / queries * 1e6
+
+        start = time.perf_counter()
+        exact = [calculator.calculate_projection(**p) for p in params]
+        exact_us = (time.perf_counter() - start) / queries * 1e6
+
+        # Every answer must be within the advertised one-cent bound
+        max_error = max(
+            abs(t[case][field] - e[case][field])
+            for t, e in zip(table, exact)
+            for case in FinancialCalculator.CASES
+            for field in e[case]
+        )
+        assert max_error <= 0.01 + 1e-9
+
+        print(f"\n{'build ms':>9} {'lookup us':>10} {'exact us':>9} {'max error':>10}")
+        print(f"{build_ms:>9.1f} {lookup_us:>10.2f} {exact_us:>9.2f} {max_error:>10.2f}")
+        del table, surface
+
+
+if __name__ == "__main__":
+    run()
+    run_sliders()
+    run_surface()
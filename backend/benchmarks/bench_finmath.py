@@ -0,0 +1,114 @@
+"""
+Financial Math Kernel Benchmark
+Times each app/services/finmath kernel on a batch of random inputs against
+the scalar formula it replaced, after checking that both agree
+
+Run from backend/:
+    python -m benchmarks.bench_finmath
+"""
+
+import math
+import random
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from app.services import finmath
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    """Best-of-3 mean wall time per call in milliseconds"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+def scalar_fv(rate: float, nper: int, pmt: float, pv: float) -> float:
+    # WealthVelocityEngine's original projection formula
+    fv_current = pv * ((1 + rate) ** nper)
+    fv_contributions = pmt * (((1 + rate) ** nper - 1) / rate) if rate != 0 else pmt * nper
+    return fv_current + fv_contributions
+
+
+def scalar_compound(balance: float, growth: float, contribution: float, contributing: int, growing: int) -> float:
+    # FinancialCalculator's original year loop
+    for _ in range(contributing):
+        balance += contribution
+        balance *= growth
+    for _ in range(growing):
+        balance *= growth
+    return balance
+
+
+def scalar_amortize(rate: float, pmt: float, pv: float, periods: int) -> List[float]:
+    balances = [pv]
+    for _ in range(periods):
+        pv = max(pv * (1 + rate) - pmt, 0)
+        balances.append(pv)
+    return balances
+
+
+def run(size: int = 10000, repeat: int = 5, seed: int = 11):
+    rng = random.Random(seed)
+    rate = 0.07
+    nper = [rng.randint(0, 40) for _ in range(size)]
+    pmt = [rng.uniform(0, 50000) for _ in range(size)]
+    pv = [rng.uniform(0, 1e6) for _ in range(size)]
+    growth = [1 + rng.uniform(-0.02, 0.12) for _ in range(size)]
+    contributing = [rng.randint(0, 40) for _ in range(size)]
+    growing = [rng.randint(0, 30) for _ in range(size)]
+    debt_rate = [rng.uniform(0, 0.03) for _ in range(size)]
+    debt = [rng.uniform(100, 1e5) for _ in range(size)]
+    payment = [d * r + rng.uniform(1, 5000) for d, r in zip(debt, debt_rate)]
+    nper_array, pmt_array, pv_array = np.array(nper), np.array(pmt), np.array(pv)
+
+    # Kernels must match the scalar formulas they replace
+    assert finmath.fv(rate, nper_array, pmt_array, pv_array).tolist() == [
+        scalar_fv(rate, n, p, v) for n, p, v in zip(nper, pmt, pv)
+    ]
+    assert finmath.compound(np.array(pv), np.array(growth), np.array(pmt), np.array(contributing), np.array(growing)).tolist() == [
+        scalar_compound(*args) for args in zip(pv, growth, pmt, contributing, growing)
+    ]
+    assert np.allclose(finmath.pv(rate, nper_array, 0.0, finmath.fv(rate, nper_array, 0.0, pv_array)), pv_array)
+    assert np.allclose(finmath.pv(rate, nper_array, pmt_array) * (1 + rate) ** nper_array, finmath.fv(rate, nper_array, pmt_array))
+    periods = finmath.nper(np.array(debt_rate), np.array(payment), np.array(debt))
+    assert np.allclose(finmath.pmt(np.array(debt_rate), periods, np.array(debt)), payment)
+    for r, p, d, n in list(zip(debt_rate, payment, debt, periods.tolist()))[:200]:
+        schedule = scalar_amortize(r, p, d, math.ceil(n))
+        assert schedule[-1] == 0 and schedule[-2] > 0
+    assert np.array_equal(
+        finmath.amortization_schedule(np.array(debt_rate[:200]), np.array(payment[:200]), np.array(debt[:200]), 60),
+        np.array([scalar_amortize(r, p, d, 60) for r, p, d in zip(debt_rate[:200], payment[:200], debt[:200])])
+    )
+
+    benchmarks = [
+        ('fv', lambda: finmath.fv(rate, nper_array, pmt_array, pv_array),
+         lambda: [scalar_fv(rate, n, p, v) for n, p, v in zip(nper, pmt, pv)]),
+        ('pv', lambda: finmath.pv(rate, nper_array, pmt_array, pv_array),
+         lambda: [v / (1 + rate) ** n + p * ((1 - 1 / (1 + rate) ** n) / rate) for n, p, v in zip(nper, pmt, pv)]),
+        ('pmt', lambda: finmath.pmt(rate, nper_array + 1, pv_array),
+         lambda: [v * (1 + rate) ** (n + 1) * rate / ((1 + rate) ** (n + 1) - 1) for n, v in zip(nper, pv)]),
+        ('nper', lambda: finmath.nper(np.array(debt_rate), np.array(payment), np.array(debt)),
+         lambda: [-math.log(1 - r * d / p) / math.log(1 + r) for r, p, d in zip(debt_rate, payment, debt)]),
+        ('amortization', lambda: finmath.amortization_schedule(np.array(debt_rate), np.array(payment), np.array(debt), 60),
+         lambda: [scalar_amortize(r, p, d, 60) for r, p, d in zip(debt_rate, payment, debt)]),
+        ('compound', lambda: finmath.compound(np.array(pv), np.array(growth), np.array(pmt), np.array(contributing), np.array(growing)),
+         lambda: [scalar_compound(*args) for args in zip(pv, growth, pmt, contributing, growing)]),
+        ('power_table', lambda: finmath.growth_power(rate, nper_array),
+         lambda: [(1 + rate) ** n for n in nper]),
+    ]
+
+    print(f"{'kernel':>13} {'size':>7} {'scalar ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for name, kernel, scalar in benchmarks:
+        kernel_ms = best_time(kernel, repeat)
+        scalar_ms = best_time(scalar, repeat)
+        print(f"{name:>13} {size:>7} {scalar_ms:>10.3f} {kernel_ms:>10.3f} {scalar_ms / kernel_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
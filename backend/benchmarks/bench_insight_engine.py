@@ -0,0 +1,64 @@
+"""
+Insight Engine Benchmark
+Compares per-user analyze_financial_profile calls against analyze_batch
+over a column store as the cohort grows
+
+Run from backend/:
+    python -m benchmarks.bench_insight_engine
+"""
+
+import random
+import time
+from typing import Any, Dict, List
+
+from app.services.insight_engine import InsightEngine
+
+
+PLAN_TYPES = ["Roth IRA", "Traditional 401k", "HSA", "Max-Funded IUL", "Real Estate", "529 Plan"]
+
+
+def build_users(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    """Random but plausible user profiles"""
+    rng = random.Random(seed)
+    users = []
+    for _ in range(count):
+        users.append({
+            'age': rng.randint(22, 64),
+            'monthly_income': rng.uniform(2500, 15000),
+            'side_income': rng.choice([0, 0, rng.uniform(100, 3000)]),
+            'monthly_expenses': rng.uniform(1500, 9000),
+            'savings': rng.uniform(0, 60000),
+            'investments': rng.choice([0, rng.uniform(0, 250000)]),
+            'debt': rng.choice([0, rng.uniform(0, 120000)]),
+            'plans': [
+                {'plan_type': rng.choice(PLAN_TYPES), 'monthly_contribution': rng.uniform(0, 1500)}
+                for _ in range(rng.randint(0, 3))
+            ]
+        })
+    return users
+
+
+def run(cohort_sizes: List[int] = (100, 1000, 10000)):
+    engine = InsightEngine()
+
+    print(f"{'users':>7} {'per-user ms':>12} {'batch ms':>9} {'speedup':>8}")
+    for count in cohort_sizes:
+        users = build_users(count)
+
+        start = time.perf_counter()
+        analyses = [engine.analyze_financial_profile(u) for u in users]
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        batch = engine.analyze_batch(engine.build_columns(users))
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        # Both modes must agree on every score and rating
+        assert batch['health_score']['score'].tolist() == [a['health_score']['score'] for a in analyses]
+        assert batch['health_score']['rating'].tolist() == [a['health_score']['rating'] for a in analyses]
+
+        print(f"{count:>7} {single_ms:>12.2f} {batch_ms:>9.2f} {single_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,155 @@
+"""
+Projection Engine Benchmark
+Compares replay plan valuation against incremental plan state
+as the projection horizon and number of plans grow, and the scalar
+engine against the vectorized scenario kernel as scenarios grow,
+and the annual loop against monthly resolution
+
+Run from backend/:
+    python -m benchmarks.bench_projection_engine
+"""
+
+import time
+from typing import Dict, Any, List
+
+from app.services.projection_engine import ProjectionEngine
+
+
+PLAN_TYPES = [
+    "Max-Funded IUL", "Whole Life (IBC)", "Roth IRA", "Traditional 401k",
+    "Roth 401k", "Solo 401k", "HSA", "529 Plan", "Real Estate",
+    "Private Equity", "CDs / Savings", "Non-Qual Annuity"
+]
+
+
+def build_user_data(age: int, retirement_age: int, plan_count: int) -> Dict[str, Any]:
+    """Representative user with plan_count plans"""
+    plans = [
+        {
+            'plan_type': PLAN_TYPES[i % len(PLAN_TYPES)],
+            'cash_value': 5000 + 1000 * i,
+            'monthly_contribution': 250 + 25 * i,
+            'years_to_contribute': 20 + i,
+            'user_current_age': age,
+            'income_rate': 0
+        }
+        for i in range(plan_count)
+    ]
+    return {
+        'age': age,
+        'monthly_income': 6500,
+        'side_income': 500,
+        'monthly_expenses': 4200,
+        'savings': 8000,
+        'investments': 15000,
+        'debt': 12000,
+        'debt_interest_rate': 0,
+        'plans': plans,
+        'retirement_age': retirement_age
+    }
+
+
+def time_engine(engine: ProjectionEngine, user_data: Dict[str, Any], repeat: int) -> float:
+    """Best-of-3 mean wall time per projection in milliseconds"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            engine.generate_full_projection(user_data, 'predicted')
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+def run(horizons: List[int] = (10, 25, 48), plan_counts: List[int] = (1, 4, 12), repeat: int = 20):
+    replay = ProjectionEngine(incremental_plan_values=False)
+    incremental = ProjectionEngine()
+
+    print(f"{'years':>6} {'plans':>6} {'replay ms':>11} {'incremental ms':>15} {'speedup':>8}")
+    for years in horizons:
+        for plan_count in plan_counts:
+            user_data = build_user_data(22, 22 + years, plan_count)
+
+            # Both modes must produce identical output
+            assert replay.generate_full_projection(user_data) == incremental.generate_full_projection(user_data)
+
+            replay_ms = time_engine(replay, user_data, repeat)
+            incremental_ms = time_engine(incremental, user_data, repeat)
+            print(f"{years:>6} {plan_count:>6} {replay_ms:>11.3f} {incremental_ms:>15.3f} {replay_ms / incremental_ms:>7.1f}x")
+
+
+def run_scenarios(scenario_counts: List[int] = (3, 30, 300), plan_count: int = 4, repeat: int = 5):
+    engine = ProjectionEngine()
+    scalar_engine = ProjectionEngine()
+    user_data = build_user_data(22, 70, plan_count)
+
+    print(f"\n{'scenarios':>9} {'scalar ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for count in scenario_counts:
+        scenarios = ['predicted', 'best', 'worst'] + [
+            {'name': f'custom_{i}', 'investment_return': 0.02 + 0.0002 * i}
+            for i in range(count - 3)
+        ]
+        params = [engine.resolve_scenario(s) for s in scenarios]
+
+        def scalar():
+            # Register each scenario's rates so the scalar engine can run it by name
+            for p in params:
+                scalar_engine.INVESTMENT_RETURNS[p['name']] = p['investment_return']
+                scalar_engine.PLAN_RETURNS[p['name']] = p['plan_returns']
+                scalar_engine.generate_full_projection(user_data, p['name'])
+
+        best_scalar = best_kernel = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                scalar()
+            best_scalar = min(best_scalar, (time.perf_counter() - start) / repeat)
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                engine.generate_scenarios(user_data, scenarios)
+            best_kernel = min(best_kernel, (time.perf_counter() - start) / repeat)
+
+        print(f"{count:>9} {best_scalar * 1000:>10.2f} {best_kernel * 1000:>10.2f} {best_scalar / best_kernel:>7.1f}x")
+
+
+def run_monte_carlo(path_counts: List[int] = (1000, 10000), plan_count: int = 12):
+    engine = ProjectionEngine()
+    user_data = build_user_data(20, 70, plan_count)
+
+    print(f"\n{'paths':>7} {'years':>6} {'ms':>9}")
+    for paths in path_counts:
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            engine.generate_monte_carlo(user_data, paths=paths, seed=42)
+            best = min(best, time.perf_counter() - start)
+        print(f"{paths:>7} {50:>6} {best * 1000:>9.1f}")
+
+
+def run_monthly(plan_counts: List[int] = (1, 4, 12), repeat: int = 20):
+    engine = ProjectionEngine()
+
+    print(f"\n{'plans':>6} {'annual ms':>10} {'monthly ms':>11} {'+months ms':>11}")
+    for plan_count in plan_counts:
+        user_data = build_user_data(22, 70, plan_count)
+        timings = []
+        for generate in (
+            lambda: engine.generate_full_projection(user_data),
+            lambda: engine.generate_monthly_projection(user_data),
+            lambda: engine.generate_monthly_projection(user_data, include_months=True)
+        ):
+            best = float('inf')
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    generate()
+                best = min(best, (time.perf_counter() - start) / repeat)
+            timings.append(best * 1000)
+        print(f"{plan_count:>6} {timings[0]:>10.3f} {timings[1]:>11.3f} {timings[2]:>11.3f}")
+
+
+if __name__ == "__main__":
+    run()
+    run_scenarios()
+    run_monte_carlo()
+    run_monthly()
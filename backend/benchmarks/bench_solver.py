@@ -0,0 +1,42 @@
+"""
+Goal-Seek Solver Benchmark
+Wall time per solve for each unknown as the horizon and number of
+plans grow, with the number of engine evaluations each solve needed
+
+Run from backend/:
+    python -m benchmarks.bench_solver
+"""
+
+import time
+from typing import List
+
+from app.services.goal_solver import GoalSolver
+from benchmarks.bench_projection_engine import build_user_data
+
+
+def run(horizons: List[int] = (10, 30, 48), plan_counts: List[int] = (1, 4, 12), repeat: int = 10):
+    solver = GoalSolver()
+
+    print(f"{'unknown':>21} {'years':>6} {'plans':>6} {'ms':>8} {'evals':>6} {'iters':>6}")
+    for unknown in ('monthly_contribution', 'expense_cut', 'return', 'retirement_age'):
+        for years in horizons:
+            for plan_count in plan_counts:
+                user_data = build_user_data(22, 65, plan_count)
+                target_age = 22 + years
+
+                # Aim 25% above the no-change outcome so the solve has work to do
+                baseline = solver.engine.generate_full_projection({**user_data, 'retirement_age': target_age})
+                target = baseline['summary']['ending_net_worth'] * 1.25
+
+                best = float('inf')
+                for _ in range(3):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        result = solver.solve(user_data, unknown, target, target_age)
+                    best = min(best, (time.perf_counter() - start) / repeat)
+                print(f"{unknown:>21} {years:>6} {plan_count:>6} {best * 1000:>8.2f} "
+                      f"{result['evaluations']:>6} {result['iterations']:>6}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,172 @@
+"""
+S&P 500 Service Load Test
+Fires concurrent requests at SP500Service against a stubbed, slow Yahoo
+Finance and checks that each burst makes exactly one upstream call: on a
+cold cache, on an expired entry, with the upstream failing, and across
+several "workers" (separate caches) sharing one SQLite backend. Then checks
+that with a background refresher requests never call upstream and stay
+under 5 ms at p99.
+
+Run from backend/:
+    python -m benchmarks.bench_sp500_service
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from app.services import sp500_service
+from app.services.market_cache import DictCacheBackend, MarketDataCache
+from app.services.market_refresher import MarketDataRefresher
+from app.services.result_cache import SQLiteCacheTier
+from app.services.sp500_service import SP500Service
+
+
+class FakeTicker:
+    """Stands in for yf.Ticker: counts history() calls and takes latency seconds each"""
+
+    calls = 0
+    latency = 0.2
+    fail = False
+    _lock = threading.Lock()
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        with FakeTicker._lock:
+            FakeTicker.calls += 1
+        time.sleep(FakeTicker.latency)
+        if FakeTicker.fail:
+            raise ConnectionError("upstream unavailable")
+        index = pd.date_range("2026-01-05", periods=5, freq="D")
+        closes = [4700.0 + 10 * i for i in range(5)]
+        return pd.DataFrame(
+            {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [1] * 5},
+            index=index
+        )
+
+
+def burst(call: Callable[[], Dict], concurrency: int) -> Dict:
+    """Run call from concurrency threads released at once; upstream calls, latencies, distinct results"""
+    barrier = threading.Barrier(concurrency)
+    latencies: List[float] = [0.0] * concurrency
+    results: List[Dict] = [None] * concurrency
+
+    def worker(i: int):
+        barrier.wait()
+        start = time.perf_counter()
+        results[i] = call()
+        latencies[i] = time.perf_counter() - start
+
+    FakeTicker.calls = 0
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        "calls": FakeTicker.calls,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "distinct": len({repr(sorted(r.items())) for r in results}),
+        "results": results
+    }
+
+
+def expire(cache: MarketDataCache, key: str, seconds: float = SP500Service.CACHE_DURATION_MINUTES * 60):
+    """Age key's entry by seconds (by default past the inline freshness window)"""
+    entry = cache.backend.get(key)
+    entry = {**entry, "fetched_at": entry["fetched_at"] - seconds}
+    cache.backend.set(key, entry, MarketDataCache.STALE_TTL_SECONDS)
+
+
+def run(concurrency: int = 200, workers: int = 4):
+    original_ticker, original_spacing = sp500_service.yf.Ticker, SP500Service.REFRESH_SPACING_SECONDS
+    sp500_service.yf.Ticker = FakeTicker
+    # Skip the refresher's rate-limit pause; the fake's latency stands in for the network
+    SP500Service.REFRESH_SPACING_SECONDS = 0
+    try:
+        cache = MarketDataCache(DictCacheBackend())
+        service = SP500Service(cache)
+        print(f"{'scenario':>18} {'requests':>9} {'upstream':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+        def report(name: str, stats: Dict):
+            print(f"{name:>18} {concurrency:>9} {stats['calls']:>9} "
+                  f"{stats['p50_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+
+        # Cold cache: everyone waits on the single fetch and shares its result
+        stats = burst(service.get_current_data, concurrency)
+        assert stats["calls"] == 1 and stats["distinct"] == 1
+        report("cold current", stats)
+
+        stats = burst(lambda: service.get_historical_data("1mo", "1d"), concurrency)
+        assert stats["calls"] == 1 and stats["distinct"] == 1
+        report("cold historical", stats)
+
+        # Warm cache: no upstream calls at all
+        stats = burst(service.get_current_data, concurrency)
+        assert stats["calls"] == 0
+        report("warm current", stats)
+
+        # Expired entry: one refresh while the rest are served the old entry
+        expire(cache, "sp500:current")
+        stats = burst(service.get_current_data, concurrency)
+        assert stats["calls"] == 1
+        report("expired current", stats)
+
+        # Failing upstream on an expired entry: one attempt, stale data for everyone
+        expire(cache, "sp500:current")
+        FakeTicker.fail = True
+        stats = burst(service.get_current_data, concurrency)
+        assert stats["calls"] == 1 and not any(r.get("mock") for r in stats["results"])
+        report("failing upstream", stats)
+        # The cached entry itself was never marked stale
+        assert "stale" not in cache.backend.get("sp500:current")["data"]
+        FakeTicker.fail = False
+
+        # Worker processes: separate caches (own single-flight) over one SQLite file
+        path = os.path.join(tempfile.mkdtemp(), "market.db")
+        services = [SP500Service(MarketDataCache(SQLiteCacheTier(path))) for _ in range(workers)]
+        counter = iter(range(concurrency))
+        stats = burst(lambda: services[next(counter) % workers].get_current_data(), concurrency)
+        assert stats["calls"] == 1 and stats["distinct"] == 1
+        report(f"{workers} workers", stats)
+
+        # Background refresh: one pass fetches everything, requests only read the cache
+        cache = MarketDataCache(DictCacheBackend())
+        service = SP500Service(cache, background_refresh=True)
+        FakeTicker.calls = 0
+        refreshed = MarketDataRefresher(service).run_once()
+        assert all(refreshed.values()) and FakeTicker.calls == len(refreshed) == 1 + len(SP500Service.STANDARD_PERIODS)
+        for name, call in [
+            ("refreshed current", service.get_current_data),
+            ("refreshed history", lambda: service.get_historical_data("6mo", "1d"))
+        ]:
+            stats = burst(call, concurrency)
+            assert stats["calls"] == 0 and stats["p99_ms"] < 5
+            report(name, stats)
+
+        # A refresh that is late (but within REFRESH_GRACE) still doesn't block requests
+        expire(cache, "sp500:current", service.refresh_interval() * 2)
+        stats = burst(service.get_current_data, concurrency)
+        assert stats["calls"] == 0 and stats["p99_ms"] < 5
+        report("late refresh", stats)
+
+        # The next pass re-fetches only what is due
+        FakeTicker.calls = 0
+        assert MarketDataRefresher(service).run_once() == {"current": True} and FakeTicker.calls == 1
+    finally:
+        FakeTicker.fail = False
+        sp500_service.yf.Ticker, SP500Service.REFRESH_SPACING_SECONDS = original_ticker, original_spacing
+
+
+if __name__ == "__main__":
+    run()
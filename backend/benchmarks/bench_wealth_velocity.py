@@ -0,0 +1,66 @@
+"""
+Wealth Velocity Engine Benchmark
+Compares per-user calculate_wealth_velocity calls against calculate_batch
+over a column store as the cohort grows
+
+Run from backend/:
+    python -m benchmarks.bench_wealth_velocity
+"""
+
+import random
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.wealth_velocity_engine import WealthVelocityEngine
+
+
+def build_users(count: int, seed: int = 5) -> List[Dict[str, Any]]:
+    """Random but plausible users spread across all three stages"""
+    rng = random.Random(seed)
+    users = []
+    for _ in range(count):
+        savings = rng.uniform(0, 80000)
+        investments = rng.choice([0, rng.uniform(0, 900000)])
+        debt = rng.choice([0, 0, rng.uniform(0, 60000)])
+        users.append({
+            'age': rng.randint(22, 80),
+            'net_worth': savings + investments - debt,
+            'savings': savings,
+            'investments': investments,
+            'debt': debt,
+            'monthly_expenses': rng.uniform(1500, 9000),
+            'monthly_income': rng.uniform(2500, 20000),
+            'side_income': rng.choice([0, rng.uniform(0, 3000)]),
+            'monthly_plan_contributions': rng.uniform(0, 3000)
+        })
+    return users
+
+
+def run(cohort_sizes: List[int] = (100, 1000, 10000, 100000)):
+    engine = WealthVelocityEngine()
+    stage_codes = {"Debt Payoff Mode": 0, "Foundation Building": 1, "Wealth Acceleration": 2}
+
+    print(f"{'users':>7} {'per-user ms':>12} {'batch ms':>9} {'speedup':>8}")
+    for count in cohort_sizes:
+        users = build_users(count)
+
+        start = time.perf_counter()
+        analyses = [engine.calculate_wealth_velocity(u) for u in users]
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        batch = engine.calculate_batch(engine.build_columns(users))
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        # Both modes must agree on stage, percentile and (rounded) velocity
+        assert batch['stage'].tolist() == [stage_codes[a['stage']] for a in analyses]
+        assert batch['percentile'].tolist() == [a['percentile'] for a in analyses]
+        assert np.allclose(batch['velocity'], [a['velocity'] for a in analyses], rtol=0, atol=0.005)
+
+        print(f"{count:>7} {single_ms:>12.2f} {batch_ms:>9.2f} {single_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,41 @@
+"""add snapshot_history
+
+Revision ID: 5e8a1f2c9d04
+Revises: b3d9e4c51a7f
+Create Date: 2026-10-17 11:03:12.582914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1f2c9d04'
+down_revision = 'b3d9e4c51a7f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('snapshot_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    sa.Column('net_worth', sa.BigInteger(), nullable=False),
+    sa.Column('total_assets', sa.BigInteger(), nullable=False),
+    sa.Column('debt', sa.BigInteger(), nullable=False),
+    sa.Column('monthly_income', sa.BigInteger(), nullable=False),
+    sa.Column('monthly_plan_contributions', sa.BigInteger(), nullable=False),
+    sa.Column('velocity_bp', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('snapshot_history', schema=None) as batch_op:
+        batch_op.create_index('ix_snapshot_history_user_recorded', ['user_id', 'recorded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('snapshot_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_snapshot_history_user_recorded')
+
+    op.drop_table('snapshot_history')
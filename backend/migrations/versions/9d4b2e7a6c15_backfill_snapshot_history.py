@@ -0,0 +1,151 @@
+"""backfill snapshot_history and net_worth_rollups
+
+Seeds one history row (recorded at the snapshot's updated_at) and its day,
+month and year rollups for every user who has a financial snapshot but no
+history yet, so existing users get a timeline without having to save their
+snapshot again. velocity_bp is left NULL (unscored); the first live save
+records a scored row.
+
+The column math is inlined as of this revision rather than imported from
+app.services.snapshot_history, so later changes there don't alter it.
+
+Revision ID: 9d4b2e7a6c15
+Revises: c71f0b6e3a58
+Create Date: 2026-10-17 16:20:41.337052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b2e7a6c15'
+down_revision = 'c71f0b6e3a58'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 1000
+
+snapshots = sa.table('financial_snapshots',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('age', sa.Integer),
+    sa.column('net_income', sa.Float),
+    sa.column('monthly_expenses', sa.Float),
+    sa.column('savings', sa.Float),
+    sa.column('investments', sa.Float),
+    sa.column('debt', sa.Float),
+    sa.column('side_income', sa.Float),
+    sa.column('updated_at', sa.DateTime)
+)
+plans = sa.table('financial_plans',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('cash_value', sa.Float),
+    sa.column('monthly_contribution', sa.Float)
+)
+history = sa.table('snapshot_history',
+    sa.column('user_id', sa.Integer),
+    sa.column('recorded_at', sa.DateTime),
+    sa.column('net_worth', sa.BigInteger),
+    sa.column('total_assets', sa.BigInteger),
+    sa.column('debt', sa.BigInteger),
+    sa.column('monthly_income', sa.BigInteger),
+    sa.column('monthly_plan_contributions', sa.BigInteger),
+    sa.column('velocity_bp', sa.Integer)
+)
+rollups = sa.table('net_worth_rollups',
+    sa.column('user_id', sa.Integer),
+    sa.column('resolution', sa.String),
+    sa.column('period_start', sa.Date),
+    sa.column('open', sa.BigInteger),
+    sa.column('close', sa.BigInteger),
+    sa.column('low', sa.BigInteger),
+    sa.column('high', sa.BigInteger),
+    sa.column('total', sa.BigInteger),
+    sa.column('samples', sa.Integer)
+)
+
+
+def period_starts(day):
+    """(resolution, first day of its period) for each rollup resolution containing day"""
+    return [
+        ('day', day),
+        ('month', day.replace(day=1)),
+        ('year', day.replace(month=1, day=1))
+    ]
+
+
+def history_row(snapshot, user_plans):
+    """snapshot_history values for a snapshot row and the user's plan rows"""
+    total_assets = (snapshot.savings or 0) + (snapshot.investments or 0)
+    total_assets += sum(plan.cash_value or 0 for plan in user_plans)
+    debt = snapshot.debt or 0
+
+    return {
+        'user_id': snapshot.user_id,
+        'recorded_at': snapshot.updated_at,
+        'net_worth': round(total_assets - debt),
+        'total_assets': round(total_assets),
+        'debt': round(debt),
+        'monthly_income': round((snapshot.net_income or 0) + (snapshot.side_income or 0)),
+        'monthly_plan_contributions': round(sum(plan.monthly_contribution or 0 for plan in user_plans)),
+        'velocity_bp': None
+    }
+
+
+def upgrade():
+    bind = op.get_bind()
+    recorded = sa.select(history.c.user_id).distinct()
+    # The routes read a user's first snapshot
+    first_snapshots = (
+        sa.select(sa.func.min(snapshots.c.id))
+        .where(snapshots.c.user_id.not_in(recorded))
+        .group_by(snapshots.c.user_id)
+    )
+
+    last_id = 0
+    while True:
+        chunk = bind.execute(
+            sa.select(snapshots)
+            .where(snapshots.c.id.in_(first_snapshots), snapshots.c.id > last_id)
+            .order_by(snapshots.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        user_plans = {}
+        for plan in bind.execute(
+            sa.select(plans).where(plans.c.user_id.in_([row.user_id for row in chunk])).order_by(plans.c.id)
+        ):
+            user_plans.setdefault(plan.user_id, []).append(plan)
+
+        history_rows, rollup_rows = [], []
+        for row in chunk:
+            values = history_row(row, user_plans.get(row.user_id, []))
+            history_rows.append(values)
+            net_worth = values['net_worth']
+            rollup_rows.extend(
+                {
+                    'user_id': row.user_id,
+                    'resolution': resolution,
+                    'period_start': start,
+                    'open': net_worth,
+                    'close': net_worth,
+                    'low': net_worth,
+                    'high': net_worth,
+                    'total': net_worth,
+                    'samples': 1
+                }
+                for resolution, start in period_starts(row.updated_at.date())
+            )
+
+        op.bulk_insert(history, history_rows)
+        op.bulk_insert(rollups, rollup_rows)
+
+
+def downgrade():
+    # Seeded rows are indistinguishable from recorded ones; they go when the tables are dropped
+    pass
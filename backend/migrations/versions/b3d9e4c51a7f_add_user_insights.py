@@ -0,0 +1,44 @@
+"""add user_insights
+
+Revision ID: b3d9e4c51a7f
+Revises: 71e1f609f648
+Create Date: 2026-10-17 09:12:40.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d9e4c51a7f'
+down_revision = '71e1f609f648'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_insights',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('health_score', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.String(length=30), nullable=False),
+    sa.Column('net_worth', sa.Float(), nullable=False),
+    sa.Column('savings_rate', sa.Float(), nullable=False),
+    sa.Column('months_covered', sa.Float(), nullable=False),
+    sa.Column('debt_to_income', sa.Float(), nullable=False),
+    sa.Column('age_group', sa.String(length=10), nullable=False),
+    sa.Column('net_worth_percentile', sa.Integer(), nullable=False),
+    sa.Column('savings_rate_percentile', sa.Integer(), nullable=False),
+    sa.Column('engine_version', sa.String(length=10), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_insights', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_insights_computed_at'), ['computed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_insights', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_insights_computed_at'))
+
+    op.drop_table('user_insights')
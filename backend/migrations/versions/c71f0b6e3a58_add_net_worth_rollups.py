@@ -0,0 +1,36 @@
+"""add net_worth_rollups
+
+Revision ID: c71f0b6e3a58
+Revises: 5e8a1f2c9d04
+Create Date: 2026-10-17 13:47:05.904163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71f0b6e3a58'
+down_revision = '5e8a1f2c9d04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('net_worth_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.String(length=5), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('open', sa.BigInteger(), nullable=False),
+    sa.Column('close', sa.BigInteger(), nullable=False),
+    sa.Column('low', sa.BigInteger(), nullable=False),
+    sa.Column('high', sa.BigInteger(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'resolution', 'period_start')
+    )
+
+
+def downgrade():
+    op.drop_table('net_worth_rollups')
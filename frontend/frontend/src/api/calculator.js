@@ -14,4 +14,8 @@ export const comparePlan = (data) => {
 
 export const compareMultiplePlans = (data) => {
   return api.post("/calculator/compare-multiple", data);
-};
\ No newline at end of file
+};
+// Slider sweeps: many parameter sets evaluated in one request
+export const compareBatch = (data) => {
+  return api.post("/calculator/batch", data);
+};
@@ -7,4 +7,9 @@ export const getFinancialSnapshot = () => {
 
 export const updateFinancialSnapshot = (data) => {
   return api.post("/financial-snapshot", data);
-};
\ No newline at end of file
+};
+
+// params: { start, end, resolution } (all optional)
+export const getNetWorthTimeline = (params) => {
+  return api.get("/financial-snapshot/timeline", { params });
+};